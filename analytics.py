@@ -0,0 +1,157 @@
+"""Analitik kehadiran satu kelas atau seluruh sekolah untuk satu periode (mis. semester atau tahun ajaran).
+
+Absensi dimuat sekali menjadi matriks NumPy siswa x hari sekolah berisi indeks KATEGORI_STATUS (-1 = tidak
+tercatat). Persentase, alpa beruntun, pola hari dan tanda absen kronis dihitung dengan operasi vektor atas
+matriks itu, tanpa loop Python per baris absensi. numpy opsional: pip install -r requirements-analytics.txt
+"""
+import os
+import time
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError("Analitik kehadiran membutuhkan numpy: pip install -r requirements-analytics.txt") from e
+
+from database import KATEGORI_STATUS, from_day, get_attendance_packed, get_siswa_roster, to_day
+
+# Absen kronis: alpa pada sedikitnya proporsi ini dari hari sekolah dalam periode.
+CHRONIC_ALPA_THRESHOLD = float(os.environ.get('CHRONIC_ALPA_THRESHOLD', '0.10'))
+# Baris siswa yang ditampilkan (urut paling banyak alpa); angka ringkasan tetap dihitung dari semua siswa.
+MAX_ROWS = 200
+LOWEST_DAYS = 5
+# Rentang terpanjang (hari kalender); selisih hari dikemas 16 bit oleh get_attendance_packed().
+MAX_DAYS = 731
+
+TIDAK_TERCATAT = -1
+HADIR = KATEGORI_STATUS.index('hadir')
+ALPA = KATEGORI_STATUS.index('alpa')
+NAMA_HARI = ('Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu')
+
+
+def load_matrix(siswa_ids, chunks, n_days):
+    """Matriks int8 siswa (urutan `siswa_ids`) x hari kalender sejak tanggal mulai, dari keluaran
+    get_attendance_packed(). Sel tanpa catatan bernilai TIDAK_TERCATAT."""
+    ids = np.asarray(siswa_ids, dtype=np.int64)
+    matrix = np.full((len(ids), n_days), TIDAK_TERCATAT, dtype=np.int8)
+    if not chunks or not len(ids):
+        return matrix
+    packed = np.concatenate([np.fromstring(c, dtype=np.int64, sep=',') for c in chunks])
+    order = np.argsort(ids)
+    sorted_ids = ids[order]
+    siswa = packed >> 32
+    pos = np.minimum(np.searchsorted(sorted_ids, siswa), len(ids) - 1)
+    # Siswa yang masuk kelas di antara dua query tidak punya baris di matriks.
+    known = sorted_ids[pos] == siswa
+    packed = packed[known]
+    matrix[order[pos[known]], (packed >> 16) & 0xFFFF] = packed & 0xFFFF
+    return matrix
+
+
+def longest_runs(mask):
+    """Per baris: panjang deret True berurutan terpanjang, dan panjang deret yang masih berlangsung
+    di kolom terakhir (0 jika kolom terakhir False)."""
+    n, d = mask.shape
+    padded = np.zeros((n, d + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    # Dalam urutan baris-kolom, awal ke-k dan akhir ke-k selalu milik deret yang sama.
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    lengths = ends - starts
+    longest = np.zeros(n, dtype=np.int64)
+    np.maximum.at(longest, rows, lengths)
+    current = np.zeros(n, dtype=np.int64)
+    ongoing = ends == d
+    current[rows[ongoing]] = lengths[ongoing]
+    return longest, current
+
+
+def _percent(numerator, denominator):
+    return np.round(100.0 * numerator / np.maximum(denominator, 1), 1)
+
+
+def analyze(tanggal_mulai, tanggal_akhir, kelas_id=None):
+    """Analitik kehadiran periode [tanggal_mulai, tanggal_akhir] (ISO) untuk satu kelas atau seluruh sekolah.
+    Hari sekolah = tanggal dengan sedikitnya satu catatan absensi dalam lingkup itu. Mengembalikan dict siap
+    tampil untuk templates/analitik.html; ValueError bila rentang kosong atau lebih dari MAX_DAYS hari."""
+    started = time.perf_counter()
+    day_from = to_day(tanggal_mulai)
+    n_days = to_day(tanggal_akhir) - day_from + 1
+    if not 0 < n_days <= MAX_DAYS:
+        raise ValueError(f"Rentang analitik harus 1-{MAX_DAYS} hari")
+    roster = get_siswa_roster(kelas_id)
+    matrix = load_matrix([r['id'] for r in roster], get_attendance_packed(tanggal_mulai, tanggal_akhir, kelas_id), n_days)
+    school_days = np.flatnonzero((matrix != TIDAK_TERCATAT).any(axis=0))
+    matrix = matrix[:, school_days]
+    n_siswa, n_school = matrix.shape
+
+    # Jumlah per kategori per siswa dalam satu bincount; kolom 0 = tidak tercatat, kolom i + 1 = KATEGORI_STATUS[i].
+    width = len(KATEGORI_STATUS) + 1
+    cells = (np.arange(n_siswa)[:, None] * width + matrix + 1).ravel()
+    counts = np.bincount(cells, minlength=n_siswa * width).reshape(n_siswa, width)
+    persen_hadir = _percent(counts[:, 1 + HADIR], n_school)
+    persen_alpa = _percent(counts[:, 1 + ALPA], n_school)
+    kronis = (counts[:, 1 + ALPA] >= CHRONIC_ALPA_THRESHOLD * n_school) & (counts[:, 1 + ALPA] > 0)
+
+    alpa = matrix == ALPA
+    alpa_beruntun, alpa_berjalan = longest_runs(alpa)
+
+    # Pola hari: hari dalam pekan setiap hari sekolah (1970-01-01 hari Kamis), lalu alpa per siswa per hari.
+    weekday = (day_from + school_days + 3) % 7
+    onehot = np.zeros((n_school, 7), dtype=np.int32)
+    onehot[np.arange(n_school), weekday] = 1
+    alpa_per_weekday = alpa.astype(np.int32) @ onehot
+    hari_alpa = alpa_per_weekday.argmax(axis=1)
+    porsi_hari_alpa = _percent(alpa_per_weekday.max(axis=1), counts[:, 1 + ALPA])
+
+    tercatat_per_hari = (matrix != TIDAK_TERCATAT).sum(axis=0)
+    hadir_per_hari = (matrix == HADIR).sum(axis=0)
+    alpa_per_hari = alpa.sum(axis=0)
+    hari_per_weekday = np.bincount(weekday, minlength=7)
+    tercatat_weekday = np.bincount(weekday, weights=tercatat_per_hari, minlength=7)
+    hadir_weekday = _percent(np.bincount(weekday, weights=hadir_per_hari, minlength=7), tercatat_weekday)
+    alpa_weekday = _percent(np.bincount(weekday, weights=alpa_per_hari, minlength=7), tercatat_weekday)
+    hadir_harian = hadir_per_hari / np.maximum(tercatat_per_hari, 1)
+    terendah = np.argsort(hadir_harian, kind='stable')[:LOWEST_DAYS]
+
+    # Urutan tampil: absen kronis dulu, lalu persentase alpa tertinggi, lalu nama.
+    ranked = np.lexsort((np.arange(n_siswa), -persen_alpa, ~kronis))[:MAX_ROWS]
+    columns = {
+        'tidak_tercatat': counts[:, 0], 'persen_hadir': persen_hadir, 'persen_alpa': persen_alpa, 'kronis': kronis,
+        'alpa_beruntun': alpa_beruntun, 'alpa_berjalan': alpa_berjalan, 'porsi_hari_alpa': porsi_hari_alpa,
+        **{k: counts[:, i + 1] for i, k in enumerate(KATEGORI_STATUS)},
+    }
+    columns = {name: values[ranked].tolist() for name, values in columns.items()}
+    hari_alpa = hari_alpa[ranked].tolist()
+    siswa = []
+    for i, r in enumerate(ranked.tolist()):
+        row = {'id': roster[r]['id'], 'nama': roster[r]['nama'], 'nis': roster[r]['nis'],
+               'nama_kelas': roster[r]['nama_kelas']}
+        row.update((name, values[i]) for name, values in columns.items())
+        row['hari_alpa'] = NAMA_HARI[hari_alpa[i]] if row['alpa'] else None
+        siswa.append(row)
+
+    total = counts.sum(axis=0)
+    return {
+        'tanggal_mulai': tanggal_mulai,
+        'tanggal_akhir': tanggal_akhir,
+        'jumlah_siswa': n_siswa,
+        'hari_sekolah': n_school,
+        'total': {'tidak_tercatat': int(total[0]), **{k: int(total[i + 1]) for i, k in enumerate(KATEGORI_STATUS)}},
+        'persen_hadir': float(_percent(total[1 + HADIR], n_siswa * n_school)),
+        'persen_alpa': float(_percent(total[1 + ALPA], n_siswa * n_school)),
+        'kronis': int(kronis.sum()),
+        'ambang_kronis': round(CHRONIC_ALPA_THRESHOLD * 100, 1),
+        'per_hari_pekan': [
+            {'hari': NAMA_HARI[w], 'hari_sekolah': int(hari_per_weekday[w]),
+             'persen_hadir': float(hadir_weekday[w]), 'persen_alpa': float(alpa_weekday[w])}
+            for w in range(7) if hari_per_weekday[w]
+        ],
+        'hari_terendah': [
+            {'tanggal': from_day(day_from + int(school_days[j])), 'persen_hadir': round(100.0 * hadir_harian[j], 1),
+             'tercatat': int(tercatat_per_hari[j])}
+            for j in terendah.tolist()
+        ],
+        'siswa': siswa,
+        'durasi_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
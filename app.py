@@ -1,30 +1,106 @@
-from flask import Flask, render_template, request, redirect, url_for, session
-from werkzeug.security import generate_password_hash, check_password_hash
-import sqlite3
+import time
+_import_started = time.perf_counter()
+from flask import Flask, Response, g, jsonify, render_template, request, redirect, url_for, session
 import os
+from cache import get_cached_user, invalidate_user, kelas_cache, mapel_cache
+import jobs
+import metrics
+from login_guard import LoginRejected, admit_login, hash_password, verify_password
 from database import (
-    init_db, get_db_connection, get_user_by_id, get_all_users, get_list_mapel,
-    get_all_kelas, add_kelas, delete_kelas_by_id, get_kelas_by_id, 
-    get_siswa_by_kelas, add_new_siswa, delete_siswa_by_id, get_siswa_by_nis, get_siswa_by_nama,
-    add_attendance, attendance_exists, get_attendance_for_student, update_siswa_kelas,
-    get_nama_kelas_by_id, get_siswa_by_search,
+    init_app, init_db, query_budget, get_guru_by_email, add_guru, update_guru, get_users_page, get_siswa_page, get_attendance_page, PAGE_SIZE,
+    add_kelas, delete_kelas_by_id, get_kelas_by_id, 
+    get_siswa_by_kelas, get_siswa_by_kelas_with_status, add_new_siswa, delete_siswa_by_id, get_siswa_by_nis, get_siswa_by_id,
+    add_attendance, attendance_exists, get_attendance_status, record_attendance_batch, get_attendance_for_student, update_siswa_kelas,
+    get_siswa_by_search, search_siswa, get_rekap_bulanan, get_rekap_semester, get_rekap_kelas_harian, KATEGORI_STATUS, is_valid_status,
+    TAHUN_AJARAN_MULAI,
 
 )
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dika1234') 
 
-
+# Rincian cold start (penting di serverless): import modul, init_db dan request pertama proses ini.
+STARTUP_REPORT = os.environ.get('STARTUP_REPORT', '1') == '1'
+STARTUP_TIMING = {'import_ms': None, 'init_db_ms': None, 'migrations': None, 'first_request_ms': None, 'first_request': None}
+
+@app.before_request
+def _start_first_request_timer():
+    # Didaftarkan sebelum hook lain agar request pertama diukur utuh.
+    if STARTUP_TIMING['first_request_ms'] is None:
+        g.startup_started = time.perf_counter()
+
+@app.teardown_request
+def _report_startup(e=None):
+    started = g.pop('startup_started', None)
+    if started is None or STARTUP_TIMING['first_request_ms'] is not None:
+        return
+    STARTUP_TIMING['first_request_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    STARTUP_TIMING['first_request'] = f"{request.method} {request.path}"
+    if STARTUP_REPORT:
+        migrations = STARTUP_TIMING['migrations']
+        print(f"Startup (pid {os.getpid()}): import {STARTUP_TIMING['import_ms']} ms, "
+              f"init_db {STARTUP_TIMING['init_db_ms']} ms ({'migrasi ' + str(migrations) if migrations else 'skema terbaru'}), "
+              f"request pertama {STARTUP_TIMING['first_request_ms']} ms ({STARTUP_TIMING['first_request']})")
+
+init_app(app)
+metrics.init_app(app)
+jobs.init_app(app)
+
+ABSEN_TIMEOUT = 10
+SEARCH_PER_PAGE = 10
+
+
+_init_started = time.perf_counter()
+STARTUP_TIMING['import_ms'] = round((_init_started - _import_started) * 1000, 2)
 with app.app_context():
-    init_db()
-
-def login_required(f):
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            return redirect(url_for('home')) 
-        return f(*args, **kwargs)
-    decorated_function.__name__ = f.__name__
-    return decorated_function
+    # Skema terbaru hanya membutuhkan satu pembacaan PRAGMA user_version (lihat database.init_db).
+    STARTUP_TIMING['migrations'] = init_db()
+STARTUP_TIMING['init_db_ms'] = round((time.perf_counter() - _init_started) * 1000, 2)
+
+def current_user():
+    # Guru yang sedang login; dimuat sekali per request ke `g` (dari cache LRU+TTL lintas request).
+    if 'current_user' not in g:
+        g.current_user = None
+        if 'user_id' in session and session.get('user_type') != 'siswa':
+            g.current_user = get_cached_user(session['user_id'])
+    return g.current_user
+
+def load_page(fetch, *args):
+    # Menjalankan fungsi daftar berhalaman (keyset) dengan parameter after/before/per_page dari query string.
+    try:
+        limit = int(request.args.get('per_page', PAGE_SIZE))
+    except ValueError:
+        limit = PAGE_SIZE
+    try:
+        return fetch(*args, after=request.args.get('after'), before=request.args.get('before'), limit=limit)
+    except ValueError:
+        # Cursor rusak atau kedaluwarsa: kembali ke halaman pertama.
+        return fetch(*args, limit=limit)
+
+LOGIN_BUSY_MESSAGE = "Terlalu banyak percobaan login. Silakan coba lagi sebentar lagi."
+
+def login_rejected(e, template, **context):
+    # 429 cepat tanpa query maupun hashing; Retry-After memberi tahu klien kapan boleh mencoba lagi.
+    response = app.make_response((render_template(template, **context), 429))
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+def login_required(f=None, role=None):
+    # Bisa dipakai sebagai @login_required atau @login_required(role='guru').
+    def decorator(f):
+        def decorated_function(*args, **kwargs):
+            if 'user_id' not in session:
+                return redirect(url_for('home')) 
+            if role is not None:
+                user = current_user()
+                if not user or user['role'] != role:
+                    return "Hanya guru yang dapat mengakses ini", 403
+            return f(*args, **kwargs)
+        decorated_function.__name__ = f.__name__
+        return decorated_function
+    if f is not None:
+        return decorator(f)
+    return decorator
 
 @app.route('/')
 def home():
@@ -42,10 +118,14 @@ def login():
     if request.method == 'POST':
         email = request.form['email']
         password = request.form['password']
-        conn = get_db_connection()
-        user = conn.execute("SELECT * FROM guru WHERE email = ?", (email,)).fetchone()
-        conn.close()
-        if user and check_password_hash(user['password'], password):
+        try:
+            admit_login('login', request.remote_addr, email)
+            user = get_guru_by_email(email)
+            valid = bool(user) and verify_password(user['password'], password, 'login', upgrade=('guru', user['id']))
+        except LoginRejected as e:
+            return login_rejected(e, 'login.html', error=LOGIN_BUSY_MESSAGE)
+        if valid:
+            session['user_type'] = 'guru'
             session['user_id'] = user['id']
             return redirect(url_for('dashboard'))
         return render_template('login.html', error="Email atau password salah")
@@ -59,43 +139,37 @@ def register():
         email = request.form['email']
         mata_pelajaran = request.form['mata_pelajaran']
         password = request.form['password']
-        conn = get_db_connection()
-        hashed_password = generate_password_hash(password)
-        try:
-            conn.execute(
-                "INSERT INTO guru (nama, email, mata_pelajaran, password, role) VALUES (?, ?, ?, ?, ?)",
-                (nama, email, mata_pelajaran, hashed_password, 'guru')
-            )
-            conn.commit()
+        with metrics.registry.timer('password_hash_seconds', endpoint='register'):
+            hashed_password = hash_password(password)
+        if add_guru(nama, email, mata_pelajaran, hashed_password):
             return render_template('login.html', success="Registrasi berhasil, silakan login")
-        except sqlite3.IntegrityError:
-            conn.rollback()
-            return render_template('register.html', error="Email sudah terdaftar. Mohon gunakan email lain.")
-        finally:
-            conn.close()
+        return render_template('register.html', error="Email sudah terdaftar. Mohon gunakan email lain.")
     return render_template('register.html')
 
 @app.route('/logout')
 def logout():
     session.pop('user_id', None)
+    session.pop('user_type', None)
     return redirect(url_for('login'))
 
 
 
 @app.route('/dashboard')
+@query_budget(6)
 @login_required
 def dashboard():
-    guru = get_user_by_id(session['user_id'])
+    guru = current_user()
     
     # Logika Filter dan Pencarian Guru
     search_term = request.args.get('search', '').strip()
     filter_mapel = request.args.get('mapel', 'Semua')
-    all_users = get_all_users(search_term, filter_mapel)
-    mapel_list = get_list_mapel()
+    page = load_page(get_users_page, search_term, filter_mapel)
+    mapel_list = mapel_cache.get()
 
     return render_template('dashboard.html', 
                            guru=guru, 
-                           all_users=all_users, 
+                           all_users=page.rows, 
+                           page=page,
                            mapel_list=mapel_list,
                            current_search=search_term,
                            current_mapel=filter_mapel)
@@ -120,7 +194,7 @@ def manage_kelas():
             else:
                 return redirect(url_for('manage_kelas', msg=f"Kelas '{nama_kelas}' sudah ada di database.", type='error'))
 
-    kelas_list = get_all_kelas()
+    kelas_list = kelas_cache.get()
     return render_template('manage_kelas.html', 
                            kelas_list=kelas_list,
                            message=message,
@@ -137,6 +211,7 @@ def delete_kelas(kelas_id):
 
         
 @app.route('/manage_kelas/<int:kelas_id>')
+@query_budget(4)
 @login_required
 def detail_kelas(kelas_id):
     # Menampilkan detail kelas dan daftar siswa
@@ -178,13 +253,39 @@ def add_siswa_to_kelas(kelas_id):
     return redirect(url_for('detail_kelas', kelas_id=kelas_id, msg=message, type=msg_type))
 
 
+@app.route('/kelas/<int:kelas_id>/import_siswa', methods=['POST'])
+@login_required(role='guru')
+def import_siswa_to_kelas(kelas_id):
+    # Impor massal siswa dari file CSV/JSON ke kelas ini.
+    kelas = get_kelas_by_id(kelas_id)
+    if not kelas:
+        return redirect(url_for('manage_kelas', msg="Kelas tidak ditemukan.", type='error'))
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return redirect(url_for('detail_kelas', kelas_id=kelas_id, msg="Pilih file CSV atau JSON terlebih dahulu.", type='error'))
+
+    from import_siswa import import_roster, parse_roster
+    try:
+        rows = parse_roster(upload.read(), upload.filename)
+    except (ValueError, UnicodeDecodeError) as e:
+        return redirect(url_for('detail_kelas', kelas_id=kelas_id, msg=f"File tidak dapat dibaca: {e}", type='error'))
+
+    inserted, import_errors = import_roster(rows, kelas_id=kelas_id)
+    message = f"{inserted} siswa berhasil diimpor, {len(import_errors)} baris gagal."
+    return render_template('detail_kelas.html',
+                           kelas=kelas,
+                           siswa_list=get_siswa_by_kelas(kelas_id),
+                           message=message,
+                           msg_type='error' if import_errors else 'success',
+                           import_errors=import_errors)
+
+
 @app.route('/delete_siswa/<int:siswa_id>', methods=['POST'])
 @login_required
 def delete_siswa_route(siswa_id):
     # Menghapus siswa berdasarkan ID dan mengarahkan kembali ke kelas asalnya.
-    conn = get_db_connection()
-    siswa = conn.execute("SELECT kelas_id FROM siswa WHERE id = ?", (siswa_id,)).fetchone()
-    conn.close()
+    siswa = get_siswa_by_id(siswa_id)
     
     if not siswa:
         return redirect(url_for('manage_kelas', msg="Siswa tidak ditemukan.", type='error'))
@@ -200,17 +301,19 @@ def delete_siswa_route(siswa_id):
 @app.route('/login/siswa', methods=['GET', 'POST'])
 def siswa_login():
     # show available kelas for selection
-    kelas_list = get_all_kelas()
+    kelas_list = kelas_cache.get()
 
     if request.method == 'POST':
         nis_input = request.form.get('nis')
         password_input = request.form.get('password')
         selected_kelas = request.form.get('kelas_id')
         try:
+            admit_login('siswa_login', request.remote_addr, nis_input)
             siswa = get_siswa_by_nis(nis_input)
 
             if siswa:
-                if check_password_hash(siswa['password'], password_input):
+                valid = verify_password(siswa['password'], password_input, 'siswa_login', upgrade=('siswa', siswa['id']))
+                if valid:
                     session['user_type'] = 'siswa'
                     session['user_id'] = siswa['id']
                     session['user_nama'] = siswa['nama']
@@ -229,6 +332,8 @@ def siswa_login():
                     return render_template('login_siswa.html', error_message='NIS atau Password salah.', kelas_list=kelas_list)
             else:
                 return render_template('login_siswa.html', error_message='NIS atau Password salah.', kelas_list=kelas_list)
+        except LoginRejected as e:
+            return login_rejected(e, 'login_siswa.html', error_message=LOGIN_BUSY_MESSAGE, kelas_list=kelas_list)
         except Exception as e:
             print(f"Error during siswa_login: {e}")
             return render_template('login_siswa.html', error_message='Terjadi kesalahan saat login. Silakan coba lagi atau hubungi admin.', kelas_list=kelas_list)
@@ -236,6 +341,7 @@ def siswa_login():
     return render_template('login_siswa.html', kelas_list=kelas_list)
 
 @app.route('/catat_absensi')
+@query_budget(6)
 @login_required
 def catat_absensi():
     nama = request.args.get('nama')
@@ -248,7 +354,10 @@ def catat_absensi():
     existing_status = None
     checked = False
 
-    kelas_list = get_all_kelas()
+    kelas_list = kelas_cache.get()
+    selected_kelas_nama = None
+    if kelas_id:
+        selected_kelas_nama = next((k['nama_kelas'] for k in kelas_list if str(k['id']) == kelas_id), "kelas tidak diketahui")
 
     if nama:
         checked = True
@@ -259,13 +368,8 @@ def catat_absensi():
             k = None
         siswa = get_siswa_by_search(nama, k)
         if siswa:
-            if attendance_exists(siswa['id'], tanggal):
-                exists = True
-                rows = get_attendance_for_student(siswa['id'], limit=200)
-                for r in rows:
-                    if r['tanggal'] == tanggal:
-                        existing_status = r['status']
-                        break
+            existing_status = get_attendance_status(siswa['id'], tanggal)
+            exists = existing_status is not None
 
     return render_template('catat_absensi.html', 
                            siswa=siswa, 
@@ -275,27 +379,44 @@ def catat_absensi():
                            checked=checked,
                            kelas_list=kelas_list,
                            selected_kelas_id=kelas_id,
-                           get_nama_kelas_by_id=get_nama_kelas_by_id)
+                           selected_kelas_nama=selected_kelas_nama)
+
+
+@app.route('/api/siswa/search')
+@query_budget(3)
+@login_required
+def api_search_siswa():
+    # Typeahead untuk catat_absensi: hasil pencarian berperingkat dan berhalaman dalam JSON.
+    q = request.args.get('q', '').strip()
+    try:
+        k = int(request.args['kelas_id']) if request.args.get('kelas_id') else None
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', SEARCH_PER_PAGE)), 1), 50)
+    except ValueError:
+        return jsonify(error='Parameter tidak valid'), 400
+
+    rows = search_siswa(q, k, limit=per_page + 1, offset=(page - 1) * per_page)
+    return jsonify(
+        results=[{'id': r['id'], 'nama': r['nama'], 'nis': r['nis'], 'kelas_id': r['kelas_id'], 'nama_kelas': r['nama_kelas']}
+                 for r in rows[:per_page]],
+        page=page,
+        has_next=len(rows) > per_page,
+    )
 
 
 @app.route('/siswa/dashboard')
+@query_budget(6)
 def siswa_dashboard():  
     if session.get('user_type') != 'siswa' or 'user_id' not in session:
         return redirect(url_for('home'))
-    siswa = None
-    conn = get_db_connection()
-    siswa = conn.execute("SELECT * FROM siswa WHERE id = ?", (session['user_id'],)).fetchone()
-    conn.close()
+    siswa = get_siswa_by_id(session['user_id'])
     if not siswa:
         return redirect(url_for('home'))
 
     import datetime
     today = datetime.date.today().isoformat()
-    has_today = attendance_exists(siswa['id'], today)
-    today_status = None
-    if has_today:
-        row = get_attendance_for_student(siswa['id'], limit=1)[0]
-        today_status = row['status']
+    today_status = get_attendance_status(siswa['id'], today)
+    has_today = today_status is not None
 
     attendance = get_attendance_for_student(siswa['id'], limit=50)
 
@@ -323,28 +444,42 @@ def siswa_dashboard():
 def siswa_absen():
     if session.get('user_type') != 'siswa' or 'user_id' not in session:
         return redirect(url_for('home'))
-    siswa_id = request.form.get('siswa_id') or session['user_id']
+    try:
+        siswa_id = int(request.form.get('siswa_id') or session['user_id'])
+    except ValueError:
+        return "ID siswa tidak valid", 400
     status = request.form.get('status')
+    if not is_valid_status(status):
+        return "Status absensi tidak valid", 400
     import datetime
     today = datetime.date.today().isoformat()
     if attendance_exists(siswa_id, today):
         return redirect(url_for('siswa_dashboard'))
-    ok = add_attendance(siswa_id, status, today, recorded_by=None)
+    # Check-in digabung dengan request lain dalam satu commit; baris yang sudah ada tidak ditimpa.
+    from write_queue import attendance_queue
+    try:
+        attendance_queue.submit(siswa_id, status, today, recorded_by=None).result(timeout=ABSEN_TIMEOUT)
+    except Exception as e:
+        print(f"Error siswa_absen: {e}")
     return redirect(url_for('siswa_dashboard'))
 
 
 @app.route('/catat_absensi', methods=['POST'])
-@login_required
+@login_required(role='guru')
 def catat_absensi_post():
-    guru = get_user_by_id(session['user_id'])
-    if not guru or guru['role'] != 'guru':
-        return "Hanya guru yang dapat mengakses ini", 403
+    guru = current_user()
     siswa_id = request.form.get('siswa_id')
     nama = request.form.get('nama')
     kelas_id = request.form.get('kelas_id')
     status = request.form.get('status')
     import datetime
     tanggal = datetime.date.today().isoformat()
+    if not is_valid_status(status):
+        return redirect(url_for('catat_absensi', nama=nama, tanggal=tanggal, msg='Status absensi tidak valid', type='error'))
+    try:
+        siswa_id = int(siswa_id) if siswa_id else None
+    except ValueError:
+        return redirect(url_for('catat_absensi', nama=nama, tanggal=tanggal, msg='Siswa tidak ditemukan', type='error'))
     if not siswa_id and nama:
         try:
             k = int(kelas_id) if kelas_id else None
@@ -365,55 +500,55 @@ def catat_absensi_post():
 
 
 @app.route('/kelas/<int:kelas_id>/absensi', methods=['GET', 'POST'])
-@login_required
+@query_budget(8)
+@login_required(role='guru')
 def kelas_absensi(kelas_id):
-    guru = get_user_by_id(session['user_id'])
-    if not guru or guru['role'] != 'guru':
-        return "Hanya guru yang dapat mengakses ini", 403
+    guru = current_user()
 
     kelas = get_kelas_by_id(kelas_id)
     if not kelas:
         return redirect(url_for('manage_kelas', msg='Kelas tidak ditemukan', type='error'))
 
-    siswa_list = get_siswa_by_kelas(kelas_id)
     import datetime
     today = datetime.date.today().isoformat()
-
-    attendance_map = {}
-    for s in siswa_list:
-        rows = get_attendance_for_student(s['id'], limit=1)
-        if rows:
-            if rows[0]['tanggal'] == today:
-                attendance_map[s['id']] = rows[0]['status']
+    siswa_list = get_siswa_by_kelas_with_status(kelas_id, today)
 
     if request.method == 'POST':
-        any_changed = False
+        rows = []
         for s in siswa_list:
             field = f"status_{s['id']}"
             status = request.form.get(field)
             if status:
-                if attendance_exists(s['id'], today):
-                    continue
-                ok = add_attendance(s['id'], status, today, recorded_by=guru['id'])
-                if ok:
-                    any_changed = True
-
-        if any_changed:
-            return redirect(url_for('kelas_absensi', kelas_id=kelas_id, msg='Absensi berhasil disimpan'))
+                if not is_valid_status(status):
+                    return redirect(url_for('kelas_absensi', kelas_id=kelas_id, msg='Status absensi tidak valid', type='error'))
+                rows.append((s['id'], status, today))
+
+        outcomes = record_attendance_batch(rows, recorded_by=guru['id'])
+        if outcomes is None:
+            return redirect(url_for('kelas_absensi', kelas_id=kelas_id, msg='Gagal menyimpan absensi', type='error'))
+
+        inserted = sum(1 for o in outcomes.values() if o == 'inserted')
+        updated = sum(1 for o in outcomes.values() if o == 'updated')
+        if inserted or updated:
+            return redirect(url_for('kelas_absensi', kelas_id=kelas_id, msg=f'Absensi berhasil disimpan: {inserted} baru, {updated} diperbarui'))
         else:
-            return redirect(url_for('kelas_absensi', kelas_id=kelas_id, msg='Tidak ada perubahan atau absensi sudah ada untuk beberapa siswa', type='error'))
+            return redirect(url_for('kelas_absensi', kelas_id=kelas_id, msg='Tidak ada perubahan absensi', type='error'))
+
+    rekap = get_rekap_kelas_harian(kelas_id, today, today)
+    rekap_hari_ini = {k: (rekap[0][k] if rekap else 0) for k in KATEGORI_STATUS}
 
     message = request.args.get('msg')
     msg_type = request.args.get('type', 'success')
-    return render_template('kelas_absensi.html', kelas=kelas, siswa_list=siswa_list, guru=guru, today=today, attendance_map=attendance_map, message=message, msg_type=msg_type)
+    return render_template('kelas_absensi.html', kelas=kelas, siswa_list=siswa_list, guru=guru, today=today, rekap_hari_ini=rekap_hari_ini, message=message, msg_type=msg_type)
 
 
 @app.route('/laporan_absensi/<int:siswa_id>')
-@login_required
+# Halaman yang melewati batas data hot menjalankan query riwayat sekali lagi atas gabungan arsip,
+# ditambah pembacaan daftar arsip saat cache-nya diperbarui.
+@query_budget(7)
+@login_required(role='guru')
 def laporan_absensi(siswa_id):
-    guru = get_user_by_id(session['user_id'])
-    if not guru or guru['role'] != 'guru':
-        return "Hanya guru yang dapat mengakses ini", 403
+    guru = current_user()
 
     from database import get_siswa_by_id
     siswa_row = get_siswa_by_id(siswa_id)
@@ -428,60 +563,82 @@ def laporan_absensi(siswa_id):
     if 'nama_siswa' not in siswa:
         siswa['nama_siswa'] = siswa.get('nama')
 
-    attendance_records = get_attendance_for_student(siswa_id, limit=500)
-
-    from collections import defaultdict
-    import datetime
-
-    laporan_bulanan = defaultdict(lambda: {'hadir':0, 'sakit':0, 'izin':0, 'alpa':0})
-    laporan_semester = defaultdict(lambda: {'hadir':0, 'sakit':0, 'izin':0, 'alpa':0})
-
-    for r in attendance_records:
-        try:
-            dt = datetime.datetime.fromisoformat(r['tanggal'])
-        except Exception:
-            dt = datetime.datetime.strptime(r['tanggal'], '%Y-%m-%d')
-
-        bulan_label = dt.strftime('%Y-%m')
-        sem_label = 'Semester 1' if dt.month <=6 else 'Semester 2'
-        key_sem = f"{dt.year} {sem_label}"
-
-        status = (r['status'] or '').lower()
-        if 'hadir' in status or status == 'h' or status == 'present':
-            field = 'hadir'
-        elif 'sakit' in status or status == 's':
-            field = 'sakit'
-        elif 'izin' in status or status == 'i':
-            field = 'izin'
-        else:
-            field = 'alpa'
+    page = load_page(get_attendance_page, siswa_id)
 
-        laporan_bulanan[bulan_label][field] += 1
-        laporan_semester[key_sem][field] += 1
+    laporan_bulanan = {r['periode']: {k: r[k] for k in KATEGORI_STATUS} for r in get_rekap_bulanan(siswa_id)}
+    laporan_semester = {r['periode']: {k: r[k] for k in KATEGORI_STATUS} for r in get_rekap_semester(siswa_id)}
 
-    laporan_bulanan = dict(laporan_bulanan)
-    laporan_semester = dict(laporan_semester)
-
-   
-
-    return render_template('laporan_absensi.html', siswa=siswa, attendance_records=attendance_records, guru=guru, laporan_bulanan=laporan_bulanan, laporan_semester=laporan_semester)
+    return render_template('laporan_absensi.html', siswa=siswa, attendance_records=page.rows, guru=guru, laporan_bulanan=laporan_bulanan, laporan_semester=laporan_semester, page=page)
 
 
 @app.route('/laporan')
-@login_required
+@query_budget(4)
+@login_required(role='guru')
 def laporan_index():
-    guru = get_user_by_id(session['user_id'])
-    if not guru or guru['role'] != 'guru':
-        return "Hanya guru yang dapat mengakses ini", 403
+    page = load_page(get_siswa_page)
+    kelas_list = kelas_cache.get()
+    return render_template('laporan_index.html', siswa_list=page.rows, page=page, kelas_list=kelas_list)
+
+@app.route('/laporan/export.csv')
+@login_required(role='guru')
+def export_absensi():
+    from export import iter_attendance_csv
+    import datetime
+    today = datetime.date.today()
+    try:
+        dari = datetime.date.fromisoformat(request.args.get('dari') or datetime.date(today.year, 1, 1).isoformat())
+        sampai = datetime.date.fromisoformat(request.args.get('sampai') or today.isoformat())
+        kelas_id = int(request.args['kelas_id']) if request.args.get('kelas_id') else None
+    except ValueError:
+        return "Parameter tanggal atau kelas tidak valid", 400
+
+    filename = f"absensi_{dari.isoformat()}_{sampai.isoformat()}{'_kelas' + str(kelas_id) if kelas_id else ''}.csv"
+    return Response(
+        iter_attendance_csv(dari.isoformat(), sampai.isoformat(), kelas_id),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+@app.route('/analitik')
+# Satu query absensi per sumber (tabel aktif + arsip tahun ajaran yang beririsan dengan periode),
+# ditambah pembacaan daftar arsip dan kelas saat cache-nya diperbarui.
+@query_budget(8)
+@login_required(role='guru')
+def analitik_kehadiran():
+    # Default: tahun ajaran berjalan sampai hari ini. numpy opsional, jadi analytics diimpor saat dipakai saja.
+    import datetime
+    today = datetime.date.today()
+    tahun = today.year if today.month >= TAHUN_AJARAN_MULAI else today.year - 1
+    try:
+        dari = datetime.date.fromisoformat(request.args.get('dari') or datetime.date(tahun, TAHUN_AJARAN_MULAI, 1).isoformat())
+        sampai = datetime.date.fromisoformat(request.args.get('sampai') or today.isoformat())
+        kelas_id = int(request.args['kelas_id']) if request.args.get('kelas_id') else None
+    except ValueError:
+        return "Parameter tanggal atau kelas tidak valid", 400
 
-    from database import get_all_siswa, get_nama_kelas_by_id
-    siswa_list = get_all_siswa()
-    return render_template('laporan_index.html', siswa_list=siswa_list, get_nama_kelas_by_id=get_nama_kelas_by_id)
+    hasil, error = None, None
+    try:
+        from analytics import analyze
+    except ImportError as e:
+        error = str(e)
+    else:
+        try:
+            hasil = analyze(dari.isoformat(), sampai.isoformat(), kelas_id)
+        except ValueError as e:
+            return str(e), 400
+    return render_template('analitik.html', hasil=hasil, error=error, kelas_list=kelas_cache.get(),
+                           dari=dari.isoformat(), sampai=sampai.isoformat(), kelas_id=kelas_id)
+
+@app.route('/metrics')
+@query_budget(None)
+def metrics_endpoint():
+    # Format teks Prometheus, dijumlahkan dari semua worker lewat store SQLite bersama (metrics.py).
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/edit_profile', methods=['GET', 'POST'])
 @login_required
 def edit_profile():
-    guru = get_user_by_id(session['user_id'])
+    guru = current_user()
     if not guru:
         return redirect(url_for('dashboard', msg='User tidak ditemukan', type='error'))
 
@@ -491,37 +648,20 @@ def edit_profile():
         mata_pelajaran = request.form.get('mata_pelajaran')
         password = request.form.get('password')
 
-        conn = get_db_connection()
-        try:
-            if password:
-                hashed_password = generate_password_hash(password)
-                conn.execute(
-                    "UPDATE guru SET nama = ?, email = ?, mata_pelajaran = ?, password = ? WHERE id = ?",
-                    (nama, email, mata_pelajaran, hashed_password, guru['id'])
-                )
-            else:
-                conn.execute(
-                    "UPDATE guru SET nama = ?, email = ?, mata_pelajaran = ? WHERE id = ?",
-                    (nama, email, mata_pelajaran, guru['id'])
-                )
-            conn.commit()
+        hashed_password = hash_password(password) if password else None
+        if update_guru(guru['id'], nama, email, mata_pelajaran, hashed_password):
+            invalidate_user(guru['id'])
             return redirect(url_for('dashboard', msg='Profil berhasil diperbarui'))
-        except sqlite3.IntegrityError:
-            conn.rollback()
-            return render_template('edit_profile.html', guru=guru, error="Email sudah terdaftar. Mohon gunakan email lain.")
-        finally:
-            conn.close()
+        return render_template('edit_profile.html', guru=guru, error="Email sudah terdaftar. Mohon gunakan email lain.")
 
     return render_template('edit_profile.html', guru=guru)
       
 @app.route('/lihat_detail_guru/<int:guru_id>')
-@login_required
+@login_required(role='guru')
 def lihat_detail_guru(guru_id):
-    guru = get_user_by_id(session['user_id'])
-    if not guru or guru['role'] != 'guru':
-        return "Hanya guru yang dapat mengakses ini", 403
+    guru = current_user()
 
-    detail_guru = get_user_by_id(guru_id)
+    detail_guru = get_cached_user(guru_id)
     if not detail_guru:
         return redirect(url_for('dashboard', msg='Guru tidak ditemukan', type='error'))
 
@@ -0,0 +1,11 @@
+"""Benchmark beban untuk aplikasi absensi di atas sekolah sintetis.
+
+    python -m bench run --classes 30 --students 32 --years 1 --output hasil.json
+    python -m bench run --transport http --workers 4 --output hasil-http.json
+    python -m bench compare lama.json baru.json --threshold 0.15
+
+`run` men-seed database sementara, mengukur setiap route di app.py satu per satu lalu skenario
+check-in pagi (checkin-burst), rekap akhir semester (report-crunch) dan badai login (login-storm).
+Skenario dipilih dengan --scenarios, mis. --scenarios login-storm --transport http --threads 4. Hasil berupa JSON
+(p50/p95/p99, throughput, SQL dan waktu DB per request dari header Server-Timing, kode status,
+puncak RSS) beserta commit git-nya, sehingga `compare` dapat menandai regresi antar commit."""
@@ -0,0 +1,197 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '') if commit else None
+    except OSError:
+        return None
+
+
+def print_table(title, rows):
+    print(f'\n{title}')
+    print(f"{'':28} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'sql':>6} {'db ms':>7} {'rss KiB':>9} status")
+    fmt = lambda v, spec: format(v, spec) if v is not None else '-'
+    for name, r in rows.items():
+        print(f"{name:28} {r['requests']:>5} {fmt(r['p50_ms'], '8.2f')} {fmt(r['p95_ms'], '8.2f')} "
+              f"{fmt(r['p99_ms'], '8.2f')} {fmt(r['throughput_rps'], '8.1f')} {fmt(r['sql_per_request'], '6.1f')} "
+              f"{fmt(r['db_ms_per_request'], '7.2f')} "
+              f"{fmt(r['peak_rss_kib'], '9d')} {r['status_codes']}")
+
+
+def cmd_run(args):
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    database_path = os.path.join(workdir, 'bench.db')
+    # Harus di-set sebelum database.py diimpor: DATABASE dibaca saat import. Benchmark selalu memakai SQLite
+    # sementara (seed.py menulis SQL SQLite langsung), meskipun DATABASE_URL menunjuk ke PostgreSQL.
+    os.environ['DATABASE_PATH'] = database_path
+    os.environ.pop('DATABASE_URL', None)
+    # Semua request datang dari satu IP dan memakai akun yang sama berulang kali; kuota login per IP/akun
+    # (login_guard.py) dimatikan agar angka per route sebanding antar commit. Batas antrian hashing tetap berlaku.
+    for name in ('LOGIN_IP_BURST', 'LOGIN_ACCOUNT_BURST'):
+        os.environ.setdefault(name, '1e9')
+
+    import database
+    from bench.routes import School
+    from bench.scenarios import SCENARIOS, run_routes
+    from bench.seed import seed_school
+    from bench.transport import ClientTransport, HttpTransport
+
+    started = time.perf_counter()
+    database.init_db()
+    conn = database.get_db_connection()
+    try:
+        seeded = seed_school(conn, args.classes, args.students, args.teachers, args.years, args.seed)
+    finally:
+        conn.close()
+    seed_seconds = time.perf_counter() - started
+    print(f"Seed: {args.classes} kelas, {len(seeded['siswa'])} siswa, {args.teachers} guru, "
+          f"{seeded['attendance_rows']} baris absensi dalam {seed_seconds:.1f} s ({database_path})")
+    school = School(database_path, seeded)
+
+    only = set(args.routes.split(',')) if args.routes else None
+    scenarios = [s for s in args.scenarios.split(',') if s] if args.scenarios != 'none' else []
+    transports = ['client', 'http'] if args.transport == 'both' else [args.transport]
+    result = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'cpu_count': os.cpu_count(),
+            'seed_seconds': round(seed_seconds, 2),
+            'attendance_rows': seeded['attendance_rows'],
+            'params': vars(args) | {'func': None},
+        },
+        'transports': {},
+    }
+
+    try:
+        for name in transports:
+            if name == 'client':
+                from app import app
+                transport = ClientTransport(app)
+            else:
+                transport = HttpTransport(database_path, workers=args.workers, threads=args.threads)
+            try:
+                routes = run_routes(transport, school, args.iterations, only)
+                print_table(f'[{name}] routes', routes)
+                scenario_results = {}
+                for scenario in scenarios:
+                    if scenario in ('checkin-burst', 'login-storm'):
+                        r = SCENARIOS[scenario](transport, school, args.checkin_students, args.concurrency)
+                    else:
+                        r = SCENARIOS[scenario](transport, school, args.teachers_crunch, args.reports)
+                    scenario_results[scenario] = r
+                    print_table(f'[{name}] {scenario}', dict(r['steps'], total=r['total']))
+                result['transports'][name] = {'routes': routes, 'scenarios': scenario_results}
+            finally:
+                transport.close()
+    finally:
+        if not args.keep_db:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f'\nHasil ditulis ke {args.output}')
+    return 0
+
+
+def _flatten(result):
+    # {(transport, bagian, nama): ringkasan} untuk dibandingkan antar file hasil.
+    flat = {}
+    for transport, data in result['transports'].items():
+        for name, summary in data['routes'].items():
+            flat[(transport, 'route', name)] = summary
+        for scenario, r in data['scenarios'].items():
+            flat[(transport, scenario, 'total')] = r['total']
+            for step, summary in r['steps'].items():
+                flat[(transport, scenario, step)] = summary
+    return flat
+
+
+def cmd_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    print(f"baseline {baseline['meta'].get('commit')}  ->  kandidat {candidate['meta'].get('commit')}")
+    old, new = _flatten(baseline), _flatten(candidate)
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        a, b = old[key], new[key]
+        problems = []
+        if a['p95_ms'] and b['p95_ms'] and b['p95_ms'] > a['p95_ms'] * (1 + args.threshold) \
+                and b['p95_ms'] - a['p95_ms'] > args.min_ms:
+            problems.append(f"p95 {a['p95_ms']:.2f} -> {b['p95_ms']:.2f} ms")
+        if a['throughput_rps'] and b['throughput_rps'] and b['throughput_rps'] < a['throughput_rps'] * (1 - args.threshold):
+            problems.append(f"throughput {a['throughput_rps']:.1f} -> {b['throughput_rps']:.1f} rps")
+        if a['sql_per_request'] is not None and b['sql_per_request'] is not None \
+                and b['sql_per_request'] > a['sql_per_request'] + 0.5:
+            problems.append(f"sql/request {a['sql_per_request']} -> {b['sql_per_request']}")
+        if b['errors'] > a['errors']:
+            problems.append(f"error 5xx {a['errors']} -> {b['errors']}")
+        if problems:
+            regressions += 1
+            print(f"REGRESI {'/'.join(key)}: {'; '.join(problems)}")
+    missing = old.keys() - new.keys()
+    for key in sorted(missing):
+        print(f"hilang  {'/'.join(key)}")
+    print(f'{regressions} regresi dari {len(old.keys() & new.keys())} pengukuran')
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench', description='Benchmark beban aplikasi absensi.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='seed sekolah sintetis dan ukur semua route serta skenario')
+    run.add_argument('--classes', type=int, default=10)
+    run.add_argument('--students', type=int, default=30, help='siswa per kelas')
+    run.add_argument('--teachers', type=int, default=15)
+    run.add_argument('--years', type=float, default=1.0, help='lama riwayat absensi (tahun)')
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--iterations', type=int, default=50, help='request per route (route dengan hash password lebih sedikit)')
+    run.add_argument('--routes', help='hanya route ini (dipisah koma)')
+    run.add_argument('--scenarios', default='checkin-burst,report-crunch', help="dipisah koma, atau 'none'")
+    run.add_argument('--checkin-students', type=int, default=200)
+    run.add_argument('--concurrency', type=int, default=16)
+    run.add_argument('--teachers-crunch', type=int, default=8)
+    run.add_argument('--reports', type=int, default=25, help='rekap siswa yang dibuka per guru saat report-crunch')
+    run.add_argument('--transport', choices=('client', 'http', 'both'), default='client')
+    run.add_argument('--workers', type=int, default=4, help='worker gunicorn (transport http)')
+    run.add_argument('--threads', type=int, default=1, help='thread per worker gunicorn (transport http)')
+    run.add_argument('--output', help='file JSON hasil')
+    run.add_argument('--keep-db', action='store_true', help='jangan hapus database benchmark')
+    run.set_defaults(func=cmd_run)
+
+    compare = sub.add_parser('compare', help='bandingkan dua file hasil dan tandai regresi')
+    compare.add_argument('baseline')
+    compare.add_argument('candidate')
+    compare.add_argument('--threshold', type=float, default=0.15, help='toleransi relatif (0.15 = 15%%)')
+    compare.add_argument('--min-ms', type=float, default=1.0, help='selisih p95 minimum yang dianggap regresi')
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
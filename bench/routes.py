@@ -0,0 +1,150 @@
+import io
+import itertools
+import sqlite3
+from collections import namedtuple
+
+from bench.seed import PASSWORD
+
+# auth: None, 'guru' atau 'siswa'. make(school, i) -> (path, data, files) untuk iterasi ke-i.
+# scale: pengali jumlah iterasi; route yang menghitung hash password dijalankan lebih sedikit.
+# setup(school, n): menyiapkan data sekali pakai (mis. kelas yang akan dihapus) sebelum pengukuran.
+# fresh: setiap iterasi memakai sesi baru (login tidak diukur), mis. untuk /logout dan form login.
+Route = namedtuple('Route', 'name method auth make scale setup fresh')
+
+
+def route(name, method, auth, make, scale=1.0, setup=None, fresh=False):
+    return Route(name, method, auth, make, scale, setup, fresh)
+
+
+class School:
+    """Data sekolah sintetis yang sudah di-seed, plus pembagi data sekali pakai agar request tulis
+    (check-in, hapus, daftar) tidak saling bertabrakan antar route dan skenario."""
+
+    def __init__(self, database_path, seeded):
+        self.database_path = database_path
+        self.kelas_ids = seeded['kelas_ids']
+        self.guru_ids = seeded['guru_ids']
+        self.siswa = seeded['siswa']
+        self.attendance_rows = seeded['attendance_rows']
+        self._unchecked = itertools.cycle(self.siswa)
+        self._serial = itertools.count()
+        self.throwaway = {}
+
+    def take_unchecked(self):
+        # Siswa yang (sebisa mungkin) belum absen hari ini; berputar ulang jika sekolahnya kecil.
+        return next(self._unchecked)
+
+    def serial(self):
+        return next(self._serial)
+
+    def kelas(self, i):
+        return self.kelas_ids[i % len(self.kelas_ids)]
+
+    def student(self, i):
+        return self.siswa[(i * 7919) % len(self.siswa)]
+
+    def student_name(self, i):
+        # Nama mengikuti pola seed_school(): 'Siswa 000123' untuk NIS 100123.
+        return f'Siswa {int(self.student(i)[1]) - 100000:06d}'
+
+    def insert(self, sql, rows):
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            ids = []
+            for row in rows:
+                ids.append(conn.execute(sql, row).lastrowid)
+            conn.commit()
+            return ids
+        finally:
+            conn.close()
+
+
+def _throwaway_kelas(school, n):
+    serial = school.serial()
+    school.throwaway['kelas'] = school.insert(
+        "INSERT INTO kelas (nama_kelas) VALUES (?)", [(f'Hapus {serial}-{i}',) for i in range(n)]
+    )
+
+
+def _throwaway_siswa(school, n):
+    serial = school.serial()
+    school.throwaway['siswa'] = school.insert(
+        "INSERT INTO siswa (nama, nis, password, kelas_id) VALUES (?, ?, 'x', ?)",
+        [(f'Hapus {serial}-{i}', f'H{serial}-{i}', school.kelas(i)) for i in range(n)]
+    )
+
+
+def _roster_csv(school, i):
+    serial = school.serial()
+    lines = ['nama,nis,password'] + [f'Impor {serial}-{i}-{j},I{serial}-{i}-{j},{PASSWORD}' for j in range(20)]
+    return {'file': (io.BytesIO('\n'.join(lines).encode()), 'roster.csv')}
+
+
+def _kelas_form(school, i):
+    kelas_id = school.kelas(i)
+    return {f'status_{sid}': 'Hadir' for sid, _, k in school.siswa if k == kelas_id}
+
+
+ROUTES = [
+    route('home', 'GET', None, lambda s, i: ('/', None, None)),
+    route('login_form', 'GET', None, lambda s, i: ('/login', None, None)),
+    route('login_post', 'POST', None, lambda s, i: (
+        '/login', {'email': f'guru{i % len(s.guru_ids)}@bench.test', 'password': PASSWORD}, None), scale=0.2, fresh=True),
+    route('register_form', 'GET', None, lambda s, i: ('/register', None, None)),
+    route('register_post', 'POST', None, lambda s, i: ('/register', {
+        'nama': f'Guru Baru {s.serial()}', 'email': f'baru{s.serial()}@bench.test',
+        'mata_pelajaran': 'Matematika', 'password': PASSWORD}, None), scale=0.2),
+    route('logout', 'GET', 'guru', lambda s, i: ('/logout', None, None), fresh=True),
+    route('dashboard', 'GET', 'guru', lambda s, i: ('/dashboard', None, None)),
+    route('dashboard_search', 'GET', 'guru', lambda s, i: ('/dashboard?search=Guru&mapel=IPA', None, None)),
+    route('manage_kelas', 'GET', 'guru', lambda s, i: ('/manage_kelas', None, None)),
+    route('manage_kelas_add', 'POST', 'guru', lambda s, i: (
+        '/manage_kelas', {'action': 'add', 'nama_kelas': f'Kelas Baru {s.serial()}'}, None)),
+    route('delete_kelas', 'POST', 'guru', lambda s, i: (
+        f"/delete_kelas/{s.throwaway['kelas'][i]}", None, None), setup=_throwaway_kelas),
+    route('detail_kelas', 'GET', 'guru', lambda s, i: (f'/manage_kelas/{s.kelas(i)}', None, None)),
+    route('add_siswa', 'POST', 'guru', lambda s, i: (f'/kelas/{s.kelas(i)}/add_siswa', {
+        'nama': f'Siswa Baru {s.serial()}', 'nis': f'N{s.serial()}', 'password': PASSWORD}, None), scale=0.2),
+    route('import_siswa', 'POST', 'guru', lambda s, i: (
+        f'/kelas/{s.kelas(i)}/import_siswa', {}, _roster_csv(s, i)), scale=0.05),
+    route('delete_siswa', 'POST', 'guru', lambda s, i: (
+        f"/delete_siswa/{s.throwaway['siswa'][i]}", None, None), setup=_throwaway_siswa),
+    route('siswa_login_form', 'GET', None, lambda s, i: ('/login/siswa', None, None)),
+    route('siswa_login_post', 'POST', None, lambda s, i: (
+        '/login/siswa', {'nis': s.student(i)[1], 'password': PASSWORD}, None), scale=0.2, fresh=True),
+    route('catat_absensi', 'GET', 'guru', lambda s, i: ('/catat_absensi', None, None)),
+    route('catat_absensi_search', 'GET', 'guru', lambda s, i: (
+        f"/catat_absensi?nama={s.student_name(i).replace(' ', '+')}&kelas_id={s.student(i)[2]}", None, None)),
+    route('api_search_siswa', 'GET', 'guru', lambda s, i: (f'/api/siswa/search?q=Siswa+{i % 100:02d}', None, None)),
+    route('catat_absensi_post', 'POST', 'guru', lambda s, i: (
+        '/catat_absensi', {'siswa_id': s.take_unchecked()[0], 'status': 'Hadir'}, None)),
+    route('siswa_dashboard', 'GET', 'siswa', lambda s, i: ('/siswa/dashboard', None, None)),
+    route('siswa_absen', 'POST', 'siswa', lambda s, i: (
+        '/siswa/absen', {'siswa_id': s.take_unchecked()[0], 'status': 'Hadir'}, None)),
+    route('kelas_absensi', 'GET', 'guru', lambda s, i: (f'/kelas/{s.kelas(i)}/absensi', None, None)),
+    route('kelas_absensi_post', 'POST', 'guru', lambda s, i: (
+        f'/kelas/{s.kelas(i)}/absensi', _kelas_form(s, i), None), scale=0.2),
+    route('laporan_absensi', 'GET', 'guru', lambda s, i: (f'/laporan_absensi/{s.student(i)[0]}', None, None)),
+    route('laporan_index', 'GET', 'guru', lambda s, i: ('/laporan', None, None)),
+    route('analitik', 'GET', 'guru', lambda s, i: ('/analitik', None, None), scale=0.2),
+    route('analitik_kelas', 'GET', 'guru', lambda s, i: (f'/analitik?kelas_id={s.kelas(i)}', None, None)),
+    route('export_csv_kelas', 'GET', 'guru', lambda s, i: (f'/laporan/export.csv?kelas_id={s.kelas(i)}', None, None),
+          scale=0.2),
+    route('edit_profile', 'GET', 'guru', lambda s, i: ('/edit_profile', None, None)),
+    route('edit_profile_post', 'POST', 'guru', lambda s, i: ('/edit_profile', {
+        'nama': 'Guru 0000', 'email': 'guru0@bench.test', 'mata_pelajaran': 'Matematika', 'password': ''}, None)),
+    route('lihat_detail_guru', 'GET', 'guru', lambda s, i: (
+        f'/lihat_detail_guru/{s.guru_ids[i % len(s.guru_ids)]}', None, None)),
+]
+
+
+def login(session, auth, school, i=0):
+    # Menyiapkan sesi sesuai peran; login sendiri tidak ikut diukur.
+    if auth == 'guru':
+        status, *_ = session.request('POST', '/login', {'email': 'guru0@bench.test', 'password': PASSWORD})
+    elif auth == 'siswa':
+        status, *_ = session.request('POST', '/login/siswa', {'nis': school.student(i)[1], 'password': PASSWORD})
+    else:
+        return
+    if status != 302:
+        raise RuntimeError(f'login {auth} gagal (HTTP {status})')
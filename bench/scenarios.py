@@ -0,0 +1,149 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.routes import ROUTES, login
+from bench.seed import PASSWORD
+from bench.stats import Recorder
+
+
+def run_routes(transport, school, iterations=50, only=None):
+    """Mengukur setiap route secara berurutan (satu klien), sehingga jumlah SQL per request akurat."""
+    results = {}
+    for spec in ROUTES:
+        if only and spec.name not in only:
+            continue
+        n = max(1, int(iterations * spec.scale))
+        if spec.setup:
+            spec.setup(school, n)
+        session = transport.session()
+        login(session, spec.auth, school)
+        recorder = Recorder()
+        transport.reset_peak_rss()
+        recorder.start()
+        for i in range(n):
+            if spec.fresh and i:
+                session = transport.session()
+                login(session, spec.auth, school)
+            path, data, files = spec.make(school, i)
+            status, elapsed, _, timing = session.request(spec.method, path, data, files)
+            recorder.add(status, elapsed, timing)
+        recorder.stop()
+        results[spec.name] = recorder.summary(transport.peak_rss_kib(), sequential=True)
+    return results
+
+
+def _run_concurrent(transport, users, concurrency, steps):
+    # steps(session, user, record) dijalankan untuk setiap pengguna; record(step, status, elapsed, timing).
+    recorders = {}
+    lock = threading.Lock()
+    total = Recorder()
+
+    def record(step, status, elapsed, timing):
+        with lock:
+            recorder = recorders.setdefault(step, Recorder())
+        recorder.add(status, elapsed, timing)
+        total.add(status, elapsed, timing)
+
+    def worker(user):
+        steps(transport.session(), user, record)
+
+    transport.reset_peak_rss()
+    total.start()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker, user) for user in users]:
+            future.result()
+    total.stop()
+    peak = transport.peak_rss_kib()
+    for recorder in recorders.values():
+        recorder.started, recorder.finished = total.started, total.finished
+    return {
+        'total': total.summary(peak),
+        'steps': {name: r.summary(peak) for name, r in recorders.items()},
+    }
+
+
+def _login(session, path, data):
+    # Login yang ditolak 429 (antrian hashing penuh) dicoba lagi; skenario selain login-storm mengukur halaman
+    # setelah login, bukan penolakan. Mengembalikan (status, waktu total termasuk percobaan ulang, timing).
+    started = time.perf_counter()
+    while True:
+        status, _, _, timing = session.request('POST', path, data)
+        if status != 429:
+            return status, time.perf_counter() - started, timing
+        time.sleep(0.05)
+
+
+def checkin_burst(transport, school, students=200, concurrency=16):
+    """Bel masuk pagi: banyak siswa login, absen 'Hadir' dan membuka dashboard hampir bersamaan."""
+    users = [school.take_unchecked() for _ in range(min(students, len(school.siswa)))]
+
+    def steps(session, user, record):
+        siswa_id, nis, _ = user
+        status, elapsed, timing = _login(session, '/login/siswa', {'nis': nis, 'password': PASSWORD})
+        record('login', status, elapsed, timing)
+        status, elapsed, _, timing = session.request('POST', '/siswa/absen', {'status': 'Hadir'})
+        record('absen', status, elapsed, timing)
+        status, elapsed, _, timing = session.request('GET', '/siswa/dashboard')
+        record('dashboard', status, elapsed, timing)
+
+    return _run_concurrent(transport, users, concurrency, steps)
+
+
+def report_crunch(transport, school, teachers=8, reports=25, seed=7):
+    """Akhir semester: beberapa guru sekaligus membuka rekap siswa satu per satu lalu mengekspor CSV kelasnya."""
+    rng = random.Random(seed)
+    users = [(t, [rng.choice(school.siswa) for _ in range(reports)]) for t in range(min(teachers, len(school.guru_ids)))]
+
+    def steps(session, user, record):
+        t, students = user
+        status, *_ = _login(session, '/login', {'email': f'guru{t}@bench.test', 'password': PASSWORD})
+        if status != 302:
+            raise RuntimeError(f'login guru{t} gagal (HTTP {status})')
+        status, elapsed, _, timing = session.request('GET', '/laporan')
+        record('laporan_index', status, elapsed, timing)
+        for siswa_id, _, _ in students:
+            status, elapsed, _, timing = session.request('GET', f'/laporan_absensi/{siswa_id}')
+            record('laporan_absensi', status, elapsed, timing)
+        status, elapsed, _, timing = session.request('GET', f'/laporan/export.csv?kelas_id={school.kelas(t)}')
+        record('export_csv_kelas', status, elapsed, timing)
+
+    return _run_concurrent(transport, users, teachers, steps)
+
+
+def login_storm(transport, school, students=200, concurrency=16, probes=2, probe_requests=40):
+    """Badai login pagi: banyak siswa login bersamaan sementara guru membuka halaman non-login.
+    Langkah 'probe' dibandingkan dengan 'probe_idle' (halaman yang sama tanpa badai): latensinya harus
+    tetap datar; login boleh ditolak cepat dengan 429 saat antrian hashing penuh."""
+    def probe(step):
+        def steps(session, t, record):
+            # Login guru sendiri bisa ikut ditolak 429 saat badai; coba lagi sampai berhasil.
+            _login(session, '/login', {'email': f'guru{t}@bench.test', 'password': PASSWORD})
+            for _ in range(probe_requests):
+                status, elapsed, _, timing = session.request('GET', '/laporan')
+                record(step, status, elapsed, timing)
+        return steps
+
+    idle = _run_concurrent(transport, range(probes), probes, probe('probe_idle'))
+    probe_steps = probe('probe')
+
+    def steps(session, user, record):
+        kind, who = user
+        if kind == 'probe':
+            return probe_steps(session, who, record)
+        status, elapsed, _, timing = session.request('POST', '/login/siswa', {'nis': who[1], 'password': PASSWORD})
+        record('login', status, elapsed, timing)
+
+    # Probe lebih dulu dalam antrian agar berjalan selama badai berlangsung.
+    users = [('probe', t) for t in range(probes)] + [('siswa', school.student(i)) for i in range(students)]
+    result = _run_concurrent(transport, users, concurrency + probes, steps)
+    result['steps']['probe_idle'] = idle['steps']['probe_idle']
+    return result
+
+
+SCENARIOS = {
+    'checkin-burst': checkin_burst,
+    'report-crunch': report_crunch,
+    'login-storm': login_storm,
+}
@@ -0,0 +1,78 @@
+import datetime
+import random
+
+from werkzeug.security import generate_password_hash
+
+from database import to_day
+
+# Semua akun sintetis memakai password yang sama; hash dihitung sekali saja agar seeding cepat.
+PASSWORD = 'rahasia'
+STATUS_WEIGHTS = (('Hadir', 90), ('Sakit', 4), ('Izin', 3), ('Alpa', 3))
+MAPEL = ('Matematika', 'Bahasa Indonesia', 'Bahasa Inggris', 'IPA', 'IPS', 'PJOK', 'Seni Budaya', 'PKN')
+
+
+def school_days(years, until=None):
+    # Hari Senin-Jumat selama `years` tahun ke belakang, tidak termasuk hari ini (agar check-in masih bisa).
+    until = until or datetime.date.today()
+    day = until - datetime.timedelta(days=int(365 * years))
+    days = []
+    while day < until:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def seed_school(conn, classes=10, students_per_class=30, teachers=15, years=1.0, seed=42):
+    """Mengisi database (skema sudah dimigrasi) dengan sekolah sintetis.
+    Mengembalikan ringkasan id yang dibutuhkan skenario benchmark."""
+    rng = random.Random(seed)
+    password_hash = generate_password_hash(PASSWORD)
+
+    conn.executemany(
+        "INSERT INTO guru (email, nama, mata_pelajaran, password, role) VALUES (?, ?, ?, ?, 'guru')",
+        [(f'guru{i}@bench.test', f'Guru {i:04d}', MAPEL[i % len(MAPEL)], password_hash) for i in range(teachers)]
+    )
+    conn.executemany(
+        "INSERT INTO kelas (nama_kelas) VALUES (?)",
+        [(f'Kelas {i:03d}',) for i in range(classes)]
+    )
+    kelas_ids = [r[0] for r in conn.execute("SELECT id FROM kelas ORDER BY id")]
+    guru_ids = [r[0] for r in conn.execute("SELECT id FROM guru ORDER BY id")]
+
+    siswa_rows = []
+    for k, kelas_id in enumerate(kelas_ids):
+        for j in range(students_per_class):
+            n = k * students_per_class + j
+            siswa_rows.append((f'Siswa {n:06d}', f'{100000 + n}', password_hash, kelas_id))
+    conn.executemany("INSERT INTO siswa (nama, nis, password, kelas_id) VALUES (?, ?, ?, ?)", siswa_rows)
+    siswa = [tuple(r) for r in conn.execute("SELECT id, nis, kelas_id FROM siswa ORDER BY id")]
+
+    statuses = [s for s, _ in STATUS_WEIGHTS]
+    weights = [w for _, w in STATUS_WEIGHTS]
+    days = school_days(years)
+    # Status di STATUS_WEIGHTS adalah DEFAULT_STATUS yang sudah didaftarkan migrasi.
+    codes = {r[1]: r[0] for r in conn.execute("SELECT code, status FROM status_code")}
+    statuses = [codes[s] for s in statuses]
+
+    def attendance_rows():
+        # Urut per hari seperti data produksi (semua siswa tercatat hari demi hari).
+        for tanggal in days:
+            day = to_day(tanggal)
+            picks = rng.choices(statuses, weights, k=len(siswa))
+            recorder = rng.choice(guru_ids) if guru_ids else None
+            for (siswa_id, _, _), code in zip(siswa, picks):
+                yield siswa_id, day, code, recorder
+
+    conn.executemany(
+        "INSERT INTO attendance (siswa_id, day, status_code, recorded_by) VALUES (?, ?, ?, ?)",
+        attendance_rows()
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    return {
+        'kelas_ids': kelas_ids,
+        'guru_ids': guru_ids,
+        'siswa': siswa,
+        'attendance_rows': len(days) * len(siswa),
+    }
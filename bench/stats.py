@@ -0,0 +1,94 @@
+import os
+import resource
+import threading
+import time
+from collections import Counter
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile atas daftar yang sudah terurut.
+    if not sorted_values:
+        return None
+    k = max(int(round(p / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(k, len(sorted_values) - 1)]
+
+
+class Recorder:
+    """Mengumpulkan latensi, kode status dan jumlah SQL untuk satu route atau satu langkah skenario.
+    Aman dipakai dari beberapa thread sekaligus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.statuses = Counter()
+        self.sql = 0
+        self.db_seconds = 0.0
+        self.traced = 0
+        self.started = None
+        self.finished = None
+
+    def add(self, status, elapsed, timing=(None, None)):
+        # timing: (jumlah pernyataan SQL, waktu DB) dari header Server-Timing, jika ada.
+        sql, db_seconds = timing
+        with self._lock:
+            self.latencies.append(elapsed)
+            self.statuses[status] += 1
+            if sql is not None:
+                self.traced += 1
+                self.sql += sql
+                self.db_seconds += db_seconds
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def summary(self, peak_rss_kib=None, sequential=False):
+        values = sorted(self.latencies)
+        n = len(values)
+        if sequential:
+            # Satu klien berurutan: waktu persiapan di antara request (login ulang, setup) tidak dihitung.
+            wall = sum(values)
+        else:
+            wall = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        ms = lambda v: round(v * 1000, 3) if v is not None else None
+        return {
+            'requests': n,
+            'p50_ms': ms(percentile(values, 50)),
+            'p95_ms': ms(percentile(values, 95)),
+            'p99_ms': ms(percentile(values, 99)),
+            'mean_ms': ms(sum(values) / n) if n else None,
+            'max_ms': ms(values[-1]) if n else None,
+            'throughput_rps': round(n / wall, 2) if n and wall > 0 else None,
+            'sql_per_request': round(self.sql / self.traced, 2) if self.traced else None,
+            'db_ms_per_request': round(self.db_seconds * 1000 / self.traced, 3) if self.traced else None,
+            'status_codes': {str(k): v for k, v in sorted(self.statuses.items())},
+            'errors': sum(v for k, v in self.statuses.items() if k >= 500),
+            'peak_rss_kib': peak_rss_kib,
+        }
+
+
+def reset_peak_rss(pid='self'):
+    # Linux mengizinkan mengatur ulang VmHWM lewat clear_refs; tanpa itu puncak RSS hanya bisa naik.
+    try:
+        with open(f'/proc/{pid}/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_kib(pid='self'):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if pid == 'self':
+        # ru_maxrss dalam KiB di Linux, dalam byte di macOS.
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss // 1024 if os.uname().sysname == 'Darwin' else rss
+    return None
@@ -0,0 +1,177 @@
+import http.client
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+
+from bench.stats import peak_rss_kib, reset_peak_rss
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SERVER_TIMING = re.compile(r'^\s*([\w-]+)\s*;dur=([\d.]+)(?:;desc="([^"]*)")?')
+
+
+def parse_server_timing(values):
+    # Header Server-Timing dari database._finish_trace -> (jumlah pernyataan SQL, waktu DB dalam detik).
+    for value in values:
+        for part in value.split(','):
+            m = _SERVER_TIMING.match(part)
+            if m and m.group(1) == 'db':
+                return int((m.group(3) or '0').split()[0]), float(m.group(2)) / 1000
+    return None, None
+
+
+class ClientSession:
+    """Satu pengguna yang berbicara dengan aplikasi lewat Flask test client (dalam proses)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, files=None):
+        start = time.perf_counter()
+        if files:
+            data = dict(data or {}, **files)
+            response = self.client.open(path, method=method, data=data, content_type='multipart/form-data')
+        else:
+            response = self.client.open(path, method=method, data=data)
+        body = response.get_data()
+        elapsed = time.perf_counter() - start
+        return response.status_code, elapsed, body, parse_server_timing(response.headers.getlist('Server-Timing'))
+
+
+class ClientTransport:
+    name = 'client'
+
+    def __init__(self, app):
+        self.app = app
+        app.config['SQL_TRACE'] = True
+
+    def session(self):
+        return ClientSession(self.app)
+
+    def reset_peak_rss(self):
+        return reset_peak_rss()
+
+    def peak_rss_kib(self):
+        return peak_rss_kib()
+
+    def close(self):
+        pass
+
+
+class HttpSession:
+    """Satu pengguna yang berbicara dengan gunicorn lewat HTTP, menyimpan cookie sesi sendiri."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.cookies = {}
+        self.conn = http.client.HTTPConnection(host, port, timeout=60)
+
+    def request(self, method, path, data=None, files=None):
+        headers = {}
+        body = None
+        if files:
+            boundary = 'benchboundary'
+            parts = []
+            for key, value in (data or {}).items():
+                parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode())
+            for key, (fileobj, filename) in files.items():
+                parts.append(
+                    f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"; filename="{filename}"\r\n'
+                    f'Content-Type: application/octet-stream\r\n\r\n'.encode() + fileobj.read() + b'\r\n'
+                )
+            body = b''.join(parts) + f'--{boundary}--\r\n'.encode()
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        elif data is not None:
+            body = urllib.parse.urlencode(data)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+
+        start = time.perf_counter()
+        for attempt in range(2):
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                payload = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Worker gunicorn menutup koneksi keep-alive; buka ulang sekali.
+                self.conn.close()
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+                if attempt:
+                    raise
+        elapsed = time.perf_counter() - start
+        for header in response.headers.get_all('Set-Cookie') or []:
+            name, _, rest = header.partition('=')
+            self.cookies[name.strip()] = rest.split(';', 1)[0]
+        return response.status, elapsed, payload, parse_server_timing(response.headers.get_all('Server-Timing') or [])
+
+
+class HttpTransport:
+    """Menjalankan gunicorn sebagai subprocess atas database benchmark dan mengukur lewat HTTP."""
+    name = 'http'
+
+    def __init__(self, database_path, workers=4, threads=1, port=None):
+        self.host = '127.0.0.1'
+        self.port = port or _free_port()
+        env = dict(os.environ, DATABASE_PATH=database_path, SQL_TRACE='1', PYTHONUNBUFFERED='1')
+        cmd = [
+            sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--threads', str(threads),
+            '--bind', f'{self.host}:{self.port}', '--log-level', 'warning', 'app:app',
+        ]
+        self.process = subprocess.Popen(cmd, cwd=ROOT, env=env)
+        self._wait_ready()
+
+    def _wait_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError('gunicorn berhenti sebelum siap')
+            try:
+                with socket.create_connection((self.host, self.port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError('gunicorn tidak siap dalam batas waktu')
+
+    def session(self):
+        return HttpSession(self.host, self.port)
+
+    def _pids(self):
+        pids = [self.process.pid]
+        try:
+            with open(f'/proc/{self.process.pid}/task/{self.process.pid}/children') as f:
+                pids += [int(p) for p in f.read().split()]
+        except OSError:
+            pass
+        return pids
+
+    def reset_peak_rss(self):
+        return all([reset_peak_rss(pid) for pid in self._pids()])
+
+    def peak_rss_kib(self):
+        # Jumlah puncak RSS master dan semua worker gunicorn (Linux /proc); None jika tidak tersedia.
+        values = [peak_rss_kib(pid) for pid in self._pids()]
+        if any(v is None for v in values):
+            return None
+        return sum(values)
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import database
+from database import get_all_kelas, get_generation, get_list_mapel, get_user_by_id
+from metrics import registry as metrics
+
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '1024'))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', '60'))
+# Interval (detik) pemeriksaan penghitung generasi di database untuk perubahan dari worker lain.
+REFDATA_CHECK_INTERVAL = float(os.environ.get('REFDATA_CHECK_INTERVAL', '2'))
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Cache LRU dengan TTL per entri, aman dipakai bersama oleh beberapa thread dalam satu proses.
+    Menyimpan penghitung `hits`/`misses` untuk pemantauan; bila diberi `name`, penghitung dan jumlah entri
+    juga dilaporkan ke /metrics (cache_requests_total, cache_entries)."""
+
+    def __init__(self, maxsize=1024, ttl=60.0, name=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    self._report('hit')
+                    return value
+                del self._data[key]
+            self.misses += 1
+            self._report('miss')
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            self._report()
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._report()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._report()
+
+    def _report(self, result=None):
+        # Dipanggil dengan _lock dipegang. Jumlah entri di-set utuh sehingga tetap benar setelah fork.
+        if self.name is None:
+            return
+        if result is not None:
+            metrics.inc('cache_requests_total', cache=self.name, result=result)
+        metrics.set('cache_entries', len(self._data), cache=self.name)
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+
+user_cache = LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL, name='user')
+
+
+def get_cached_user(user_id):
+    # Data guru (id, nama, email, mata_pelajaran, role) dari cache; query ke database hanya saat miss.
+    user = user_cache.get(user_id)
+    if user is None:
+        row = get_user_by_id(user_id)
+        if row is None:
+            return None
+        user = dict(row)
+        user_cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id):
+    # Dipanggil setelah baris guru diubah (mis. edit_profile). Worker lain mengikuti paling lambat USER_CACHE_TTL.
+    user_cache.invalidate(user_id)
+
+
+class ReferenceDataCache:
+    """Cache data referensi yang jarang berubah (daftar kelas, daftar mapel).
+
+    Keabsahan ditentukan oleh penghitung di tabel cache_generation, sehingga semua worker gunicorn
+    tetap koheren tanpa layanan eksternal. Penghitung dibaca paling sering sekali per `check_interval`
+    detik; perubahan dari proses ini sendiri (bump_generation) langsung memicu pemeriksaan ulang."""
+
+    def __init__(self, name, loader, check_interval=REFDATA_CHECK_INTERVAL):
+        self.name = name
+        self.loader = loader
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._value = _MISSING
+        self._generation = None
+        self._local_bumps = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self):
+        with self._lock:
+            now = time.monotonic()
+            local_bumps = database.local_generation_bumps.get(self.name, 0)
+            if (self._value is _MISSING or local_bumps != self._local_bumps
+                    or now - self._checked_at >= self.check_interval):
+                generation = get_generation(self.name)
+                self._checked_at = now
+                self._local_bumps = local_bumps
+                if self._value is _MISSING or generation != self._generation:
+                    self._value = self.loader()
+                    self._generation = generation
+                    self.misses += 1
+                    metrics.inc('cache_requests_total', cache=self.name, result='miss')
+                    return self._value
+            self.hits += 1
+            metrics.inc('cache_requests_total', cache=self.name, result='hit')
+            return self._value
+
+
+kelas_cache = ReferenceDataCache('kelas', lambda: tuple(get_all_kelas()))
+mapel_cache = ReferenceDataCache('mapel', lambda: tuple(get_list_mapel()))
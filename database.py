@@ -1,22 +1,357 @@
+import base64
+import datetime
+import json
 import sqlite3
 import os
+import queue
 import tempfile
-from werkzeug.security import generate_password_hash 
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import quote
+from flask import current_app, g, has_app_context, request
+from login_guard import hash_password
+from metrics import registry as metrics
+
+# DATABASE_URL memilih backend: postgresql://... memakai database_pg.py (psycopg, pool bersama antar request),
+# sqlite:///path atau kosong memakai SQLite di modul ini.
+DATABASE_URL = os.environ.get('DATABASE_URL', '')
+BACKEND = 'postgresql' if DATABASE_URL.startswith(('postgres://', 'postgresql://')) else 'sqlite'
 
 # Use an explicit DATABASE_PATH when provided (e.g. Vercel env var).
 # Default to a writable temp directory to avoid permission errors on serverless
 # platforms where the project root is read-only.
-DATABASE = os.environ.get('DATABASE_PATH') or os.path.join(tempfile.gettempdir(), 'database.db')
+DATABASE = (os.environ.get('DATABASE_PATH')
+            or (DATABASE_URL[len('sqlite:///'):] if DATABASE_URL.startswith('sqlite:///') else '')
+            or os.path.join(tempfile.gettempdir(), 'database.db'))
 
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
+# Ukuran pool koneksi per proses dan cache halaman SQLite (dalam KiB, nilai negatif).
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '4'))
+CACHE_SIZE_KIB = int(os.environ.get('DB_CACHE_SIZE_KIB', '8192'))
+STATEMENT_CACHE_SIZE = 256
+# Jumlah pasangan (siswa_id, tanggal) per query IN (VALUES ...) agar aman dari batas variabel SQLite.
+BATCH_CHUNK = 400
+BUSY_TIMEOUT_MS = 5000
+# Ukuran halaman default untuk daftar berhalaman (keyset) dan batas atasnya.
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = 200
+# Batas usia (detik) cache status hari ini sebelum dicek ulang terhadap tulisan dari proses lain.
+TODAY_CACHE_MAX_AGE = float(os.environ.get('TODAY_CACHE_MAX_AGE', '1.0'))
+# Arsip absensi: satu file SQLite per tahun ajaran yang sudah selesai (lihat archive_academic_year).
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR') or os.path.join(os.path.dirname(os.path.abspath(DATABASE)), 'arsip')
+# Bulan pertama tahun ajaran; tahun ajaran 2024 = 1 Juli 2024 s.d. 30 Juni 2025.
+TAHUN_AJARAN_MULAI = int(os.environ.get('TAHUN_AJARAN_MULAI', '7'))
+# Arsip yang ter-ATTACH sekaligus per koneksi (batas bawaan SQLite 10); yang paling lama tidak dipakai di-DETACH.
+ARCHIVE_MAX_ATTACHED = 8
+# Interval (detik) membaca ulang daftar arsip, agar arsip baru dari proses lain ikut terbaca.
+ARCHIVE_CHECK_INTERVAL = float(os.environ.get('ARCHIVE_CHECK_INTERVAL', '2'))
+# Pelacakan SQL per request (jumlah pernyataan, waktu DB, Server-Timing). Selalu aktif saat debug/testing.
+SQL_TRACE = os.environ.get('SQL_TRACE', '0') == '1'
+# Batas default jumlah pernyataan SQL per request (0 = tanpa batas); bisa ditimpa per route dengan @query_budget.
+SQL_QUERY_BUDGET = int(os.environ.get('SQL_QUERY_BUDGET', '20'))
+SLOW_STATEMENTS = 3
+# Error yang boleh dicoba ulang oleh penulis latar (write_queue.py): database sedang dikunci penulis lain.
+TRANSIENT_ERRORS = (sqlite3.OperationalError,)
+
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+_pool_pid = os.getpid()
+_pool_lock = threading.Lock()
+# Koneksi warisan proses induk setelah fork. Sengaja tidak ditutup (menutupnya dari proses anak bisa mengganggu
+# WAL dan kunci milik induk); referensinya disimpan agar tidak ditutup oleh garbage collector.
+_inherited = []
+_local = threading.local()
+# QueryStats request yang sedang berjalan di thread ini (None jika tidak dilacak).
+_trace = threading.local()
+
+
+class QueryStats:
+    """Statistik SQL satu request: jumlah pernyataan, total waktu DB dan waktu per pernyataan."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+        self.current = None
+        self.batch = None
+
+    def statement(self, sql):
+        # executemany melaporkan setiap baris lewat trace callback; dihitung sebagai satu pernyataan
+        # (ditambah BEGIN implisit yang mendahuluinya).
+        if self.batch == 'seen':
+            return
+        if self.batch == 'pending' and not sql.startswith('BEGIN'):
+            self.batch = 'seen'
+            sql = f'{sql} (executemany)'
+        self.current = [sql, 0.0]
+        self.statements.append(self.current)
+        self.count += 1
+
+    def add_time(self, entry, seconds):
+        self.seconds += seconds
+        if entry is not None:
+            entry[1] += seconds
+
+    def slowest(self, n=SLOW_STATEMENTS):
+        return sorted(self.statements, key=lambda e: e[1], reverse=True)[:n]
+
+
+def _trace_statement(sql):
+    # Pernyataan di dalam trigger dilaporkan dengan awalan "--" dan sudah termasuk pernyataan induknya.
+    # ATTACH/DETACH arsip adalah persiapan koneksi (sekali per koneksi), seperti PRAGMA di _connect().
+    stats = getattr(_trace, 'stats', None)
+    if stats is not None and not sql.startswith(('--', 'ATTACH', 'DETACH')):
+        stats.statement(sql)
+
+
+class _TracedCursor(sqlite3.Cursor):
+    # Mengukur waktu execute dan fetch; waktunya dicatat ke pernyataan terakhir milik cursor ini.
+    _entry = None
+
+    def _timed(self, fn, *args, batch=False):
+        stats = getattr(_trace, 'stats', None)
+        if stats is None:
+            return fn(*args)
+        if batch:
+            stats.batch = 'pending'
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            stats.batch = None
+            if fn.__name__.startswith('execute'):
+                self._entry = stats.current
+            stats.add_time(self._entry, time.perf_counter() - start)
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters, batch=True)
+
+    def fetchone(self):
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed(super().fetchmany, size if size is not None else self.arraysize)
+
+    def fetchall(self):
+        return self._timed(super().fetchall)
+
+
+class _TracedConnection(sqlite3.Connection):
+    # Saat sebuah request sedang dilacak, query lewat koneksi memakai _TracedCursor; di luar itu tanpa overhead.
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = _TracedCursor if getattr(_trace, 'stats', None) is not None else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        if getattr(_trace, 'stats', None) is None:
+            return super().execute(sql, parameters)
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if getattr(_trace, 'stats', None) is None:
+            return super().executemany(sql, seq_of_parameters)
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        stats = getattr(_trace, 'stats', None)
+        if stats is None:
+            return super().commit()
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            stats.add_time(stats.current, time.perf_counter() - start)
+
+
+def _connect():
+    # Membuka koneksi baru dan menerapkan pragma sekali saja per koneksi.
+    conn = sqlite3.connect(
+        DATABASE,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+        factory=_TracedConnection,
+    )
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.set_trace_callback(_trace_statement)
+    conn.pid = os.getpid()
+    metrics.inc('db_connections_opened_total')
     return conn
 
-def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def _check_fork():
+    # Koneksi SQLite tidak boleh dipakai lintas fork (mis. pool terisi oleh init_db di master gunicorn --preload):
+    # worker membuang pool dan koneksi thread warisan, lalu membuka koneksinya sendiri.
+    global _pool, _pool_pid, _local
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _inherited.extend(_pool.queue)
+                if getattr(_local, 'conn', None) is not None:
+                    _inherited.append(_local.conn)
+                _pool = queue.LifoQueue(maxsize=POOL_SIZE)
+                _local = threading.local()
+                _pool_pid = os.getpid()
+
+def _acquire():
+    _check_fork()
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        return _connect()
+
+def _release(conn):
+    # Kembalikan koneksi ke pool; transaksi yang masih terbuka dibatalkan dulu.
+    if conn.pid != os.getpid():
+        _inherited.append(conn)
+        return
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        _pool.put_nowait(conn)
+    except (queue.Full, sqlite3.Error):
+        conn.close()
+
+def get_db():
+    """Koneksi yang dipakai bersama selama satu request (disimpan di `flask.g`).
+    Di luar app context (script CLI, thread latar), satu koneksi per thread dipakai ulang."""
+    if has_app_context():
+        if 'db' not in g:
+            g.db = _acquire()
+        return g.db
+    _check_fork()
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = _local.conn = _acquire()
+    return conn
+
+def close_db(e=None):
+    db = g.pop('db', None)
+    if db is not None:
+        _release(db)
+
+def query_budget(limit):
+    """Menetapkan batas jumlah pernyataan SQL untuk satu route (menimpa SQL_QUERY_BUDGET).
+    Dipasang di antara @app.route dan dekorator lainnya; `None` berarti tanpa batas."""
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _start_trace():
+    if current_app.config['SQL_TRACE'] or current_app.debug or current_app.testing:
+        _trace.stats = g.sql_stats = QueryStats()
+
+
+def _finish_trace(response):
+    stats = g.get('sql_stats')
+    if stats is None:
+        return response
+    _trace.stats = None
+    slowest = stats.slowest()
+    response.headers.add('Server-Timing', f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} statements"')
+    if slowest:
+        sql = ' '.join(slowest[0][0].split())[:80].replace('"', "'")
+        response.headers.add('Server-Timing', f'db-slowest;dur={slowest[0][1] * 1000:.2f};desc="{sql}"')
+    current_app.logger.debug(
+        "%s %s: %d pernyataan SQL, %.2f ms DB; terlama: %s", request.method, request.path, stats.count,
+        stats.seconds * 1000, '; '.join(f"{e[1] * 1000:.2f} ms {' '.join(e[0].split())[:120]}" for e in slowest)
+    )
+
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', current_app.config['SQL_QUERY_BUDGET'] or None)
+    if budget is not None and stats.count > budget:
+        message = f"{request.endpoint}: {stats.count} pernyataan SQL melebihi batas {budget} (kemungkinan N+1)"
+        if current_app.config.get('SQL_BUDGET_STRICT', current_app.testing):
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+    return response
+
+
+def _clear_trace(e=None):
+    _trace.stats = None
+
+
+def init_app(app):
+    app.config.setdefault('SQL_TRACE', SQL_TRACE)
+    app.config.setdefault('SQL_QUERY_BUDGET', SQL_QUERY_BUDGET)
+    app.before_request(_start_trace)
+    app.after_request(_finish_trace)
+    app.teardown_request(_clear_trace)
+    app.teardown_appcontext(close_db)
+
+def get_db_connection():
+    # Koneksi mandiri (pragma sama dengan pool); pemanggil wajib menutupnya sendiri.
+    return _connect()
+
+KATEGORI_STATUS = ('hadir', 'sakit', 'izin', 'alpa')
+# Status yang ditulis aplikasi; mendapat kode status 1-4 pada database baru.
+DEFAULT_STATUS = ('Hadir', 'Sakit', 'Izin', 'Alpa')
+# Status yang dicatat backfill_alpa() untuk siswa tanpa absensi setelah batas waktu.
+ALPA_STATUS = DEFAULT_STATUS[3]
+# Nama data referensi yang di-cache dengan penghitung generasi (lihat cache.py).
+REFERENCE_DATA = ('kelas', 'mapel')
+
+def normalize_status(status):
+    # Memetakan status bebas (mis. 'Hadir', 'H', 'present', 'Alpha') ke salah satu KATEGORI_STATUS.
+    status = (status or '').strip().lower()
+    if 'hadir' in status or status == 'h' or status == 'present':
+        return 'hadir'
+    elif 'sakit' in status or status == 's':
+        return 'sakit'
+    elif 'izin' in status or status == 'i':
+        return 'izin'
+    return 'alpa'
+
+def is_valid_status(status):
+    # Status dari form absensi: nama kategori tanpa beda huruf besar-kecil, termasuk ejaan lama 'Alpha'.
+    # normalize_status() menerima apa pun (default alpa), jadi input pengguna diperiksa di sini lebih dulu.
+    return isinstance(status, str) and status.strip().lower() in KATEGORI_STATUS + ('alpha',)
+
+def canonical_status(status):
+    # Ejaan baku di DEFAULT_STATUS untuk status yang lolos is_valid_status() (mis. 'alpha' -> 'Alpa'),
+    # agar satu kategori tidak tersimpan dengan beberapa teks; status lain dikembalikan apa adanya.
+    if is_valid_status(status):
+        return DEFAULT_STATUS[KATEGORI_STATUS.index(normalize_status(status))]
+    return status
+
+# Kolom attendance.day: nomor hari sejak 1970-01-01. Padanannya di SQL: date(day * 86400, 'unixepoch').
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+def to_day(tanggal):
+    # Tanggal ISO ('YYYY-MM-DD') atau datetime.date -> nomor hari; ValueError untuk tanggal yang tidak valid.
+    if isinstance(tanggal, str):
+        tanggal = datetime.date.fromisoformat(tanggal)
+    return tanggal.toordinal() - _EPOCH_ORDINAL
+
+def from_day(day):
+    return datetime.date.fromordinal(day + _EPOCH_ORDINAL).isoformat()
+
+# Padanan normalize_status() dalam SQL, dipakai untuk backfill data lama.
+_KATEGORI_SQL = """
+    CASE
+        WHEN lower(trim(status)) LIKE '%hadir%' OR lower(trim(status)) IN ('h', 'present') THEN 'hadir'
+        WHEN lower(trim(status)) LIKE '%sakit%' OR lower(trim(status)) = 's' THEN 'sakit'
+        WHEN lower(trim(status)) LIKE '%izin%' OR lower(trim(status)) = 'i' THEN 'izin'
+        ELSE 'alpa'
+    END
+"""
+
+def _migration_001_base_tables(cursor):
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS guru (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -48,14 +383,7 @@ def init_db():
         )
     ''')
 
-        
-    conn.commit()
-    conn.close()
-
-
     # 4. Tabel Absensi
-    conn = get_db_connection()
-    cursor = conn.cursor()
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS attendance (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -68,20 +396,441 @@ def init_db():
             UNIQUE (siswa_id, tanggal)
         )
     ''')
-    conn.commit()
-    conn.close()
 
+def _migration_002_hot_path_indexes(cursor):
+    # get_siswa_by_kelas / delete_kelas_by_id (filter kelas_id, urut nama)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_siswa_kelas_nama ON siswa (kelas_id, nama)")
+    # get_all_users (role = 'guru' ORDER BY nama) dan get_list_mapel (DISTINCT mata_pelajaran)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_guru_role_nama ON guru (role, nama)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_guru_mapel ON guru (mata_pelajaran)")
+    # Pemindaian rentang tanggal (laporan, rekap harian)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_tanggal ON attendance (tanggal)")
+    # Covering index untuk get_attendance_for_student (riwayat terbaru dulu)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_siswa_tanggal_status ON attendance (siswa_id, tanggal DESC, status)")
+    cursor.execute("ANALYZE")
+
+def _migration_003_status_kategori(cursor):
+    # Kategori status yang sudah dinormalisasi (hadir/sakit/izin/alpa) disimpan saat menulis,
+    # sehingga rekap laporan cukup GROUP BY tanpa parsing string per baris.
+    columns = [r[1] for r in cursor.execute("PRAGMA table_info(attendance)")]
+    if 'kategori' not in columns:
+        cursor.execute("ALTER TABLE attendance ADD COLUMN kategori TEXT NOT NULL DEFAULT 'alpa'")
+    cursor.execute(f"UPDATE attendance SET kategori = {_KATEGORI_SQL}")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_siswa_tanggal_kategori ON attendance (siswa_id, tanggal, kategori)")
+
+# Ekspresi kategori dan tanggal ISO untuk baris OLD/NEW tabel attendance, per format penyimpanan:
+# skema lama (migrasi 004) menyimpan kolom kategori/tanggal, skema ringkas (migrasi 008) kode status dan nomor hari.
+_ROW_TEXT = ("{p}.kategori", "{p}.tanggal")
+_ROW_COMPACT = ("(SELECT kategori FROM status_code WHERE code = {p}.status_code)", "date({p}.day * 86400, 'unixepoch')")
+
+def _summary_delta(kategori, sign):
+    # Ekspresi SET kolom hitungan, mis. "hadir = hadir + (NEW.kategori = 'hadir')".
+    return ", ".join(f"{k} = {k} {sign} ({kategori} = '{k}')" for k in KATEGORI_STATUS)
+
+def _summary_increment(prefix, row=_ROW_TEXT):
+    kategori, tanggal = (e.format(p=prefix) for e in row)
+    cols = ", ".join(KATEGORI_STATUS)
+    values = ", ".join(f"{kategori} = '{k}'" for k in KATEGORI_STATUS)
+    upsert = ", ".join(f"{k} = {k} + excluded.{k}" for k in KATEGORI_STATUS)
+    return f"""
+        INSERT INTO attendance_summary (siswa_id, periode, {cols})
+        VALUES ({prefix}.siswa_id, substr({tanggal}, 1, 7), {values})
+        ON CONFLICT (siswa_id, periode) DO UPDATE SET {upsert};
+        INSERT INTO attendance_summary_kelas (kelas_id, tanggal, {cols})
+        SELECT kelas_id, {tanggal}, {values}
+        FROM siswa WHERE id = {prefix}.siswa_id AND kelas_id IS NOT NULL
+        ON CONFLICT (kelas_id, tanggal) DO UPDATE SET {upsert};
+    """
+
+def _summary_decrement(prefix, row=_ROW_TEXT):
+    kategori, tanggal = (e.format(p=prefix) for e in row)
+    return f"""
+        UPDATE attendance_summary SET {_summary_delta(kategori, '-')}
+        WHERE siswa_id = {prefix}.siswa_id AND periode = substr({tanggal}, 1, 7);
+        UPDATE attendance_summary_kelas SET {_summary_delta(kategori, '-')}
+        WHERE tanggal = {tanggal} AND kelas_id = (SELECT kelas_id FROM siswa WHERE id = {prefix}.siswa_id);
+    """
+
+def _create_summary_triggers(cursor, row=_ROW_TEXT):
+    # Trigger menjaga tabel ringkasan tetap sinkron untuk semua jalur tulis (insert, upsert, koreksi, hapus).
+    columns = "siswa_id, tanggal, kategori" if row is _ROW_TEXT else "siswa_id, day, status_code"
+    changed = " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in columns.split(", "))
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_summary_insert AFTER INSERT ON attendance
+        BEGIN {_summary_increment('NEW', row)} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_summary_delete AFTER DELETE ON attendance
+        BEGIN {_summary_decrement('OLD', row)} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_summary_update AFTER UPDATE OF {columns} ON attendance
+        WHEN {changed}
+        BEGIN {_summary_decrement('OLD', row)} {_summary_increment('NEW', row)} END
+    """)
 
+def _rebuild_summary(cursor, since=None):
+    # `since` ('YYYY-MM-01'): hanya periode mulai tanggal itu yang dibangun ulang; ringkasan tahun ajaran
+    # yang sudah diarsipkan dibiarkan (data arsip tidak pernah berubah).
+    cols = ", ".join(KATEGORI_STATUS)
+    sums = ", ".join(f"SUM(a.kategori = '{k}')" for k in KATEGORI_STATUS)
+    # Sebelum migrasi 008 kategori/tanggal adalah kolom attendance; sesudahnya diturunkan dari kode status dan nomor hari.
+    compact = 'day' in [r[1] for r in cursor.execute("PRAGMA table_info(attendance)")]
+    source = """
+        (SELECT a.siswa_id, sc.kategori, date(a.day * 86400, 'unixepoch') AS tanggal
+         FROM attendance a JOIN status_code sc ON sc.code = a.status_code)
+    """ if compact else "attendance"
+    cursor.execute("DELETE FROM attendance_summary WHERE periode >= ?", (since[:7] if since else '',))
+    cursor.execute("DELETE FROM attendance_summary_kelas WHERE tanggal >= ?", (since or '',))
+    cursor.execute(f"""
+        INSERT INTO attendance_summary (siswa_id, periode, {cols})
+        SELECT a.siswa_id, substr(a.tanggal, 1, 7), {sums}
+        FROM {source} a
+        GROUP BY a.siswa_id, substr(a.tanggal, 1, 7)
+    """)
+    cursor.execute(f"""
+        INSERT INTO attendance_summary_kelas (kelas_id, tanggal, {cols})
+        SELECT s.kelas_id, a.tanggal, {sums}
+        FROM {source} a
+        JOIN siswa s ON s.id = a.siswa_id
+        WHERE s.kelas_id IS NOT NULL
+        GROUP BY s.kelas_id, a.tanggal
+    """)
+
+def _migration_004_attendance_summary(cursor):
+    # Ringkasan per (siswa_id, bulan) dan per (kelas_id, tanggal) agar laporan cukup O(periode).
+    counts = ", ".join(f"{k} INTEGER NOT NULL DEFAULT 0" for k in KATEGORI_STATUS)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS attendance_summary (
+            siswa_id INTEGER NOT NULL,
+            periode TEXT NOT NULL,
+            {counts},
+            PRIMARY KEY (siswa_id, periode)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS attendance_summary_kelas (
+            kelas_id INTEGER NOT NULL,
+            tanggal TEXT NOT NULL,
+            {counts},
+            PRIMARY KEY (kelas_id, tanggal)
+        ) WITHOUT ROWID
+    """)
+    _create_summary_triggers(cursor)
+    _rebuild_summary(cursor)
+
+def _migration_005_siswa_fts(cursor):
+    # Indeks FTS5 (tokenizer trigram) atas siswa.nama/nis agar pencarian substring tidak memindai tabel.
+    # Build SQLite tanpa FTS5/trigram tetap jalan: langkah ini dilewati dan pencarian kembali ke LIKE.
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS siswa_fts USING fts5(
+                nama, nis, content='siswa', content_rowid='id', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"FTS5 trigram tidak tersedia, pencarian siswa memakai LIKE: {e}")
+        return
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_siswa_fts_insert AFTER INSERT ON siswa BEGIN
+            INSERT INTO siswa_fts (rowid, nama, nis) VALUES (NEW.id, NEW.nama, NEW.nis);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_siswa_fts_delete AFTER DELETE ON siswa BEGIN
+            INSERT INTO siswa_fts (siswa_fts, rowid, nama, nis) VALUES ('delete', OLD.id, OLD.nama, OLD.nis);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_siswa_fts_update AFTER UPDATE OF nama, nis ON siswa BEGIN
+            INSERT INTO siswa_fts (siswa_fts, rowid, nama, nis) VALUES ('delete', OLD.id, OLD.nama, OLD.nis);
+            INSERT INTO siswa_fts (rowid, nama, nis) VALUES (NEW.id, NEW.nama, NEW.nis);
+        END
+    """)
+    cursor.execute("INSERT INTO siswa_fts (siswa_fts) VALUES ('rebuild')")
+
+def _migration_006_cache_generation(cursor):
+    # Penghitung generasi data referensi; dinaikkan setiap kali daftar kelas/mapel berubah
+    # sehingga cache di semua worker tahu kapan harus memuat ulang.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_generation (
+            name TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    cursor.executemany("INSERT OR IGNORE INTO cache_generation (name) VALUES (?)", [(n,) for n in REFERENCE_DATA])
+
+def _migration_007_keyset_indexes(cursor):
+    # Paginasi keyset get_siswa_page() berurutan (nama, id).
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_siswa_nama ON siswa (nama)")
+
+def _migration_008_compact_attendance(cursor):
+    """Format penyimpanan ringkas: tanggal sebagai nomor hari (INTEGER sejak 1970-01-01), status sebagai kode
+    kecil ke tabel status_code (teks asli dan kategorinya disimpan sekali), dan tabel WITHOUT ROWID berkunci
+    (siswa_id, day) sehingga riwayat satu siswa tersimpan berurutan dan dibaca dengan satu pemindaian rentang.
+    Indeks UNIQUE terpisah dan kolom id/kategori/tanggal hilang. API tetap menerima dan mengembalikan tanggal ISO."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS status_code (
+            code INTEGER PRIMARY KEY,
+            status TEXT NOT NULL UNIQUE,
+            kategori TEXT NOT NULL
+        )
+    """)
+    cursor.executemany("INSERT OR IGNORE INTO status_code (status, kategori) VALUES (?, ?)",
+                       [(s, normalize_status(s)) for s in DEFAULT_STATUS])
+    cursor.execute("INSERT OR IGNORE INTO status_code (status, kategori) SELECT status, kategori FROM attendance GROUP BY status")
+    cursor.execute("""
+        CREATE TABLE attendance_compact (
+            siswa_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            status_code INTEGER NOT NULL,
+            recorded_by INTEGER,
+            PRIMARY KEY (siswa_id, day),
+            FOREIGN KEY (siswa_id) REFERENCES siswa (id),
+            FOREIGN KEY (status_code) REFERENCES status_code (code),
+            FOREIGN KEY (recorded_by) REFERENCES guru (id)
+        ) WITHOUT ROWID
+    """)
+    # Disisipkan urut kunci agar halaman B-tree terisi penuh. Tanggal yang bukan ISO membuat day NULL
+    # dan migrasi gagal (NOT NULL), bukan diam-diam membuang baris.
+    # Sebelum versi 8, delete_siswa_by_id tidak menghapus absensi siswa dan guru bisa dihapus langsung, jadi
+    # database lama berisi baris yatim yang melanggar foreign key tabel baru: absensi siswa yang sudah dihapus
+    # tidak ikut disalin (tidak pernah tampil di mana pun), pencatat yang sudah dihapus menjadi NULL.
+    cursor.execute("""
+        INSERT INTO attendance_compact (siswa_id, day, status_code, recorded_by)
+        SELECT a.siswa_id, CAST(julianday(a.tanggal) - 2440587.5 AS INTEGER), sc.code, g.id
+        FROM attendance a
+        JOIN status_code sc ON sc.status = a.status
+        JOIN siswa s ON s.id = a.siswa_id
+        LEFT JOIN guru g ON g.id = a.recorded_by
+        ORDER BY a.siswa_id, a.tanggal
+    """)
+    cursor.execute("DELETE FROM attendance_summary WHERE siswa_id NOT IN (SELECT id FROM siswa)")
+    for trigger in ('insert', 'delete', 'update'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_attendance_summary_{trigger}")
+    cursor.execute("DROP TABLE attendance")
+    cursor.execute("ALTER TABLE attendance_compact RENAME TO attendance")
+    # Rekap kelas per hari, cache status hari ini dan ekspor per rentang tanggal. Indeks sekunder WITHOUT ROWID
+    # sudah memuat kunci utama (siswa_id), jadi (day) saja sudah mencakup pencarian siswa per hari.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_day ON attendance (day)")
+    _create_summary_triggers(cursor, _ROW_COMPACT)
+    cursor.execute("ANALYZE attendance")
+
+def _migration_009_attendance_archive(cursor):
+    """Daftar tahun ajaran yang sudah dipindahkan ke file arsip (archive_academic_year). Rentang yang sudah
+    diarsipkan tertutup untuk tulis, sehingga tabel attendance dan arsip tidak pernah tumpang tindih dan
+    semua data hot selalu lebih baru dari arsip mana pun. Baris yang dipindahkan ke arsip tetap dihitung di
+    tabel ringkasan (trigger delete tidak mengurangi hitungan untuk rentang yang sudah diarsipkan)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS attendance_archive (
+            tahun INTEGER PRIMARY KEY,
+            file TEXT NOT NULL,
+            day_from INTEGER NOT NULL,
+            day_to INTEGER NOT NULL,
+            rows INTEGER NOT NULL,
+            archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    for event, row in (('INSERT', 'NEW'), ('UPDATE OF day', 'NEW')):
+        name = 'trg_attendance_archived_' + event.split()[0].lower()
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name} BEFORE {event} ON attendance
+            WHEN {row}.day <= (SELECT MAX(day_to) FROM attendance_archive)
+            BEGIN SELECT RAISE(ABORT, 'tahun ajaran sudah diarsipkan'); END
+        """)
+    cursor.execute("DROP TRIGGER IF EXISTS trg_attendance_summary_delete")
+    cursor.execute(f"""
+        CREATE TRIGGER trg_attendance_summary_delete AFTER DELETE ON attendance
+        WHEN OLD.day > (SELECT IFNULL(MAX(day_to), -1) FROM attendance_archive)
+        BEGIN {_summary_decrement('OLD', _ROW_COMPACT)} END
+    """)
+
+def _migration_010_school_calendar(cursor):
+    """Kalender libur sekolah (hari yang tidak diisi alpa otomatis) dan catatan hari yang sudah diproses
+    backfill_alpa(), agar penjadwal melanjutkan dari hari terakhir setelah server mati."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS hari_libur (
+            day INTEGER PRIMARY KEY,
+            keterangan TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS alpa_backfill_run (
+            day INTEGER PRIMARY KEY,
+            rows INTEGER NOT NULL,
+            finished_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    """)
+
+# Daftar migrasi berurutan; versi skema = posisi (mulai 1) dan disimpan di PRAGMA user_version.
+# Setiap langkah harus idempoten (IF NOT EXISTS) agar aman dijalankan di database lama.
+MIGRATIONS = [
+    _migration_001_base_tables,
+    _migration_002_hot_path_indexes,
+    _migration_003_status_kategori,
+    _migration_004_attendance_summary,
+    _migration_005_siswa_fts,
+    _migration_006_cache_generation,
+    _migration_007_keyset_indexes,
+    _migration_008_compact_attendance,
+    _migration_009_attendance_archive,
+    _migration_010_school_calendar,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    # Menjalankan migrasi yang belum diterapkan, masing-masing dalam transaksinya sendiri.
+    # BEGIN IMMEDIATE mengunci penulis sehingga worker gunicorn lain tidak menjalankan langkah yang sama.
+    applied = []
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = get_schema_version(conn)
+            if version >= SCHEMA_VERSION:
+                conn.rollback()
+                return applied
+            step = MIGRATIONS[version]
+            step(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+            applied.append(version + 1)
+        except Exception:
+            conn.rollback()
+            raise
+
+def init_db():
+    _status_code_cache.clear()
+    conn = get_db()
+    # Skema sudah terbaru: cukup satu pembacaan pragma, tanpa DDL.
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return []
+    return migrate(conn)
+
+
+
+# Jumlah bump per nama di proses ini, agar cache lokal langsung memeriksa ulang tanpa menunggu interval.
+local_generation_bumps = {}
+
+def bump_generation(conn, name):
+    # Dipanggil di dalam transaksi yang mengubah data referensi, sebelum commit.
+    conn.execute("UPDATE cache_generation SET generation = generation + 1 WHERE name = ?", (name,))
+    local_generation_bumps[name] = local_generation_bumps.get(name, 0) + 1
+
+def get_generation(name):
+    conn = get_db()
+    row = conn.execute("SELECT generation FROM cache_generation WHERE name = ?", (name,)).fetchone()
+    return row['generation'] if row else 0
+
+Page = namedtuple('Page', ['rows', 'next_cursor', 'prev_cursor'])
+
+def encode_cursor(values):
+    # Cursor keyset berupa token URL-safe dari nilai kunci baris batas, mis. (nama, id).
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    # ValueError untuk token yang rusak; pemanggil biasanya kembali ke halaman pertama.
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except Exception as e:
+        raise ValueError(f"Cursor tidak valid: {e}")
+    if not isinstance(values, list):
+        raise ValueError("Cursor tidak valid")
+    return values
+
+def _keyset_page(conn, query, params, keys, after=None, before=None, limit=PAGE_SIZE, descending=False, placeholder='?'):
+    """Menjalankan `query` (tanpa ORDER BY/LIMIT, sudah memiliki klausa WHERE) sebagai satu halaman keyset.
+    `keys` adalah kolom pengurut unik, mis. ('g.nama', 'g.id'); kolom hasil terakhir harus bernama sama
+    (tanpa prefiks) agar cursor bisa dibentuk. Biaya per halaman tetap, berapa pun dalamnya halaman.
+    `placeholder` mengikuti gaya parameter driver ('?' untuk sqlite3, '%s' untuk psycopg)."""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    backward = before is not None
+    cursor_values = decode_cursor(before if backward else after) if (before or after) else None
+    if cursor_values is not None and len(cursor_values) != len(keys):
+        # Cursor dari format kunci lama (mis. sebelum perubahan skema).
+        raise ValueError("Cursor tidak valid")
+    ascending = not descending if not backward else descending
+    params = list(params)
+    if cursor_values is not None:
+        op = '>' if ascending else '<'
+        query += f" AND ({', '.join(keys)}) {op} ({', '.join([placeholder] * len(keys))})"
+        params.extend(cursor_values)
+    direction = 'ASC' if ascending else 'DESC'
+    query += " ORDER BY " + ", ".join(f"{k} {direction}" for k in keys) + f" LIMIT {placeholder}"
+    params.append(limit + 1)
+    rows = conn.execute(query, params).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+    names = [k.split('.')[-1] for k in keys]
+    first = encode_cursor([rows[0][n] for n in names]) if rows else None
+    last = encode_cursor([rows[-1][n] for n in names]) if rows else None
+    if backward:
+        return Page(rows, last if cursor_values is not None else None, first if has_more else None)
+    return Page(rows, last if has_more else None, first if cursor_values is not None else None)
 
 def get_user_by_id(user_id):
-    conn = get_db_connection()
-    user = conn.execute("SELECT id, nama, email, mata_pelajaran, role FROM guru WHERE id = ?", (user_id,)).fetchone()
-    conn.close()
-    return user
+    conn = get_db()
+    return conn.execute("SELECT id, nama, email, mata_pelajaran, role FROM guru WHERE id = ?", (user_id,)).fetchone()
 
-def get_all_users(search_term=None, filter_mapel=None):
-    conn = get_db_connection()
-    query = "SELECT id, nama, mata_pelajaran, role FROM guru WHERE role = 'guru'"
+def get_guru_by_email(email):
+    # Data guru lengkap (termasuk hash password) untuk login.
+    conn = get_db()
+    return conn.execute("SELECT * FROM guru WHERE email = ?", (email,)).fetchone()
+
+def add_guru(nama, email, mata_pelajaran, password_hash):
+    # Mendaftarkan guru baru; False jika email sudah terdaftar.
+    conn = get_db()
+    try:
+        conn.execute(
+            "INSERT INTO guru (nama, email, mata_pelajaran, password, role) VALUES (?, ?, ?, ?, ?)",
+            (nama, email, mata_pelajaran, password_hash, 'guru')
+        )
+        bump_generation(conn, 'mapel')
+        conn.commit()
+        return True
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        return False
+
+def update_guru(guru_id, nama, email, mata_pelajaran, password_hash=None):
+    # Memperbarui profil guru (password hanya jika `password_hash` diberikan); False jika email sudah dipakai.
+    conn = get_db()
+    try:
+        if password_hash:
+            conn.execute(
+                "UPDATE guru SET nama = ?, email = ?, mata_pelajaran = ?, password = ? WHERE id = ?",
+                (nama, email, mata_pelajaran, password_hash, guru_id)
+            )
+        else:
+            conn.execute(
+                "UPDATE guru SET nama = ?, email = ?, mata_pelajaran = ? WHERE id = ?",
+                (nama, email, mata_pelajaran, guru_id)
+            )
+        bump_generation(conn, 'mapel')
+        conn.commit()
+        return True
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        return False
+
+def upgrade_password_hash(table, user_id, old_hash, new_hash):
+    # Mengganti hash password lama (parameter usang) setelah login berhasil; tidak menimpa jika password
+    # sudah diganti sejak hash lama dibaca. `table` adalah 'guru' atau 'siswa'.
+    if table not in ('guru', 'siswa'):
+        raise ValueError(f"Tabel tidak dikenal: {table}")
+    conn = get_db()
+    cur = conn.execute(f"UPDATE {table} SET password = ? WHERE id = ? AND password = ?", (new_hash, user_id, old_hash))
+    conn.commit()
+    return cur.rowcount == 1
+
+def _guru_filter(search_term=None, filter_mapel=None):
+    query = " WHERE role = 'guru'"
     params = []
     
     if search_term:
@@ -92,68 +841,94 @@ def get_all_users(search_term=None, filter_mapel=None):
     if filter_mapel and filter_mapel != 'Semua':
         query += " AND mata_pelajaran = ?" 
         params.append(filter_mapel)
+    return query, params
 
-    query += " ORDER BY nama" 
-    
-    users = conn.execute(query, tuple(params)).fetchall()
-    conn.close()
-    return users
+def get_all_users(search_term=None, filter_mapel=None):
+    conn = get_db()
+    where, params = _guru_filter(search_term, filter_mapel)
+    query = "SELECT id, nama, mata_pelajaran, role FROM guru" + where + " ORDER BY nama"
+    return conn.execute(query, tuple(params)).fetchall()
+
+def get_users_page(search_term=None, filter_mapel=None, after=None, before=None, limit=PAGE_SIZE):
+    # Daftar guru berhalaman, keyset pada (nama, id).
+    conn = get_db()
+    where, params = _guru_filter(search_term, filter_mapel)
+    return _keyset_page(conn, "SELECT id, nama, mata_pelajaran, role FROM guru" + where, params,
+                        ('nama', 'id'), after, before, limit)
 
 def get_list_mapel():
     # Mengambil daftar mata pelajaran unik (MENGGUNAKAN TABEL 'guru').
-    conn = get_db_connection()
+    conn = get_db()
     mapel = conn.execute("SELECT DISTINCT mata_pelajaran FROM guru ORDER BY mata_pelajaran").fetchall()
-    conn.close()
     return [m['mata_pelajaran'] for m in mapel]
 
 
 def get_all_kelas():
     # Mengambil semua daftar kelas yang ada.
-    conn = get_db_connection()
-    kelas_list = conn.execute("SELECT id, nama_kelas FROM kelas ORDER BY nama_kelas").fetchall()
-    conn.close()
-    return kelas_list
+    conn = get_db()
+    return conn.execute("SELECT id, nama_kelas FROM kelas ORDER BY nama_kelas").fetchall()
 
 def get_kelas_by_id(kelas_id):
     # Mengambil detail satu kelas berdasarkan ID.
-    conn = get_db_connection()
-    kelas = conn.execute("SELECT id, nama_kelas FROM kelas WHERE id = ?", (kelas_id,)).fetchone()
-    conn.close()
-    return kelas
+    conn = get_db()
+    return conn.execute("SELECT id, nama_kelas FROM kelas WHERE id = ?", (kelas_id,)).fetchone()
 
 
+def _shift_kelas_summary(conn, siswa_id, kelas_id, sign):
+    # Menambah (sign '+') atau mengurangi (sign '-') hitungan absensi satu siswa di ringkasan harian `kelas_id`.
+    # Hanya tabel attendance aktif: ringkasan tahun ajaran yang diarsipkan tidak diubah, sama seperti rebuild.
+    cols = ", ".join(KATEGORI_STATUS)
+    values = ", ".join(f"{sign}(sc.kategori = '{k}')" for k in KATEGORI_STATUS)
+    upsert = ", ".join(f"{k} = {k} + excluded.{k}" for k in KATEGORI_STATUS)
+    conn.execute(f"""
+        INSERT INTO attendance_summary_kelas (kelas_id, tanggal, {cols})
+        SELECT ?, date(a.day * 86400, 'unixepoch'), {values}
+        FROM attendance a JOIN status_code sc ON sc.code = a.status_code
+        WHERE a.siswa_id = ?
+        ON CONFLICT (kelas_id, tanggal) DO UPDATE SET {upsert}
+    """, (kelas_id, siswa_id))
+
 def update_siswa_kelas(siswa_id, kelas_id):
-    #Perbarui kelas siswa (set kelas_id).
-    conn = get_db_connection()
+    # Perbarui kelas siswa (set kelas_id). Hitungan absensinya di ringkasan per kelas ikut pindah dari kelas lama
+    # ke kelas baru dalam transaksi yang sama; BEGIN IMMEDIATE mencegah check-in di antaranya tercatat di kelas lama.
+    conn = get_db()
     try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT kelas_id FROM siswa WHERE id = ?", (siswa_id,)).fetchone()
+        if row and row['kelas_id'] != kelas_id:
+            if row['kelas_id'] is not None:
+                _shift_kelas_summary(conn, siswa_id, row['kelas_id'], '-')
+            if kelas_id is not None:
+                _shift_kelas_summary(conn, siswa_id, kelas_id, '+')
         conn.execute("UPDATE siswa SET kelas_id = ? WHERE id = ?", (kelas_id, siswa_id))
         conn.commit()
         return True
     except Exception as e:
+        conn.rollback()
         print(f"Error updating siswa kelas: {e}")
         return False
-    finally:
-        conn.close()
 
 def add_kelas(nama_kelas):
     # Menambahkan kelas baru ke database.
-    conn = get_db_connection()
+    conn = get_db()
     try:
         conn.execute("INSERT INTO kelas (nama_kelas) VALUES (?)", (nama_kelas,))
+        bump_generation(conn, 'kelas')
         conn.commit()
         return True
     except sqlite3.IntegrityError:
+        conn.rollback()
         return False 
-    finally:
-        conn.close()
 
 def delete_kelas_by_id(kelas_id):
     # Menghapus kelas berdasarkan ID dan membersihkan referensi siswa.
-    conn = get_db_connection()
+    conn = get_db()
     try:
         # PENTING: Set kelas_id siswa yang terkait menjadi NULL 
         conn.execute("UPDATE siswa SET kelas_id = NULL WHERE kelas_id = ?", (kelas_id,))
+        conn.execute("DELETE FROM attendance_summary_kelas WHERE kelas_id = ?", (kelas_id,))
         conn.execute("DELETE FROM kelas WHERE id = ?", (kelas_id,))
+        bump_generation(conn, 'kelas')
         conn.commit()
         #relasi database dan constraints
         return True
@@ -161,26 +936,38 @@ def delete_kelas_by_id(kelas_id):
         conn.rollback()
         print(f"Error menghapus kelas: {e}")
         return False
-    finally:
-        conn.close()
 
 
 def get_siswa_by_kelas(kelas_id):
     # Mengambil semua siswa yang terdaftar dalam kelas tertentu.
-    conn = get_db_connection()
-    siswa_list = conn.execute(
+    conn = get_db()
+    return conn.execute(
         "SELECT id, nama, nis FROM siswa WHERE kelas_id = ? ORDER BY nama", 
         (kelas_id,)
     ).fetchall()
-    conn.close()
-    return siswa_list
+
+def get_siswa_by_kelas_with_status(kelas_id, tanggal):
+    # Daftar siswa satu kelas beserta status absensi pada `tanggal` (None jika belum tercatat), dalam satu query.
+    conn = get_db()
+    day = to_day(tanggal)
+    return conn.execute(
+        f"""
+        SELECT s.id, s.nama, s.nis, sc.status
+        FROM siswa s
+        LEFT JOIN {_source_for_day(conn, day)} a ON a.siswa_id = s.id AND a.day = ?
+        LEFT JOIN status_code sc ON sc.code = a.status_code
+        WHERE s.kelas_id = ?
+        ORDER BY s.nama
+        """,
+        (day, kelas_id)
+    ).fetchall()
 
 def add_new_siswa(nama, nis, kelas_id, password_mentah):
      # Menyimpan data siswa baru ke database, termasuk password yang di-hash.
-    conn = get_db_connection()
+    conn = get_db()
     cursor = conn.cursor()
     
-    hashed_password = generate_password_hash(password_mentah)
+    hashed_password = hash_password(password_mentah)
     
     try:
         cursor.execute("""
@@ -191,117 +978,799 @@ def add_new_siswa(nama, nis, kelas_id, password_mentah):
         return True
     except sqlite3.IntegrityError:
         # Contoh: jika NIS sudah ada
+        conn.rollback()
         return False
     except Exception as e:
+        conn.rollback()
         print(f"Database Error: {e}")
         return False
-    finally:
-        conn.close()
+
+def get_existing_nis(nis_list):
+    # Mengembalikan himpunan NIS dari `nis_list` yang sudah terdaftar (query berbasis himpunan, per potongan).
+    conn = get_db()
+    nis_list = list(nis_list)
+    existing = set()
+    for i in range(0, len(nis_list), BATCH_CHUNK):
+        chunk = nis_list[i:i + BATCH_CHUNK]
+        placeholders = ", ".join("?" * len(chunk))
+        for r in conn.execute(f"SELECT nis FROM siswa WHERE nis IN ({placeholders})", chunk):
+            existing.add(r['nis'])
+    return existing
+
+def add_siswa_batch(rows):
+    # Menyimpan banyak siswa sekaligus; `rows` berisi tuple (nama, nis, kelas_id, password_hash) yang sudah di-hash.
+    conn = get_db()
+    try:
+        conn.executemany("INSERT INTO siswa (nama, nis, kelas_id, password) VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"Error importing siswa: {e}")
+        return False
 
 def get_siswa_by_nis(nis):
     # Mengambil data siswa lengkap berdasarkan NIS.
-    conn = get_db_connection()
-    siswa = conn.execute("SELECT * FROM siswa WHERE nis = ?", (nis,)).fetchone()
-    conn.close()
-    return siswa
+    conn = get_db()
+    return conn.execute("SELECT * FROM siswa WHERE nis = ?", (nis,)).fetchone()
 
 def get_siswa_by_nama(nama):
     # Mengambil data siswa lengkap berdasarkan NAMA.
-    conn = get_db_connection()
-    siswa = conn.execute("SELECT * FROM siswa WHERE nama = ?", (nama,)).fetchone()
-    conn.close()
-    return siswa
+    conn = get_db()
+    return conn.execute("SELECT * FROM siswa WHERE nama = ?", (nama,)).fetchone()
 
 def get_siswa_by_id(siswa_id):
     # Mengambil data siswa lengkap berdasarkan ID.
-    conn = get_db_connection()
-    siswa = conn.execute("SELECT * FROM siswa WHERE id = ?", (siswa_id,)).fetchone()
-    conn.close()
-    return siswa
+    conn = get_db()
+    return conn.execute("SELECT * FROM siswa WHERE id = ?", (siswa_id,)).fetchone()
 
 
-def get_siswa_by_search(nama, kelas_id=None):
-    """Cari siswa berdasarkan nama (partial match). Jika `kelas_id` diberikan, batasi pencarian ke kelas tersebut.
-    Mengembalikan satu baris (first match) atau None."""
-    conn = get_db_connection()
+_fts_available = None
+
+def _has_siswa_fts(conn):
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'siswa_fts'"
+        ).fetchone() is not None
+    return _fts_available
+
+def search_siswa(term, kelas_id=None, limit=10, offset=0):
+    """Cari siswa berdasarkan potongan nama atau NIS. Peringkat: nama/NIS yang diawali kata kunci lebih dulu,
+    lalu urut nama. Memakai indeks FTS5 trigram untuk kata kunci >= 3 karakter; kata kunci lebih pendek memakai LIKE.
+    (bm25 tidak dipakai: menghitungnya untuk ribuan kecocokan trigram jauh lebih lambat dari pencariannya sendiri.)"""
+    conn = get_db()
+    term = (term or '').strip()
+    if not term:
+        return []
     params = []
-    query = "SELECT * FROM siswa WHERE nama LIKE ?"
-    params.append('%' + nama + '%')
+    if len(term) >= 3 and _has_siswa_fts(conn):
+        query = """
+            SELECT s.id, s.nama, s.nis, s.kelas_id, k.nama_kelas
+            FROM siswa_fts f
+            JOIN siswa s ON s.id = f.rowid
+            LEFT JOIN kelas k ON k.id = s.kelas_id
+            WHERE siswa_fts MATCH ?
+        """
+        # Frasa dalam tanda kutip: trigram mencocokkan substring apa adanya.
+        params.append('"' + term.replace('"', '""') + '"')
+    else:
+        query = """
+            SELECT s.id, s.nama, s.nis, s.kelas_id, k.nama_kelas
+            FROM siswa s
+            LEFT JOIN kelas k ON k.id = s.kelas_id
+            WHERE (s.nama LIKE ? OR s.nis LIKE ?)
+        """
+        params.extend(['%' + term + '%', term + '%'])
     if kelas_id:
-        query += " AND kelas_id = ?"
+        query += " AND s.kelas_id = ?"
         params.append(kelas_id)
-    query += " ORDER BY nama LIMIT 1"
-    siswa = conn.execute(query, tuple(params)).fetchone()
-    conn.close()
-    return siswa
+    query += " ORDER BY (s.nama LIKE ? OR s.nis LIKE ?) DESC, s.nama LIMIT ? OFFSET ?"
+    params.extend([term + '%', term + '%', limit, offset])
+    return conn.execute(query, tuple(params)).fetchall()
+
+def get_siswa_by_search(nama, kelas_id=None):
+    """Cari siswa berdasarkan nama (partial match). Jika `kelas_id` diberikan, batasi pencarian ke kelas tersebut.
+    Mengembalikan satu baris (kecocokan terbaik, termasuk `nama_kelas`) atau None."""
+    rows = search_siswa(nama, kelas_id, limit=1)
+    return rows[0] if rows else None
 
 def get_all_siswa():
-    # Mengambil semua siswa (untuk laporan/index)
-    conn = get_db_connection()
-    rows = conn.execute("SELECT id, nama, nis, kelas_id FROM siswa ORDER BY nama").fetchall()
-    conn.close()
+    # Mengambil semua siswa beserta nama kelasnya (untuk laporan/index)
+    conn = get_db()
+    return conn.execute(
+        """
+        SELECT s.id, s.nama, s.nis, s.kelas_id, k.nama_kelas
+        FROM siswa s
+        LEFT JOIN kelas k ON k.id = s.kelas_id
+        ORDER BY s.nama
+        """
+    ).fetchall()
+
+def get_siswa_page(after=None, before=None, limit=PAGE_SIZE):
+    # Daftar siswa beserta nama kelas, berhalaman dengan keyset pada (nama, id).
+    conn = get_db()
+    return _keyset_page(conn, """
+        SELECT s.id, s.nama, s.nis, s.kelas_id, k.nama_kelas
+        FROM siswa s
+        LEFT JOIN kelas k ON k.id = s.kelas_id
+        WHERE TRUE
+    """, [], ('s.nama', 's.id'), after, before, limit)
+
+class TodayStatusCache:
+    """Cache status absensi hari ini per siswa ({siswa_id: status}) di dalam proses.
+
+    Diisi dengan satu query per tanggal, diperbarui write-through oleh semua jalur tulis absensi,
+    dan otomatis berganti tanggal saat lewat tengah malam. Tulisan dari worker lain terdeteksi lewat
+    PRAGMA data_version pada koneksi milik cache (paling sering sekali per TODAY_CACHE_MAX_AGE detik)."""
+
+    def __init__(self, max_age=TODAY_CACHE_MAX_AGE):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._tanggal = None
+        self._statuses = {}
+        self._data_version = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.warms = 0
+
+    def _sync(self):
+        # Dipanggil dengan lock; memastikan isi cache untuk tanggal hari ini masih berlaku.
+        today = datetime.date.today().isoformat()
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = _connect()
+            self._pid = os.getpid()
+            self._tanggal = None
+        now = time.monotonic()
+        if self._tanggal == today and now - self._checked_at < self.max_age:
+            return today
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._tanggal != today or data_version != self._data_version:
+            rows = self._conn.execute("""
+                SELECT a.siswa_id, sc.status FROM attendance a JOIN status_code sc ON sc.code = a.status_code
+                WHERE a.day = ?
+            """, (to_day(today),)).fetchall()
+            self._statuses = {r['siswa_id']: r['status'] for r in rows}
+            self._tanggal = today
+            self.warms += 1
+        self._data_version = data_version
+        self._checked_at = now
+        return today
+
+    def get(self, siswa_id, tanggal):
+        """Mengembalikan (True, status_atau_None) jika `tanggal` adalah hari ini, selain itu (False, None)."""
+        with self._lock:
+            if tanggal != self._sync():
+                return False, None
+            self.hits += 1
+            return True, self._statuses.get(int(siswa_id))
+
+    def set(self, siswa_id, tanggal, status):
+        with self._lock:
+            if tanggal == self._tanggal:
+                self._statuses[int(siswa_id)] = status
+
+    def discard(self, siswa_id):
+        with self._lock:
+            self._statuses.pop(int(siswa_id), None)
+
+
+today_status_cache = TodayStatusCache()
+
+# {status: kode} dari tabel status_code. Tabel itu hanya bertambah (kode tidak pernah diubah atau dihapus),
+# jadi cache proses tidak perlu invalidasi; dikosongkan oleh init_db() saat berganti database.
+_status_code_cache = {}
+
+def status_codes(conn, statuses):
+    """Kode status_code untuk setiap teks status; ejaan lain status baku (mis. 'alpha') memakai kode
+    DEFAULT_STATUS-nya. Status yang tidak ada di tabel menghasilkan ValueError: tabel ini diisi migrasi
+    saja, tidak pernah dari input pengguna."""
+    names = {s: canonical_status(s) for s in statuses}
+    if any(name not in _status_code_cache for name in names.values()):
+        # Tabelnya kecil: dimuat utuh dengan satu query.
+        _status_code_cache.update((r['status'], r['code']) for r in conn.execute("SELECT code, status FROM status_code"))
+        unknown = [s for s, name in names.items() if name not in _status_code_cache]
+        if unknown:
+            raise ValueError(f"Status absensi tidak dikenal: {', '.join(map(repr, unknown))}")
+    return {s: _status_code_cache[name] for s, name in names.items()}
+
+Archive = namedtuple('Archive', ['tahun', 'file', 'day_from', 'day_to'])
+
+def academic_year_range(tahun):
+    # (day_from, day_to) tahun ajaran yang dimulai bulan TAHUN_AJARAN_MULAI tahun `tahun`.
+    start = datetime.date(tahun, TAHUN_AJARAN_MULAI, 1)
+    return to_day(start), to_day(start.replace(year=tahun + 1)) - 1
+
+def _current_year_start():
+    # Nomor hari awal tahun ajaran berjalan; tanggal sejak itu tidak mungkin ada di arsip.
+    today = datetime.date.today()
+    return academic_year_range(today.year if today.month >= TAHUN_AJARAN_MULAI else today.year - 1)[0]
+
+
+class ArchiveRegistry:
+    """Isi tabel attendance_archive (terbaru dulu) yang di-cache per proses dan dibaca ulang paling sering
+    sekali per ARCHIVE_CHECK_INTERVAL detik; proses yang mengarsipkan memanggil invalidate()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._archives = []
+        self._checked_at = None
+
+    def get(self, conn):
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < ARCHIVE_CHECK_INTERVAL:
+                return self._archives
+        archives = [Archive(*r) for r in conn.execute(
+            "SELECT tahun, file, day_from, day_to FROM attendance_archive ORDER BY day_from DESC"
+        )]
+        with self._lock:
+            self._archives = archives
+            self._checked_at = time.monotonic()
+        return archives
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = None
+
+
+archive_registry = ArchiveRegistry()
+
+def _attach_archive(conn, archive):
+    """ATTACH read-only file arsip ke `conn` (sekali per koneksi) dan mengembalikan nama tabelnya,
+    mis. 'arsip_2023.attendance', atau None bila file tidak bisa dibuka."""
+    attached = getattr(conn, 'attached_archives', None)
+    if attached is None:
+        attached = conn.attached_archives = OrderedDict()
+    schema = f'arsip_{archive.tahun}'
+    if schema not in attached:
+        while len(attached) >= ARCHIVE_MAX_ATTACHED:
+            old = next(iter(attached))
+            try:
+                conn.execute(f"DETACH DATABASE {old}")
+            except sqlite3.OperationalError:
+                break
+            del attached[old]
+        # immutable=1: file arsip tidak pernah diubah setelah dibuat, jadi SQLite tidak perlu mengunci atau memeriksa WAL.
+        uri = f"file:{quote(os.path.join(ARCHIVE_DIR, archive.file))}?mode=ro&immutable=1"
+        try:
+            conn.execute(f"ATTACH DATABASE ? AS {schema}", (uri,))
+        except sqlite3.OperationalError as e:
+            print(f"Error membuka arsip {archive.file}: {e}")
+            return None
+        attached[schema] = archive
+    attached.move_to_end(schema)
+    return f'{schema}.attendance'
+
+def _attendance_source(conn, archives, include_hot=True):
+    """Sumber FROM untuk tabel attendance beserta `archives` (paling banyak ARCHIVE_MAX_ATTACHED):
+    nama tabel bila hanya satu, selain itu subquery UNION ALL. None bila tidak ada yang bisa dibaca."""
+    tables = ['main.attendance'] if include_hot else []
+    tables += [t for t in (_attach_archive(conn, a) for a in archives[:ARCHIVE_MAX_ATTACHED]) if t]
+    if len(tables) <= 1:
+        return tables[0] if tables else None
+    return "(" + " UNION ALL ".join(f"SELECT siswa_id, day, status_code, recorded_by FROM {t}" for t in tables) + ")"
+
+def _sources_for_range(conn, day_from, day_to):
+    # Tabel yang memuat rentang [day_from, day_to], urut tanggal: arsip yang beririsan dari yang paling lama,
+    # lalu attendance. Rentangnya tidak tumpang tindih, jadi hasil per tabel bisa langsung disambung.
+    for archive in reversed(archive_registry.get(conn)):
+        if archive.day_from <= day_to and archive.day_to >= day_from:
+            source = _attach_archive(conn, archive)
+            if source:
+                yield source
+    yield 'attendance'
+
+def _source_for_day(conn, day):
+    # Tabel yang memuat absensi pada `day`: attendance, atau arsip tahun ajarannya bila sudah diarsipkan.
+    if day >= _current_year_start():
+        return 'attendance'
+    for archive in archive_registry.get(conn):
+        if archive.day_from <= day <= archive.day_to:
+            return _attach_archive(conn, archive) or 'attendance'
+    return 'attendance'
+
+def get_archives():
+    # Daftar arsip tahun ajaran, terbaru dulu.
+    conn = get_db()
+    return conn.execute(
+        "SELECT tahun, file, day_from, day_to, rows, archived_at FROM attendance_archive ORDER BY tahun DESC"
+    ).fetchall()
+
+def archive_academic_year(tahun):
+    """Memindahkan absensi tahun ajaran `tahun` (mis. 2023 = Juli 2023 s.d. Juni 2024) ke file SQLite
+    tersendiri di ARCHIVE_DIR, lalu menghapusnya dari tabel attendance dalam satu transaksi bersama pencatatan
+    di attendance_archive. Hanya tahun ajaran yang sudah selesai, berurutan dari yang paling lama.
+    Mengembalikan jumlah baris yang dipindahkan, atau None jika gagal."""
+    day_from, day_to = academic_year_range(tahun)
+    label = f'{tahun}/{tahun + 1}'
+    if day_to >= to_day(datetime.date.today()):
+        print(f"Error: tahun ajaran {label} belum selesai")
+        return None
+    conn = get_db()
+    if conn.execute("SELECT 1 FROM attendance_archive WHERE tahun = ?", (tahun,)).fetchone():
+        print(f"Error: tahun ajaran {label} sudah diarsipkan")
+        return None
+    if conn.execute("SELECT 1 FROM attendance WHERE day < ? LIMIT 1", (day_from,)).fetchone():
+        print(f"Error: masih ada absensi sebelum tahun ajaran {label}; arsipkan tahun sebelumnya lebih dulu")
+        return None
+    file = f'absensi-{tahun}-{tahun + 1}.db'
+    path = os.path.join(ARCHIVE_DIR, file)
+    if os.path.exists(path):
+        print(f"Error: file arsip {path} sudah ada")
+        return None
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    tmp = path + '.tmp'
+    for p in (tmp, tmp + '-journal'):
+        if os.path.exists(p):
+            os.remove(p)
+    try:
+        rows = _write_archive_file(conn, tmp, tahun, day_from, day_to)
+        os.replace(tmp, path)
+        conn.execute("BEGIN IMMEDIATE")
+        # Dihitung ulang di bawah kunci tulis: koreksi yang masuk selama file dibuat membatalkan pengarsipan.
+        current = conn.execute("SELECT COUNT(*) FROM attendance WHERE day BETWEEN ? AND ?", (day_from, day_to)).fetchone()[0]
+        if current != rows:
+            raise RuntimeError("absensi berubah selama pengarsipan, silakan ulangi")
+        conn.execute(
+            "INSERT INTO attendance_archive (tahun, file, day_from, day_to, rows) VALUES (?, ?, ?, ?, ?)",
+            (tahun, file, day_from, day_to, rows)
+        )
+        conn.execute("DELETE FROM attendance WHERE day BETWEEN ? AND ?", (day_from, day_to))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        for p in (tmp, path):
+            if os.path.exists(p):
+                os.remove(p)
+        print(f"Error mengarsipkan tahun ajaran {label}: {e}")
+        return None
+    archive_registry.invalidate()
     return rows
 
-def get_nama_kelas_by_id(kelas_id):
-    conn = get_db_connection()
-    kelas = conn.execute("SELECT nama_kelas FROM kelas WHERE id = ?", (kelas_id,)).fetchone()
-    conn.close()
+def _write_archive_file(conn, path, tahun, day_from, day_to):
+    # Menyalin absensi rentang itu (urut kunci) dan salinan status_code ke file baru; mengembalikan jumlah baris.
+    conn.execute("ATTACH DATABASE ? AS arsip_baru", (path,))
+    try:
+        conn.execute("""
+            CREATE TABLE arsip_baru.attendance (
+                siswa_id INTEGER NOT NULL,
+                day INTEGER NOT NULL,
+                status_code INTEGER NOT NULL,
+                recorded_by INTEGER,
+                PRIMARY KEY (siswa_id, day)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE TABLE arsip_baru.status_code (code INTEGER PRIMARY KEY, status TEXT NOT NULL UNIQUE, kategori TEXT NOT NULL)")
+        conn.execute("CREATE TABLE arsip_baru.arsip_info (key TEXT PRIMARY KEY, value) WITHOUT ROWID")
+        conn.execute("INSERT INTO arsip_baru.status_code SELECT code, status, kategori FROM main.status_code")
+        rows = conn.execute("""
+            INSERT INTO arsip_baru.attendance (siswa_id, day, status_code, recorded_by)
+            SELECT siswa_id, day, status_code, recorded_by FROM main.attendance
+            WHERE day BETWEEN ? AND ?
+            ORDER BY siswa_id, day
+        """, (day_from, day_to)).rowcount
+        conn.execute("CREATE INDEX arsip_baru.idx_attendance_day ON attendance (day)")
+        conn.executemany("INSERT INTO arsip_baru.arsip_info (key, value) VALUES (?, ?)", [
+            ('tahun', tahun), ('day_from', day_from), ('day_to', day_to), ('rows', rows),
+            ('dibuat', datetime.datetime.now().isoformat(timespec='seconds')),
+        ])
+        conn.commit()
+    finally:
+        conn.rollback()
+        conn.execute("DETACH DATABASE arsip_baru")
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+    return rows
 
-    return kelas['nama_kelas'] if kelas else "kelas tidak diketahui"
+def get_attendance_status(siswa_id, tanggal):
+    # Status absensi siswa pada `tanggal` (None jika belum tercatat); untuk hari ini dilayani dari cache.
+    cached, status = today_status_cache.get(siswa_id, tanggal)
+    if cached:
+        return status
+    conn = get_db()
+    day = to_day(tanggal)
+    row = conn.execute(f"""
+        SELECT sc.status FROM {_source_for_day(conn, day)} a JOIN status_code sc ON sc.code = a.status_code
+        WHERE a.siswa_id = ? AND a.day = ?
+    """, (siswa_id, day)).fetchone()
+    return row['status'] if row else None
 
 def add_attendance(siswa_id, status, tanggal, recorded_by=None):
-    conn = get_db_connection()
+    conn = get_db()
+    status = canonical_status(status)
     try:
+        code = status_codes(conn, [status])[status]
         conn.execute(
-            "INSERT INTO attendance (siswa_id, status, tanggal, recorded_by) VALUES (?, ?, ?, ?)",
-            (siswa_id, status, tanggal, recorded_by)
+            "INSERT INTO attendance (siswa_id, day, status_code, recorded_by) VALUES (?, ?, ?, ?)",
+            (siswa_id, to_day(tanggal), code, recorded_by)
         )
         conn.commit()
+        today_status_cache.set(siswa_id, tanggal, status)
         return True
     except sqlite3.IntegrityError:
-
+        conn.rollback()
         return False
     except Exception as e:
+        conn.rollback()
         print(f"Error adding attendance: {e}")
         return False
-    finally:
-        conn.close()
 
+def insert_attendance_rows(conn, rows):
+    """Menyisipkan satu batch absensi dari antrian tulis (write_queue.py) dalam satu transaksi pada `conn`.
+    `rows` berisi tuple (siswa_id, status, tanggal, recorded_by); mengembalikan list bool per baris
+    (False jika siswa sudah tercatat pada tanggal itu atau siswa_id tidak ada). Error TRANSIENT_ERRORS
+    diteruskan ke pemanggil untuk dicoba ulang. Baris dengan status tidak valid bernilai False tanpa
+    memengaruhi baris lain."""
+    codes = status_codes(conn, [row[1] for row in rows if is_valid_status(row[1])])
+    conn.execute("BEGIN IMMEDIATE")
+    results = []
+    for siswa_id, status, tanggal, recorded_by in rows:
+        if not is_valid_status(status):
+            results.append(False)
+            continue
+        try:
+            cur = conn.execute(
+                """
+                INSERT INTO attendance (siswa_id, day, status_code, recorded_by) VALUES (?, ?, ?, ?)
+                ON CONFLICT (siswa_id, day) DO NOTHING
+                """,
+                (siswa_id, to_day(tanggal), codes[status], recorded_by)
+            )
+            results.append(cur.rowcount == 1)
+        except sqlite3.IntegrityError:
+            # Mis. siswa_id tidak ada (foreign key); baris lain dalam batch tetap disimpan.
+            results.append(False)
+    conn.commit()
+    return results
+
+
+def record_attendance_batch(rows, recorded_by=None):
+    """Simpan banyak status absensi sekaligus dalam satu transaksi.
+    `rows` berisi tuple (siswa_id, status, tanggal). Baris yang sudah ada pada tanggal yang sama
+    diperbarui (koreksi status). Mengembalikan dict {siswa_id: 'inserted' | 'updated' | 'unchanged'},
+    atau None jika transaksi gagal atau ada status yang tidak dikenal."""
+    rows = [(int(siswa_id), canonical_status(status), tanggal) for siswa_id, status, tanggal in rows]
+    if not rows:
+        return {}
+    conn = get_db()
+    try:
+        codes = status_codes(conn, [status for _, status, _ in rows])
+        existing = {}
+        for i in range(0, len(rows), BATCH_CHUNK):
+            chunk = rows[i:i + BATCH_CHUNK]
+            placeholders = ", ".join(["(?, ?)"] * len(chunk))
+            params = [v for siswa_id, _, tanggal in chunk for v in (siswa_id, to_day(tanggal))]
+            for r in conn.execute(
+                f"SELECT siswa_id, day, status_code FROM attendance WHERE (siswa_id, day) IN (VALUES {placeholders})",
+                params
+            ):
+                existing[(r['siswa_id'], r['day'])] = r['status_code']
+
+        outcomes = {}
+        changed = []
+        for siswa_id, status, tanggal in rows:
+            key = (siswa_id, to_day(tanggal))
+            if key not in existing:
+                outcomes[siswa_id] = 'inserted'
+            elif existing[key] != codes[status]:
+                outcomes[siswa_id] = 'updated'
+            else:
+                outcomes[siswa_id] = 'unchanged'
+                continue
+            existing[key] = codes[status]
+            changed.append((siswa_id, status, tanggal))
+
+        conn.executemany(
+            """
+            INSERT INTO attendance (siswa_id, day, status_code, recorded_by) VALUES (?, ?, ?, ?)
+            ON CONFLICT (siswa_id, day) DO UPDATE
+                SET status_code = excluded.status_code, recorded_by = excluded.recorded_by
+            """,
+            [(siswa_id, to_day(tanggal), codes[status], recorded_by) for siswa_id, status, tanggal in changed]
+        )
+        conn.commit()
+        for siswa_id, status, tanggal in changed:
+            today_status_cache.set(siswa_id, tanggal, status)
+        return outcomes
+    except Exception as e:
+        conn.rollback()
+        print(f"Error recording attendance batch: {e}")
+        return None
 
 def attendance_exists(siswa_id, tanggal):
-    conn = get_db_connection()
-    cur = conn.execute("SELECT id FROM attendance WHERE siswa_id = ? AND tanggal = ?", (siswa_id, tanggal)).fetchone()
-    conn.close()
-    return cur is not None
+    return get_attendance_status(siswa_id, tanggal) is not None
 
 
+# Riwayat absensi satu siswa dari `{source}` (tabel attendance, tabel arsip, atau subquery gabungan).
+_HISTORY_SQL = """
+    SELECT a.siswa_id, sc.status, date(a.day * 86400, 'unixepoch') AS tanggal, a.recorded_by,
+           g.nama AS recorded_by_name, a.day
+    FROM {source} a
+    JOIN status_code sc ON sc.code = a.status_code
+    LEFT JOIN guru g ON a.recorded_by = g.id
+    WHERE a.siswa_id = ?
+"""
+
 def get_attendance_for_student(siswa_id, limit=100):
-    conn = get_db_connection()
-    rows = conn.execute(
-        """
-        SELECT a.id, a.siswa_id, a.status, a.tanggal, a.recorded_by, g.nama AS recorded_by_name
-        FROM attendance a
-        LEFT JOIN guru g ON a.recorded_by = g.id
-        WHERE a.siswa_id = ?
-        ORDER BY a.tanggal DESC
-        LIMIT ?
+    # `limit` baris terbaru; arsip hanya dibaca bila data hot kurang dari `limit` baris.
+    conn = get_db()
+    rows = conn.execute(_HISTORY_SQL.format(source='attendance') + " ORDER BY a.day DESC LIMIT ?", (siswa_id, limit)).fetchall()
+    if len(rows) < limit:
+        source = _attendance_source(conn, archive_registry.get(conn), include_hot=False)
+        if source:
+            rows += conn.execute(_HISTORY_SQL.format(source=source) + " ORDER BY a.day DESC LIMIT ?",
+                                 (siswa_id, limit - len(rows))).fetchall()
+    return rows
+
+def get_attendance_page(siswa_id, after=None, before=None, limit=PAGE_SIZE):
+    """Riwayat absensi satu siswa, terbaru dulu, berhalaman dengan keyset pada day (unik per siswa).
+    Data hot selalu lebih baru dari arsip, jadi arsip ikut dibaca hanya bila halaman melewati batas itu:
+    halaman maju yang menghabiskan data hot, atau cursor yang sudah berada di rentang arsip."""
+    conn = get_db()
+    cursor_day = None
+    if before or after:
+        values = decode_cursor(before if before is not None else after)
+        if len(values) != 1 or not isinstance(values[0], int):
+            raise ValueError("Cursor tidak valid")
+        cursor_day = values[0]
+    page_args = ([siswa_id], ('a.day',), after, before, limit)
+    if before is None:
+        page = None
+        # Cursor sebelum tahun ajaran berjalan kemungkinan sudah di rentang arsip: langsung ke query gabungan.
+        if cursor_day is None or cursor_day >= _current_year_start():
+            page = _keyset_page(conn, _HISTORY_SQL.format(source='attendance'), *page_args, descending=True)
+            if page.next_cursor is not None:
+                return page
+        archives = [a for a in archive_registry.get(conn) if cursor_day is None or a.day_from < cursor_day]
+        include_hot = True
+        if not archives:
+            return page or _keyset_page(conn, _HISTORY_SQL.format(source='attendance'), *page_args, descending=True)
+    else:
+        # Mundur ke arah yang lebih baru: arsip terdekat dengan cursor lebih dulu, data hot paling akhir.
+        archives = [a for a in reversed(archive_registry.get(conn)) if a.day_to > cursor_day]
+        include_hot = len(archives) <= ARCHIVE_MAX_ATTACHED
+        if not archives:
+            return _keyset_page(conn, _HISTORY_SQL.format(source='attendance'), *page_args, descending=True)
+    source = _attendance_source(conn, archives, include_hot) or 'attendance'
+    return _keyset_page(conn, _HISTORY_SQL.format(source=source), *page_args, descending=True)
+
+_REKAP_COLUMNS = ", ".join(KATEGORI_STATUS)
+_REKAP_SUMS = ", ".join(f"SUM({k}) AS {k}" for k in KATEGORI_STATUS)
+_REKAP_NONZERO = "(" + " + ".join(KATEGORI_STATUS) + ") > 0"
+
+def get_rekap_bulanan(siswa_id):
+    # Rekap jumlah hadir/sakit/izin/alpa per bulan ('YYYY-MM') dari tabel ringkasan, terbaru dulu.
+    conn = get_db()
+    return conn.execute(
+        f"""
+        SELECT periode, {_REKAP_COLUMNS}
+        FROM attendance_summary
+        WHERE siswa_id = ? AND {_REKAP_NONZERO}
+        ORDER BY periode DESC
         """,
-        (siswa_id, limit)
+        (siswa_id,)
     ).fetchall()
-    conn.close()
-    return rows
+
+def get_rekap_semester(siswa_id):
+    # Rekap per semester ('YYYY Semester 1' untuk Jan-Jun, 'YYYY Semester 2' untuk Jul-Des), terbaru dulu.
+    conn = get_db()
+    return conn.execute(
+        f"""
+        SELECT substr(periode, 1, 4) || CASE WHEN substr(periode, 6, 2) <= '06' THEN ' Semester 1' ELSE ' Semester 2' END AS periode,
+               {_REKAP_SUMS}
+        FROM attendance_summary
+        WHERE siswa_id = ? AND {_REKAP_NONZERO}
+        GROUP BY 1
+        ORDER BY 1 DESC
+        """,
+        (siswa_id,)
+    ).fetchall()
+
+def get_rekap_kelas_harian(kelas_id, tanggal_mulai, tanggal_akhir):
+    # Rekap harian satu kelas untuk rentang tanggal (inklusif), dari tabel ringkasan.
+    conn = get_db()
+    return conn.execute(
+        f"""
+        SELECT tanggal, {_REKAP_COLUMNS}
+        FROM attendance_summary_kelas
+        WHERE kelas_id = ? AND tanggal BETWEEN ? AND ? AND {_REKAP_NONZERO}
+        ORDER BY tanggal
+        """,
+        (kelas_id, tanggal_mulai, tanggal_akhir)
+    ).fetchall()
+
+def rebuild_attendance_summary():
+    # Membangun ulang tabel ringkasan dari tabel attendance (mis. setelah data diubah di luar aplikasi).
+    # Tahun ajaran yang sudah diarsipkan tidak ikut dibangun ulang; ringkasannya tetap seperti saat diarsipkan.
+    conn = get_db()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        horizon = conn.execute("SELECT MAX(day_to) FROM attendance_archive").fetchone()[0]
+        _rebuild_summary(conn.cursor(), from_day(horizon + 1) if horizon is not None else None)
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"Error rebuilding attendance summary: {e}")
+        return False
+
+def iter_attendance_export(tanggal_mulai, tanggal_akhir, kelas_id=None, batch_size=1000):
+    """Generator baris absensi (tanggal, nis, nama, nama_kelas, status, kategori, dicatat_oleh) untuk ekspor.
+    Memakai koneksi tersendiri dan fetchmany() per batch sehingga memori tetap datar berapa pun jumlah barisnya.
+    Arsip yang beririsan dengan rentang dibaca satu per satu dari yang paling lama, lalu tabel attendance;
+    rentangnya tidak tumpang tindih sehingga urutan tanggal tetap terjaga."""
+    conn = get_db_connection()
+    try:
+        day_from, day_to = to_day(tanggal_mulai), to_day(tanggal_akhir)
+        for source in list(_sources_for_range(conn, day_from, day_to)):
+            query = f"""
+                SELECT date(a.day * 86400, 'unixepoch') AS tanggal, s.nis, s.nama, k.nama_kelas, sc.status, sc.kategori,
+                       g.nama AS dicatat_oleh
+                FROM {source} a
+                JOIN status_code sc ON sc.code = a.status_code
+                JOIN siswa s ON s.id = a.siswa_id
+                LEFT JOIN kelas k ON k.id = s.kelas_id
+                LEFT JOIN guru g ON g.id = a.recorded_by
+                WHERE a.day BETWEEN ? AND ?
+            """
+            params = [day_from, day_to]
+            if kelas_id:
+                query += " AND s.kelas_id = ?"
+                params.append(kelas_id)
+            query += " ORDER BY a.day, a.siswa_id"
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+    finally:
+        conn.close()
+
+def get_siswa_roster(kelas_id=None):
+    # Siswa satu kelas (atau seluruh sekolah) beserta nama kelasnya, urut kelas lalu nama.
+    conn = get_db()
+    query = "SELECT s.id, s.nama, s.nis, k.nama_kelas FROM siswa s LEFT JOIN kelas k ON k.id = s.kelas_id"
+    params = []
+    if kelas_id:
+        query += " WHERE s.kelas_id = ?"
+        params.append(kelas_id)
+    return conn.execute(query + " ORDER BY k.nama_kelas, s.nama", params).fetchall()
+
+# Indeks KATEGORI_STATUS dari kolom kategori, untuk get_attendance_packed().
+_KATEGORI_INDEX_SQL = "CASE {} " + " ".join(f"WHEN '{k}' THEN {i}" for i, k in enumerate(KATEGORI_STATUS)) + " END"
+
+def get_attendance_packed(tanggal_mulai, tanggal_akhir, kelas_id=None):
+    """Absensi rentang tanggal (seluruh sekolah atau satu kelas) dalam bentuk ringkas untuk analytics.py:
+    list teks angka dipisah koma, satu per tabel sumber. Setiap angka = siswa_id * 2^32 + (hari ke-n sejak
+    `tanggal_mulai`) * 2^16 + indeks kategori di KATEGORI_STATUS. Dirakit dengan group_concat() di database
+    karena membentuk ratusan ribu tuple Python jauh lebih lambat daripada query-nya sendiri."""
+    conn = get_db()
+    day_from, day_to = to_day(tanggal_mulai), to_day(tanggal_akhir)
+    # Lewat PK (siswa_id, day): satu pemindaian rentang per siswa.
+    siswa = "SELECT id FROM siswa" + (" WHERE kelas_id = ?" if kelas_id else "")
+    chunks = []
+    for source in list(_sources_for_range(conn, day_from, day_to)):
+        row = conn.execute(f"""
+            SELECT group_concat(a.siswa_id * 4294967296 + (a.day - ?) * 65536 + {_KATEGORI_INDEX_SQL.format('sc.kategori')})
+            FROM {source} a
+            JOIN status_code sc ON sc.code = a.status_code
+            WHERE a.siswa_id IN ({siswa}) AND a.day BETWEEN ? AND ?
+        """, [day_from] + ([kelas_id] if kelas_id else []) + [day_from, day_to]).fetchone()
+        if row[0]:
+            chunks.append(row[0])
+    return chunks
+
+def get_hari_libur(tanggal_mulai=None, tanggal_akhir=None):
+    # Hari libur dalam rentang (default semua), urut tanggal.
+    conn = get_db()
+    day_from = to_day(tanggal_mulai) if tanggal_mulai else -1
+    day_to = to_day(tanggal_akhir) if tanggal_akhir else 2 ** 31
+    return conn.execute("""
+        SELECT date(day * 86400, 'unixepoch') AS tanggal, keterangan FROM hari_libur
+        WHERE day BETWEEN ? AND ? ORDER BY day
+    """, (day_from, day_to)).fetchall()
+
+def set_hari_libur(tanggal, keterangan):
+    conn = get_db()
+    try:
+        conn.execute(
+            "INSERT INTO hari_libur (day, keterangan) VALUES (?, ?) ON CONFLICT (day) DO UPDATE SET keterangan = excluded.keterangan",
+            (to_day(tanggal), keterangan)
+        )
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"Error setting hari libur: {e}")
+        return False
+
+def delete_hari_libur(tanggal):
+    conn = get_db()
+    cur = conn.execute("DELETE FROM hari_libur WHERE day = ?", (to_day(tanggal),))
+    conn.commit()
+    return cur.rowcount > 0
+
+def get_last_alpa_backfill():
+    # Tanggal terakhir yang sudah diproses backfill_alpa(), atau None.
+    conn = get_db()
+    day = conn.execute("SELECT MAX(day) FROM alpa_backfill_run").fetchone()[0]
+    return from_day(day) if day is not None else None
+
+def backfill_alpa(tanggal_list):
+    """Mencatat 'Alpa' untuk setiap siswa yang terdaftar di kelas tetapi belum punya absensi pada tanggal-tanggal
+    itu, dengan satu INSERT ... SELECT ... WHERE NOT EXISTS per hari dan semuanya dalam satu transaksi.
+    Hari libur (hari_libur) dan tahun ajaran yang sudah diarsipkan dilewati di dalam query yang sama, jadi
+    aman dijalankan berulang. Mengembalikan {tanggal: baris baru}, atau None jika gagal."""
+    days = sorted({to_day(t) for t in tanggal_list})
+    if not days:
+        return {}
+    conn = get_db()
+    try:
+        code = status_codes(conn, [ALPA_STATUS])[ALPA_STATUS]
+        conn.execute("BEGIN IMMEDIATE")
+        inserted = {}
+        for day in days:
+            cur = conn.execute("""
+                INSERT INTO attendance (siswa_id, day, status_code, recorded_by)
+                SELECT s.id, :day, :code, NULL
+                FROM siswa s
+                WHERE s.kelas_id IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM attendance a WHERE a.siswa_id = s.id AND a.day = :day)
+                  AND NOT EXISTS (SELECT 1 FROM hari_libur WHERE day = :day)
+                  AND :day > (SELECT IFNULL(MAX(day_to), -1) FROM attendance_archive)
+            """, {'day': day, 'code': code})
+            inserted[from_day(day)] = cur.rowcount
+            conn.execute("""
+                INSERT INTO alpa_backfill_run (day, rows) VALUES (?, ?)
+                ON CONFLICT (day) DO UPDATE SET rows = rows + excluded.rows, finished_at = CURRENT_TIMESTAMP
+            """, (day, cur.rowcount))
+        conn.commit()
+        return inserted
+    except Exception as e:
+        conn.rollback()
+        print(f"Error backfilling alpa: {e}")
+        return None
 
 def delete_siswa_by_id(siswa_id):
     # Menghapus siswa berdasarkan ID.
-    conn = get_db_connection()
+    # foreign_keys aktif: riwayat absensi siswa ikut dihapus dalam transaksi yang sama. Baris di file arsip
+    # tidak diubah (read-only) dan tidak lagi tampil karena siswanya tidak ada; rekap per siswa dihapus langsung.
+    conn = get_db()
     try:
+        conn.execute("DELETE FROM attendance WHERE siswa_id = ?", (siswa_id,))
+        conn.execute("DELETE FROM attendance_summary WHERE siswa_id = ?", (siswa_id,))
         conn.execute("DELETE FROM siswa WHERE id = ?", (siswa_id,))
         conn.commit()
+        today_status_cache.discard(siswa_id)
         return True
     except Exception as e:
         conn.rollback()
         print(f"Error menghapus siswa: {e}")
         return False
-    finally:
-        conn.close()
 
+
+# Fungsi publik yang wajib disediakan setiap backend; app.py dan modul lain cukup mengimpor dari `database`.
+# Helper murni (normalize_status, encode_cursor, Page, konstanta) dipakai bersama oleh semua backend.
+BACKEND_API = (
+    'TRANSIENT_ERRORS', 'get_db', 'close_db', 'get_db_connection', 'get_schema_version', 'migrate', 'init_db',
+    'bump_generation', 'get_generation', 'get_user_by_id', 'get_guru_by_email', 'add_guru', 'update_guru',
+    'upgrade_password_hash',
+    'get_all_users', 'get_users_page', 'get_list_mapel', 'get_all_kelas', 'get_kelas_by_id', 'update_siswa_kelas',
+    'add_kelas', 'delete_kelas_by_id', 'get_siswa_by_kelas', 'get_siswa_by_kelas_with_status', 'add_new_siswa',
+    'get_existing_nis', 'add_siswa_batch', 'get_siswa_by_nis', 'get_siswa_by_nama', 'get_siswa_by_id',
+    'search_siswa', 'get_all_siswa', 'get_siswa_page', 'get_attendance_status', 'add_attendance',
+    'insert_attendance_rows', 'record_attendance_batch', 'get_attendance_for_student', 'get_attendance_page',
+    'get_rekap_bulanan', 'get_rekap_semester', 'get_rekap_kelas_harian', 'rebuild_attendance_summary',
+    'iter_attendance_export', 'get_siswa_roster', 'get_attendance_packed', 'get_hari_libur', 'set_hari_libur',
+    'delete_hari_libur', 'get_last_alpa_backfill', 'backfill_alpa', 'delete_siswa_by_id',
+)
+
+if BACKEND == 'postgresql':
+    # Diimpor di akhir modul: database_pg memakai helper bersama di atas, lalu implementasinya menggantikan
+    # versi SQLite sehingga `from database import ...` di mana pun otomatis memakai PostgreSQL.
+    import database_pg
+    for _name in BACKEND_API:
+        globals()[_name] = getattr(database_pg, _name)
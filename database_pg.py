@@ -0,0 +1,983 @@
+"""Backend PostgreSQL untuk helper di database.py, dipilih dengan DATABASE_URL=postgresql://...
+
+Setiap fungsi di database.BACKEND_API punya padanan di sini dengan perilaku dan nilai kembali yang sama,
+sehingga app.py tidak perlu tahu backend mana yang aktif. Jangan impor modul ini langsung; impor dari `database`.
+"""
+import datetime
+import os
+import threading
+from collections import Counter
+
+from flask import g, has_app_context
+
+try:
+    import psycopg
+    from psycopg_pool import ConnectionPool
+except ImportError as e:
+    raise ImportError(
+        "DATABASE_URL menunjuk ke PostgreSQL tetapi psycopg belum terpasang: pip install -r requirements-postgres.txt"
+    ) from e
+
+from database import (
+    ALPA_STATUS, DATABASE_URL, KATEGORI_STATUS, PAGE_SIZE, REFERENCE_DATA, _KATEGORI_INDEX_SQL, _keyset_page,
+    _guru_filter, canonical_status, is_valid_status, local_generation_bumps, normalize_status,
+)
+from login_guard import hash_password
+from metrics import registry as metrics
+
+# Pool per proses: min koneksi yang dijaga tetap terbuka, batas atas, dan lama menunggu koneksi bebas (detik)
+# sebelum request gagal. Total koneksi ke server = PG_POOL_MAX x jumlah worker (+1 per penulis latar/ekspor).
+PG_POOL_MIN = int(os.environ.get('PG_POOL_MIN', '1'))
+PG_POOL_MAX = int(os.environ.get('PG_POOL_MAX', '4'))
+PG_POOL_TIMEOUT = float(os.environ.get('PG_POOL_TIMEOUT', '5'))
+# Query dijadikan prepared statement di server setelah dieksekusi sebanyak ini pada satu koneksi (0 = langsung).
+# Isi 'none' di belakang pgbouncer mode transaction, yang tidak mendukung prepared statement.
+_threshold = os.environ.get('PG_PREPARE_THRESHOLD', '0').strip().lower()
+PG_PREPARE_THRESHOLD = None if _threshold in ('', 'none') else int(_threshold)
+# Kunci advisory yang menyerialkan migrasi antar worker (padanan BEGIN IMMEDIATE di SQLite).
+MIGRATION_LOCK_ID = 7203001
+
+TRANSIENT_ERRORS = (
+    psycopg.errors.SerializationFailure,
+    psycopg.errors.DeadlockDetected,
+    psycopg.errors.LockNotAvailable,
+)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+class Row(tuple):
+    """Baris hasil yang bisa diakses lewat indeks maupun nama kolom, seperti sqlite3.Row."""
+
+    def __new__(cls, values, names, index):
+        row = super().__new__(cls, values)
+        row._names = names
+        row._index = index
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return list(self._names)
+
+
+def _row_factory(cursor):
+    names = [c.name for c in cursor.description] if cursor.description else []
+    index = {name: i for i, name in enumerate(names)}
+    return lambda values: Row(values, names, index)
+
+
+def _connect_kwargs():
+    # client_encoding tetap UTF8: pada database ber-encoding SQL_ASCII psycopg mengembalikan kolom teks sebagai bytes.
+    return {'row_factory': _row_factory, 'prepare_threshold': PG_PREPARE_THRESHOLD, 'client_encoding': 'utf8'}
+
+
+def _configure(conn):
+    metrics.inc('db_connections_opened_total')
+
+
+def _get_pool():
+    # Pool dibuat malas dan ulang setelah fork: thread pemelihara pool tidak ikut tersalin ke worker gunicorn.
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(
+                    DATABASE_URL,
+                    min_size=PG_POOL_MIN,
+                    max_size=PG_POOL_MAX,
+                    timeout=PG_POOL_TIMEOUT,
+                    kwargs=_connect_kwargs(),
+                    configure=_configure,
+                    name='absensi',
+                    open=False,
+                )
+                _pool.open()
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def get_db():
+    """Koneksi pool yang dipakai bersama selama satu request (disimpan di `flask.g`).
+    Di luar app context (script CLI, thread latar), satu koneksi mandiri per thread dipakai ulang
+    agar tidak menahan slot pool milik request."""
+    if has_app_context():
+        if 'db' not in g:
+            g.db = _get_pool().getconn()
+        return g.db
+    conn = getattr(_local, 'conn', None)
+    if conn is None or conn.closed:
+        conn = _local.conn = get_db_connection()
+    return conn
+
+
+def close_db(e=None):
+    # Transaksi implisit dari query baca ditutup di sini; pool akan membatalkannya juga, tetapi dengan log peringatan.
+    db = g.pop('db', None)
+    if db is not None:
+        if not db.closed and db.info.transaction_status != psycopg.pq.TransactionStatus.IDLE:
+            db.rollback()
+        _get_pool().putconn(db)
+
+
+def get_db_connection():
+    # Koneksi mandiri di luar pool; pemanggil wajib menutupnya sendiri.
+    conn = psycopg.connect(DATABASE_URL, **_connect_kwargs())
+    metrics.inc('db_connections_opened_total')
+    return conn
+
+
+def _summary_function():
+    # Padanan trigger ringkasan SQLite (lihat database._create_summary_triggers) dalam satu fungsi PL/pgSQL.
+    cols = ", ".join(KATEGORI_STATUS)
+    values = ", ".join(f"(NEW.kategori = '{k}')::int" for k in KATEGORI_STATUS)
+    decrement = ", ".join(f"{k} = {k} - (OLD.kategori = '{k}')::int" for k in KATEGORI_STATUS)
+    upsert_siswa = ", ".join(f"{k} = attendance_summary.{k} + excluded.{k}" for k in KATEGORI_STATUS)
+    upsert_kelas = ", ".join(f"{k} = attendance_summary_kelas.{k} + excluded.{k}" for k in KATEGORI_STATUS)
+    return f"""
+        CREATE OR REPLACE FUNCTION attendance_summary_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE attendance_summary SET {decrement}
+                WHERE siswa_id = OLD.siswa_id AND periode = substr(OLD.tanggal, 1, 7);
+                UPDATE attendance_summary_kelas SET {decrement}
+                WHERE tanggal = OLD.tanggal AND kelas_id = (SELECT kelas_id FROM siswa WHERE id = OLD.siswa_id);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO attendance_summary (siswa_id, periode, {cols})
+                VALUES (NEW.siswa_id, substr(NEW.tanggal, 1, 7), {values})
+                ON CONFLICT (siswa_id, periode) DO UPDATE SET {upsert_siswa};
+                INSERT INTO attendance_summary_kelas (kelas_id, tanggal, {cols})
+                SELECT kelas_id, NEW.tanggal, {values}
+                FROM siswa WHERE id = NEW.siswa_id AND kelas_id IS NOT NULL
+                ON CONFLICT (kelas_id, tanggal) DO UPDATE SET {upsert_kelas};
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """
+
+
+def _rebuild_summary(conn):
+    cols = ", ".join(KATEGORI_STATUS)
+    sums = ", ".join(f"COUNT(*) FILTER (WHERE a.kategori = '{k}')" for k in KATEGORI_STATUS)
+    conn.execute("DELETE FROM attendance_summary")
+    conn.execute("DELETE FROM attendance_summary_kelas")
+    conn.execute(f"""
+        INSERT INTO attendance_summary (siswa_id, periode, {cols})
+        SELECT a.siswa_id, substr(a.tanggal, 1, 7), {sums}
+        FROM attendance a
+        GROUP BY a.siswa_id, substr(a.tanggal, 1, 7)
+    """)
+    conn.execute(f"""
+        INSERT INTO attendance_summary_kelas (kelas_id, tanggal, {cols})
+        SELECT s.kelas_id, a.tanggal, {sums}
+        FROM attendance a
+        JOIN siswa s ON s.id = a.siswa_id
+        WHERE s.kelas_id IS NOT NULL
+        GROUP BY s.kelas_id, a.tanggal
+    """)
+
+
+def _migration_001_schema(conn):
+    # Skema setara database.py versi 7 sekaligus (backend ini tidak punya data lama yang perlu dimigrasi bertahap).
+    # tanggal tetap TEXT 'YYYY-MM-DD' seperti di SQLite agar API dan cursor keyset tetap berupa string.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS guru (
+            id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            email TEXT NOT NULL UNIQUE,
+            nama TEXT NOT NULL,
+            mata_pelajaran TEXT NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'guru'
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS kelas (
+            id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            nama_kelas TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS siswa (
+            id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            nama TEXT NOT NULL,
+            nis TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            kelas_id INTEGER REFERENCES kelas (id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            siswa_id INTEGER NOT NULL REFERENCES siswa (id),
+            status TEXT NOT NULL,
+            kategori TEXT NOT NULL DEFAULT 'alpa',
+            tanggal TEXT NOT NULL,
+            recorded_by INTEGER REFERENCES guru (id),
+            UNIQUE (siswa_id, tanggal)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_siswa_kelas_nama ON siswa (kelas_id, nama)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_siswa_nama ON siswa (nama, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_guru_role_nama ON guru (role, nama)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_guru_mapel ON guru (mata_pelajaran)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_tanggal ON attendance (tanggal)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_siswa_tanggal_status ON attendance (siswa_id, tanggal DESC, status)")
+
+    counts = ", ".join(f"{k} INTEGER NOT NULL DEFAULT 0" for k in KATEGORI_STATUS)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS attendance_summary (
+            siswa_id INTEGER NOT NULL,
+            periode TEXT NOT NULL,
+            {counts},
+            PRIMARY KEY (siswa_id, periode)
+        )
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS attendance_summary_kelas (
+            kelas_id INTEGER NOT NULL,
+            tanggal TEXT NOT NULL,
+            {counts},
+            PRIMARY KEY (kelas_id, tanggal)
+        )
+    """)
+    conn.execute(_summary_function())
+    conn.execute("DROP TRIGGER IF EXISTS trg_attendance_summary_insert ON attendance")
+    conn.execute("DROP TRIGGER IF EXISTS trg_attendance_summary_delete ON attendance")
+    conn.execute("DROP TRIGGER IF EXISTS trg_attendance_summary_update ON attendance")
+    conn.execute("""
+        CREATE TRIGGER trg_attendance_summary_insert AFTER INSERT ON attendance
+        FOR EACH ROW EXECUTE FUNCTION attendance_summary_sync()
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_attendance_summary_delete AFTER DELETE ON attendance
+        FOR EACH ROW EXECUTE FUNCTION attendance_summary_sync()
+    """)
+    conn.execute("""
+        CREATE TRIGGER trg_attendance_summary_update AFTER UPDATE OF siswa_id, tanggal, kategori ON attendance
+        FOR EACH ROW
+        WHEN (OLD.siswa_id IS DISTINCT FROM NEW.siswa_id OR OLD.tanggal IS DISTINCT FROM NEW.tanggal
+              OR OLD.kategori IS DISTINCT FROM NEW.kategori)
+        EXECUTE FUNCTION attendance_summary_sync()
+    """)
+    _rebuild_summary(conn)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cache_generation (
+            name TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    with conn.cursor() as cur:
+        cur.executemany("INSERT INTO cache_generation (name) VALUES (%s) ON CONFLICT DO NOTHING",
+                        [(n,) for n in REFERENCE_DATA])
+
+
+def _migration_002_siswa_trigram(conn):
+    # Indeks GIN pg_trgm agar pencarian substring (ILIKE '%...%') atas nama/NIS tidak memindai tabel,
+    # padanan FTS5 trigram di SQLite. Tanpa hak CREATE EXTENSION, langkah ini dilewati (savepoint).
+    try:
+        with conn.transaction():
+            conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_siswa_nama_trgm ON siswa USING gin (nama gin_trgm_ops)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_siswa_nis_trgm ON siswa USING gin (nis gin_trgm_ops)")
+    except psycopg.Error as e:
+        print(f"pg_trgm tidak tersedia, pencarian siswa tanpa indeks trigram: {e}")
+
+
+def _migration_003_school_calendar(conn):
+    # Padanan database._migration_010_school_calendar.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS hari_libur (
+            tanggal TEXT PRIMARY KEY,
+            keterangan TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS alpa_backfill_run (
+            tanggal TEXT PRIMARY KEY,
+            rows INTEGER NOT NULL,
+            finished_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+
+# Versi skema disimpan di tabel schema_version (PostgreSQL tidak punya PRAGMA user_version).
+MIGRATIONS = [
+    _migration_001_schema,
+    _migration_002_siswa_trigram,
+    _migration_003_school_calendar,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn):
+    try:
+        with conn.transaction():
+            row = conn.execute("SELECT max(version) FROM schema_version").fetchone()
+    except psycopg.errors.UndefinedTable:
+        return 0
+    return row[0] or 0
+
+
+def migrate(conn):
+    # Setiap langkah dalam transaksinya sendiri; advisory lock membuat worker lain menunggu lalu melihat versi baru.
+    applied = []
+    while True:
+        with conn.transaction():
+            conn.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            conn.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+            version = conn.execute("SELECT max(version) FROM schema_version").fetchone()[0] or 0
+            if version >= SCHEMA_VERSION:
+                return applied
+            MIGRATIONS[version](conn)
+            conn.execute("INSERT INTO schema_version (version) VALUES (%s)", (version + 1,))
+        applied.append(version + 1)
+
+
+def init_db():
+    conn = get_db()
+    # Pastikan tidak ada transaksi implisit yang terbuka agar migrasi berjalan sebagai transaksi sendiri.
+    conn.rollback()
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return []
+    return migrate(conn)
+
+
+def bump_generation(conn, name):
+    # Dipanggil di dalam transaksi yang mengubah data referensi, sebelum commit.
+    conn.execute("UPDATE cache_generation SET generation = generation + 1 WHERE name = %s", (name,))
+    local_generation_bumps[name] = local_generation_bumps.get(name, 0) + 1
+
+
+def get_generation(name):
+    conn = get_db()
+    row = conn.execute("SELECT generation FROM cache_generation WHERE name = %s", (name,)).fetchone()
+    return row['generation'] if row else 0
+
+
+def get_user_by_id(user_id):
+    conn = get_db()
+    return conn.execute("SELECT id, nama, email, mata_pelajaran, role FROM guru WHERE id = %s", (user_id,)).fetchone()
+
+
+def get_guru_by_email(email):
+    conn = get_db()
+    return conn.execute("SELECT * FROM guru WHERE email = %s", (email,)).fetchone()
+
+
+def add_guru(nama, email, mata_pelajaran, password_hash):
+    conn = get_db()
+    try:
+        conn.execute(
+            "INSERT INTO guru (nama, email, mata_pelajaran, password, role) VALUES (%s, %s, %s, %s, %s)",
+            (nama, email, mata_pelajaran, password_hash, 'guru')
+        )
+        bump_generation(conn, 'mapel')
+        conn.commit()
+        return True
+    except psycopg.IntegrityError:
+        conn.rollback()
+        return False
+
+
+def update_guru(guru_id, nama, email, mata_pelajaran, password_hash=None):
+    conn = get_db()
+    try:
+        if password_hash:
+            conn.execute(
+                "UPDATE guru SET nama = %s, email = %s, mata_pelajaran = %s, password = %s WHERE id = %s",
+                (nama, email, mata_pelajaran, password_hash, guru_id)
+            )
+        else:
+            conn.execute(
+                "UPDATE guru SET nama = %s, email = %s, mata_pelajaran = %s WHERE id = %s",
+                (nama, email, mata_pelajaran, guru_id)
+            )
+        bump_generation(conn, 'mapel')
+        conn.commit()
+        return True
+    except psycopg.IntegrityError:
+        conn.rollback()
+        return False
+
+
+def upgrade_password_hash(table, user_id, old_hash, new_hash):
+    if table not in ('guru', 'siswa'):
+        raise ValueError(f"Tabel tidak dikenal: {table}")
+    conn = get_db()
+    cur = conn.execute(f"UPDATE {table} SET password = %s WHERE id = %s AND password = %s", (new_hash, user_id, old_hash))
+    conn.commit()
+    return cur.rowcount == 1
+
+
+def _pg_guru_filter(search_term=None, filter_mapel=None):
+    # Filter yang sama dengan versi SQLite; LIKE di SQLite tidak peka huruf besar-kecil, maka di sini ILIKE.
+    where, params = _guru_filter(search_term, filter_mapel)
+    return where.replace(' LIKE ?', ' ILIKE ?').replace('?', '%s'), params
+
+
+def get_all_users(search_term=None, filter_mapel=None):
+    conn = get_db()
+    where, params = _pg_guru_filter(search_term, filter_mapel)
+    return conn.execute("SELECT id, nama, mata_pelajaran, role FROM guru" + where + " ORDER BY nama", params).fetchall()
+
+
+def get_users_page(search_term=None, filter_mapel=None, after=None, before=None, limit=PAGE_SIZE):
+    conn = get_db()
+    where, params = _pg_guru_filter(search_term, filter_mapel)
+    return _keyset_page(conn, "SELECT id, nama, mata_pelajaran, role FROM guru" + where, params,
+                        ('nama', 'id'), after, before, limit, placeholder='%s')
+
+
+def get_list_mapel():
+    conn = get_db()
+    mapel = conn.execute("SELECT DISTINCT mata_pelajaran FROM guru ORDER BY mata_pelajaran").fetchall()
+    return [m['mata_pelajaran'] for m in mapel]
+
+
+def get_all_kelas():
+    conn = get_db()
+    return conn.execute("SELECT id, nama_kelas FROM kelas ORDER BY nama_kelas").fetchall()
+
+
+def get_kelas_by_id(kelas_id):
+    conn = get_db()
+    return conn.execute("SELECT id, nama_kelas FROM kelas WHERE id = %s", (kelas_id,)).fetchone()
+
+
+def _shift_kelas_summary(conn, siswa_id, kelas_id, sign):
+    # Padanan database._shift_kelas_summary.
+    cols = ", ".join(KATEGORI_STATUS)
+    values = ", ".join(f"{sign}(a.kategori = '{k}')::int" for k in KATEGORI_STATUS)
+    upsert = ", ".join(f"{k} = attendance_summary_kelas.{k} + excluded.{k}" for k in KATEGORI_STATUS)
+    conn.execute(f"""
+        INSERT INTO attendance_summary_kelas (kelas_id, tanggal, {cols})
+        SELECT %s, a.tanggal, {values}
+        FROM attendance a
+        WHERE a.siswa_id = %s
+        ON CONFLICT (kelas_id, tanggal) DO UPDATE SET {upsert}
+    """, (kelas_id, siswa_id))
+
+
+def update_siswa_kelas(siswa_id, kelas_id):
+    # Ringkasan per kelas ikut dipindahkan; kunci tabel seperti rebuild agar check-in di antaranya tidak
+    # tercatat di kelas lama setelah hitungannya dipindah.
+    conn = get_db()
+    try:
+        conn.execute("LOCK TABLE attendance IN SHARE MODE")
+        row = conn.execute("SELECT kelas_id FROM siswa WHERE id = %s FOR UPDATE", (siswa_id,)).fetchone()
+        if row and row['kelas_id'] != kelas_id:
+            if row['kelas_id'] is not None:
+                _shift_kelas_summary(conn, siswa_id, row['kelas_id'], '-')
+            if kelas_id is not None:
+                _shift_kelas_summary(conn, siswa_id, kelas_id, '+')
+        conn.execute("UPDATE siswa SET kelas_id = %s WHERE id = %s", (kelas_id, siswa_id))
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"Error updating siswa kelas: {e}")
+        return False
+
+
+def add_kelas(nama_kelas):
+    conn = get_db()
+    try:
+        conn.execute("INSERT INTO kelas (nama_kelas) VALUES (%s)", (nama_kelas,))
+        bump_generation(conn, 'kelas')
+        conn.commit()
+        return True
+    except psycopg.IntegrityError:
+        conn.rollback()
+        return False
+
+
+def delete_kelas_by_id(kelas_id):
+    conn = get_db()
+    try:
+        conn.execute("UPDATE siswa SET kelas_id = NULL WHERE kelas_id = %s", (kelas_id,))
+        conn.execute("DELETE FROM attendance_summary_kelas WHERE kelas_id = %s", (kelas_id,))
+        conn.execute("DELETE FROM kelas WHERE id = %s", (kelas_id,))
+        bump_generation(conn, 'kelas')
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"Error menghapus kelas: {e}")
+        return False
+
+
+def get_siswa_by_kelas(kelas_id):
+    conn = get_db()
+    return conn.execute("SELECT id, nama, nis FROM siswa WHERE kelas_id = %s ORDER BY nama", (kelas_id,)).fetchall()
+
+
+def get_siswa_by_kelas_with_status(kelas_id, tanggal):
+    conn = get_db()
+    return conn.execute(
+        """
+        SELECT s.id, s.nama, s.nis, a.status
+        FROM siswa s
+        LEFT JOIN attendance a ON a.siswa_id = s.id AND a.tanggal = %s
+        WHERE s.kelas_id = %s
+        ORDER BY s.nama
+        """,
+        (tanggal, kelas_id)
+    ).fetchall()
+
+
+def add_new_siswa(nama, nis, kelas_id, password_mentah):
+    conn = get_db()
+    hashed_password = hash_password(password_mentah)
+    try:
+        conn.execute(
+            "INSERT INTO siswa (nama, nis, kelas_id, password) VALUES (%s, %s, %s, %s)",
+            (nama, nis, kelas_id, hashed_password)
+        )
+        conn.commit()
+        return True
+    except psycopg.IntegrityError:
+        conn.rollback()
+        return False
+    except Exception as e:
+        conn.rollback()
+        print(f"Database Error: {e}")
+        return False
+
+
+def get_existing_nis(nis_list):
+    # Satu query berapa pun jumlahnya: PostgreSQL menerima array sebagai satu parameter.
+    conn = get_db()
+    rows = conn.execute("SELECT nis FROM siswa WHERE nis = ANY(%s)", (list(nis_list),)).fetchall()
+    return {r['nis'] for r in rows}
+
+
+def add_siswa_batch(rows):
+    # COPY ... FROM STDIN: satu aliran data untuk seluruh impor, jauh lebih cepat dari INSERT per baris.
+    conn = get_db()
+    try:
+        with conn.cursor() as cur:
+            with cur.copy("COPY siswa (nama, nis, kelas_id, password) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"Error importing siswa: {e}")
+        return False
+
+
+def get_siswa_by_nis(nis):
+    conn = get_db()
+    return conn.execute("SELECT * FROM siswa WHERE nis = %s", (nis,)).fetchone()
+
+
+def get_siswa_by_nama(nama):
+    conn = get_db()
+    return conn.execute("SELECT * FROM siswa WHERE nama = %s", (nama,)).fetchone()
+
+
+def get_siswa_by_id(siswa_id):
+    conn = get_db()
+    return conn.execute("SELECT * FROM siswa WHERE id = %s", (siswa_id,)).fetchone()
+
+
+def search_siswa(term, kelas_id=None, limit=10, offset=0):
+    """Cari siswa berdasarkan potongan nama atau NIS, peringkat sama dengan versi SQLite
+    (yang diawali kata kunci lebih dulu, lalu urut nama). ILIKE memakai indeks pg_trgm bila tersedia."""
+    conn = get_db()
+    term = (term or '').strip()
+    if not term:
+        return []
+    query = """
+        SELECT s.id, s.nama, s.nis, s.kelas_id, k.nama_kelas
+        FROM siswa s
+        LEFT JOIN kelas k ON k.id = s.kelas_id
+        WHERE (s.nama ILIKE %s OR s.nis ILIKE %s)
+    """
+    params = ['%' + term + '%', '%' + term + '%']
+    if kelas_id:
+        query += " AND s.kelas_id = %s"
+        params.append(kelas_id)
+    query += " ORDER BY (s.nama ILIKE %s OR s.nis ILIKE %s) DESC, s.nama LIMIT %s OFFSET %s"
+    params.extend([term + '%', term + '%', limit, offset])
+    return conn.execute(query, params).fetchall()
+
+
+def get_all_siswa():
+    conn = get_db()
+    return conn.execute(
+        """
+        SELECT s.id, s.nama, s.nis, s.kelas_id, k.nama_kelas
+        FROM siswa s
+        LEFT JOIN kelas k ON k.id = s.kelas_id
+        ORDER BY s.nama
+        """
+    ).fetchall()
+
+
+def get_siswa_page(after=None, before=None, limit=PAGE_SIZE):
+    conn = get_db()
+    return _keyset_page(conn, """
+        SELECT s.id, s.nama, s.nis, s.kelas_id, k.nama_kelas
+        FROM siswa s
+        LEFT JOIN kelas k ON k.id = s.kelas_id
+        WHERE TRUE
+    """, [], ('s.nama', 's.id'), after, before, limit, placeholder='%s')
+
+
+def get_attendance_status(siswa_id, tanggal):
+    # Tanpa cache dalam proses: PostgreSQL tidak punya padanan PRAGMA data_version untuk mendeteksi tulisan
+    # dari worker lain, dan lookup indeks UNIQUE (siswa_id, tanggal) lewat prepared statement sudah murah.
+    conn = get_db()
+    row = conn.execute("SELECT status FROM attendance WHERE siswa_id = %s AND tanggal = %s", (siswa_id, tanggal)).fetchone()
+    return row['status'] if row else None
+
+
+def add_attendance(siswa_id, status, tanggal, recorded_by=None):
+    conn = get_db()
+    status = canonical_status(status)
+    try:
+        # Tanpa tabel status_code di sini; status diperiksa agar perilakunya sama dengan database.status_codes().
+        if not is_valid_status(status):
+            raise ValueError(f"Status absensi tidak dikenal: {status!r}")
+        conn.execute(
+            "INSERT INTO attendance (siswa_id, status, kategori, tanggal, recorded_by) VALUES (%s, %s, %s, %s, %s)",
+            (siswa_id, status, normalize_status(status), tanggal, recorded_by)
+        )
+        conn.commit()
+        return True
+    except psycopg.IntegrityError:
+        conn.rollback()
+        return False
+    except Exception as e:
+        conn.rollback()
+        print(f"Error adding attendance: {e}")
+        return False
+
+
+def insert_attendance_rows(conn, rows):
+    """Padanan database.insert_attendance_rows: seluruh batch dalam satu INSERT ... SELECT dari unnest().
+    Baris dengan siswa_id yang tidak ada disaring di query (di PostgreSQL pelanggaran foreign key
+    membatalkan seluruh transaksi); duplikat, termasuk di dalam batch yang sama, dilewati ON CONFLICT.
+    Baris dengan status tidak valid tidak ikut dikirim dan bernilai False."""
+    rows = list(rows)
+    valid = [(siswa_id, canonical_status(status), tanggal, recorded_by)
+             for siswa_id, status, tanggal, recorded_by in rows if is_valid_status(status)]
+    inserted = []
+    if valid:
+        columns = list(zip(*valid))
+        kategori = [normalize_status(status) for status in columns[1]]
+        inserted = conn.execute(
+            """
+            INSERT INTO attendance (siswa_id, status, kategori, tanggal, recorded_by)
+            SELECT v.siswa_id, v.status, v.kategori, v.tanggal, v.recorded_by
+            FROM unnest(%s::int[], %s::text[], %s::text[], %s::text[], %s::int[])
+                 WITH ORDINALITY AS v(siswa_id, status, kategori, tanggal, recorded_by, urutan)
+            WHERE EXISTS (SELECT 1 FROM siswa s WHERE s.id = v.siswa_id)
+            ORDER BY v.urutan
+            ON CONFLICT (siswa_id, tanggal) DO NOTHING
+            RETURNING siswa_id, tanggal
+            """,
+            (list(columns[0]), list(columns[1]), kategori, list(columns[2]), list(columns[3]))
+        ).fetchall()
+    conn.commit()
+    # Setiap (siswa_id, tanggal) paling banyak tersisip sekali; kemunculan pertamanya di batch yang dianggap berhasil.
+    remaining = Counter((r[0], r[1]) for r in inserted)
+    results = []
+    for siswa_id, status, tanggal, _ in rows:
+        key = (siswa_id, tanggal)
+        results.append(is_valid_status(status) and remaining[key] > 0)
+        if results[-1]:
+            remaining[key] -= 1
+    return results
+
+
+def record_attendance_batch(rows, recorded_by=None):
+    """Padanan database.record_attendance_batch. Baris yang berubah dikirim lewat COPY ke tabel sementara
+    lalu di-upsert dengan satu INSERT ... SELECT ... ON CONFLICT DO UPDATE."""
+    rows = [(int(siswa_id), canonical_status(status), tanggal) for siswa_id, status, tanggal in rows]
+    if not rows:
+        return {}
+    conn = get_db()
+    try:
+        unknown = [status for _, status, _ in rows if not is_valid_status(status)]
+        if unknown:
+            raise ValueError(f"Status absensi tidak dikenal: {', '.join(map(repr, unknown))}")
+        existing = {}
+        for r in conn.execute(
+            """
+            SELECT a.siswa_id, a.tanggal, a.status
+            FROM attendance a
+            JOIN unnest(%s::int[], %s::text[]) AS v(siswa_id, tanggal)
+              ON a.siswa_id = v.siswa_id AND a.tanggal = v.tanggal
+            """,
+            ([r[0] for r in rows], [r[2] for r in rows])
+        ):
+            existing[(r['siswa_id'], r['tanggal'])] = r['status']
+
+        outcomes = {}
+        changed = {}
+        for siswa_id, status, tanggal in rows:
+            key = (siswa_id, tanggal)
+            if key not in existing:
+                outcomes[siswa_id] = 'inserted'
+            elif existing[key] != status:
+                outcomes[siswa_id] = 'updated'
+            else:
+                outcomes[siswa_id] = 'unchanged'
+                continue
+            existing[key] = status
+            # Satu baris per kunci: ON CONFLICT DO UPDATE menolak mengubah baris yang sama dua kali dalam satu perintah.
+            changed[key] = (siswa_id, status, normalize_status(status), tanggal, recorded_by)
+
+        if changed:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS attendance_incoming (
+                        siswa_id INTEGER, status TEXT, kategori TEXT, tanggal TEXT, recorded_by INTEGER
+                    ) ON COMMIT DELETE ROWS
+                """)
+                with cur.copy("COPY attendance_incoming (siswa_id, status, kategori, tanggal, recorded_by) FROM STDIN") as copy:
+                    for row in changed.values():
+                        copy.write_row(row)
+                cur.execute("""
+                    INSERT INTO attendance (siswa_id, status, kategori, tanggal, recorded_by)
+                    SELECT siswa_id, status, kategori, tanggal, recorded_by FROM attendance_incoming
+                    ON CONFLICT (siswa_id, tanggal) DO UPDATE
+                        SET status = excluded.status, kategori = excluded.kategori, recorded_by = excluded.recorded_by
+                """)
+        conn.commit()
+        return outcomes
+    except Exception as e:
+        conn.rollback()
+        print(f"Error recording attendance batch: {e}")
+        return None
+
+
+def get_attendance_for_student(siswa_id, limit=100):
+    conn = get_db()
+    return conn.execute(
+        """
+        SELECT a.id, a.siswa_id, a.status, a.tanggal, a.recorded_by, g.nama AS recorded_by_name
+        FROM attendance a
+        LEFT JOIN guru g ON a.recorded_by = g.id
+        WHERE a.siswa_id = %s
+        ORDER BY a.tanggal DESC
+        LIMIT %s
+        """,
+        (siswa_id, limit)
+    ).fetchall()
+
+
+def get_attendance_page(siswa_id, after=None, before=None, limit=PAGE_SIZE):
+    conn = get_db()
+    return _keyset_page(conn, """
+        SELECT a.id, a.siswa_id, a.status, a.tanggal, a.recorded_by, g.nama AS recorded_by_name
+        FROM attendance a
+        LEFT JOIN guru g ON a.recorded_by = g.id
+        WHERE a.siswa_id = %s
+    """, [siswa_id], ('a.tanggal', 'a.id'), after, before, limit, descending=True, placeholder='%s')
+
+
+_REKAP_COLUMNS = ", ".join(KATEGORI_STATUS)
+_REKAP_SUMS = ", ".join(f"SUM({k})::int AS {k}" for k in KATEGORI_STATUS)
+_REKAP_NONZERO = "(" + " + ".join(KATEGORI_STATUS) + ") > 0"
+
+
+def get_rekap_bulanan(siswa_id):
+    conn = get_db()
+    return conn.execute(
+        f"""
+        SELECT periode, {_REKAP_COLUMNS}
+        FROM attendance_summary
+        WHERE siswa_id = %s AND {_REKAP_NONZERO}
+        ORDER BY periode DESC
+        """,
+        (siswa_id,)
+    ).fetchall()
+
+
+def get_rekap_semester(siswa_id):
+    conn = get_db()
+    return conn.execute(
+        f"""
+        SELECT substr(periode, 1, 4) || CASE WHEN substr(periode, 6, 2) <= '06' THEN ' Semester 1' ELSE ' Semester 2' END AS periode,
+               {_REKAP_SUMS}
+        FROM attendance_summary
+        WHERE siswa_id = %s AND {_REKAP_NONZERO}
+        GROUP BY 1
+        ORDER BY 1 DESC
+        """,
+        (siswa_id,)
+    ).fetchall()
+
+
+def get_rekap_kelas_harian(kelas_id, tanggal_mulai, tanggal_akhir):
+    conn = get_db()
+    return conn.execute(
+        f"""
+        SELECT tanggal, {_REKAP_COLUMNS}
+        FROM attendance_summary_kelas
+        WHERE kelas_id = %s AND tanggal BETWEEN %s AND %s AND {_REKAP_NONZERO}
+        ORDER BY tanggal
+        """,
+        (kelas_id, tanggal_mulai, tanggal_akhir)
+    ).fetchall()
+
+
+def rebuild_attendance_summary():
+    conn = get_db()
+    try:
+        # Kunci tabel agar tidak ada absensi baru yang terlewat di antara DELETE dan INSERT ... SELECT.
+        conn.execute("LOCK TABLE attendance IN SHARE MODE")
+        _rebuild_summary(conn)
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"Error rebuilding attendance summary: {e}")
+        return False
+
+
+def iter_attendance_export(tanggal_mulai, tanggal_akhir, kelas_id=None, batch_size=1000):
+    """Padanan database.iter_attendance_export dengan server-side cursor (DECLARE ... CURSOR):
+    server mengirim baris per batch sehingga memori aplikasi tetap datar."""
+    conn = get_db_connection()
+    try:
+        query = """
+            SELECT a.tanggal, s.nis, s.nama, k.nama_kelas, a.status, a.kategori, g.nama AS dicatat_oleh
+            FROM attendance a
+            JOIN siswa s ON s.id = a.siswa_id
+            LEFT JOIN kelas k ON k.id = s.kelas_id
+            LEFT JOIN guru g ON g.id = a.recorded_by
+            WHERE a.tanggal BETWEEN %s AND %s
+        """
+        params = [tanggal_mulai, tanggal_akhir]
+        if kelas_id:
+            query += " AND s.kelas_id = %s"
+            params.append(kelas_id)
+        query += " ORDER BY a.tanggal, a.siswa_id"
+        with conn.cursor(name='attendance_export') as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+    finally:
+        conn.close()
+
+
+def get_siswa_roster(kelas_id=None):
+    conn = get_db()
+    query = "SELECT s.id, s.nama, s.nis, k.nama_kelas FROM siswa s LEFT JOIN kelas k ON k.id = s.kelas_id"
+    params = []
+    if kelas_id:
+        query += " WHERE s.kelas_id = %s"
+        params.append(kelas_id)
+    return conn.execute(query + " ORDER BY k.nama_kelas, s.nama", params).fetchall()
+
+
+def get_attendance_packed(tanggal_mulai, tanggal_akhir, kelas_id=None):
+    # Padanan database.get_attendance_packed dengan string_agg(); tanggal TEXT diubah ke date untuk selisih hari.
+    conn = get_db()
+    siswa = "SELECT id FROM siswa" + (" WHERE kelas_id = %s" if kelas_id else "")
+    row = conn.execute(f"""
+        SELECT string_agg(((a.siswa_id::bigint << 32) + ((a.tanggal::date - %s::date)::bigint << 16)
+                           + {_KATEGORI_INDEX_SQL.format('a.kategori')})::text, ',')
+        FROM attendance a
+        WHERE a.siswa_id IN ({siswa}) AND a.tanggal BETWEEN %s AND %s
+    """, [tanggal_mulai] + ([kelas_id] if kelas_id else []) + [tanggal_mulai, tanggal_akhir]).fetchone()
+    return [row[0]] if row[0] else []
+
+
+def get_hari_libur(tanggal_mulai=None, tanggal_akhir=None):
+    conn = get_db()
+    return conn.execute(
+        "SELECT tanggal, keterangan FROM hari_libur WHERE tanggal BETWEEN %s AND %s ORDER BY tanggal",
+        (tanggal_mulai or '0000-00-00', tanggal_akhir or '9999-99-99')
+    ).fetchall()
+
+
+def set_hari_libur(tanggal, keterangan):
+    conn = get_db()
+    try:
+        conn.execute(
+            "INSERT INTO hari_libur (tanggal, keterangan) VALUES (%s, %s) ON CONFLICT (tanggal) DO UPDATE SET keterangan = excluded.keterangan",
+            (datetime.date.fromisoformat(tanggal).isoformat(), keterangan)
+        )
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"Error setting hari libur: {e}")
+        return False
+
+
+def delete_hari_libur(tanggal):
+    conn = get_db()
+    cur = conn.execute("DELETE FROM hari_libur WHERE tanggal = %s", (tanggal,))
+    conn.commit()
+    return cur.rowcount > 0
+
+
+def get_last_alpa_backfill():
+    conn = get_db()
+    return conn.execute("SELECT max(tanggal) FROM alpa_backfill_run").fetchone()[0]
+
+
+def backfill_alpa(tanggal_list):
+    # Padanan database.backfill_alpa. ON CONFLICT DO NOTHING menjaga transaksi tetap utuh bila siswa
+    # check-in tepat di antara NOT EXISTS dan INSERT.
+    tanggal_list = sorted({datetime.date.fromisoformat(t).isoformat() for t in tanggal_list})
+    if not tanggal_list:
+        return {}
+    conn = get_db()
+    try:
+        inserted = {}
+        for tanggal in tanggal_list:
+            cur = conn.execute("""
+                INSERT INTO attendance (siswa_id, status, kategori, tanggal, recorded_by)
+                SELECT s.id, %(status)s, %(kategori)s, %(tanggal)s, NULL
+                FROM siswa s
+                WHERE s.kelas_id IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM attendance a WHERE a.siswa_id = s.id AND a.tanggal = %(tanggal)s)
+                  AND NOT EXISTS (SELECT 1 FROM hari_libur WHERE tanggal = %(tanggal)s)
+                ON CONFLICT (siswa_id, tanggal) DO NOTHING
+            """, {'status': ALPA_STATUS, 'kategori': normalize_status(ALPA_STATUS), 'tanggal': tanggal})
+            inserted[tanggal] = cur.rowcount
+            conn.execute("""
+                INSERT INTO alpa_backfill_run (tanggal, rows) VALUES (%s, %s)
+                ON CONFLICT (tanggal) DO UPDATE
+                    SET rows = alpa_backfill_run.rows + excluded.rows, finished_at = now()
+            """, (tanggal, cur.rowcount))
+        conn.commit()
+        return inserted
+    except Exception as e:
+        conn.rollback()
+        print(f"Error backfilling alpa: {e}")
+        return None
+
+
+def delete_siswa_by_id(siswa_id):
+    conn = get_db()
+    try:
+        conn.execute("DELETE FROM attendance WHERE siswa_id = %s", (siswa_id,))
+        conn.execute("DELETE FROM siswa WHERE id = %s", (siswa_id,))
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"Error menghapus siswa: {e}")
+        return False
@@ -0,0 +1,26 @@
+import csv
+import io
+
+from database import iter_attendance_export
+
+CSV_HEADER = ['tanggal', 'nis', 'nama', 'kelas', 'status', 'kategori', 'dicatat_oleh']
+
+
+def iter_attendance_csv(tanggal_mulai, tanggal_akhir, kelas_id=None, batch_size=1000):
+    """Menghasilkan potongan teks CSV absensi secara bertahap (satu potongan per `batch_size` baris).
+    Dipakai oleh endpoint ekspor (Response streaming) maupun scripts/export_absensi.py."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    count = 0
+    for row in iter_attendance_export(tanggal_mulai, tanggal_akhir, kelas_id, batch_size=batch_size):
+        writer.writerow([
+            row['tanggal'], row['nis'], row['nama'], row['nama_kelas'] or '',
+            row['status'], row['kategori'], row['dicatat_oleh'] or '',
+        ])
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
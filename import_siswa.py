@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from database import add_siswa_batch, get_all_kelas, get_existing_nis
+from login_guard import hash_password
+
+# Di bawah jumlah ini hashing dilakukan langsung; biaya menyalakan proses lebih mahal dari hashing-nya.
+PARALLEL_MIN_ROWS = 32
+
+
+def parse_roster(data, filename=''):
+    """Membaca daftar siswa dari CSV (header: nama,nis,password[,kelas]) atau JSON (list of objects).
+    Mengembalikan list dict dengan kunci `baris` (nomor baris sumber) untuk pelaporan error.
+    ValueError bila isi file tidak berbentuk daftar siswa."""
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if filename.lower().endswith('.json') or data.lstrip().startswith('['):
+        items = json.loads(data)
+        if not isinstance(items, list):
+            raise ValueError('JSON harus berupa list objek siswa')
+        for i, item in enumerate(items, start=1):
+            if not isinstance(item, dict):
+                raise ValueError(f'item JSON ke-{i} bukan objek siswa')
+        return [dict(item, baris=i) for i, item in enumerate(items, start=1)]
+    reader = csv.DictReader(io.StringIO(data))
+    return [dict(row, baris=i) for i, row in enumerate(reader, start=2)]
+
+
+def hash_passwords(passwords, max_workers=None):
+    # Hash (PASSWORD_METHOD) disebar ke beberapa proses sehingga throughput naik sesuai jumlah core.
+    passwords = list(passwords)
+    if len(passwords) < PARALLEL_MIN_ROWS:
+        return [hash_password(p) for p in passwords]
+    max_workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(passwords) // (max_workers * 4))
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(hash_password, passwords, chunksize=chunksize))
+    except (OSError, NotImplementedError) as e:
+        # Lingkungan tanpa dukungan multiprocessing (mis. serverless): hash secara berurutan.
+        print(f"ProcessPoolExecutor tidak tersedia ({e}), hashing berurutan")
+        return [hash_password(p) for p in passwords]
+
+
+def import_roster(rows, kelas_id=None, max_workers=None):
+    """Validasi dan simpan daftar siswa dalam satu transaksi.
+    `kelas_id` dipakai untuk semua baris; jika None, kolom `kelas` (nama kelas) tiap baris dipakai.
+    Mengembalikan (jumlah_tersimpan, errors) dengan errors berupa list (baris, nis, pesan)."""
+    errors = []
+    valid = []
+    seen = set()
+    kelas_by_nama = None if kelas_id else {k['nama_kelas']: k['id'] for k in get_all_kelas()}
+
+    for row in rows:
+        # Nilai JSON bisa berupa angka (mis. NIS atau nama kelas), jadi semua kolom dijadikan teks dulu.
+        nama = str(row.get('nama') or '').strip()
+        nis = str(row.get('nis') or '').strip()
+        password = str(row.get('password') or '')
+        if not nama or not nis or not password:
+            errors.append((row['baris'], nis, 'nama, nis dan password wajib diisi'))
+            continue
+        if nis in seen:
+            errors.append((row['baris'], nis, 'NIS ganda di dalam file'))
+            continue
+        seen.add(nis)
+        row_kelas_id = kelas_id
+        kelas = str(row.get('kelas') or '').strip()
+        if row_kelas_id is None and kelas:
+            row_kelas_id = kelas_by_nama.get(kelas)
+            if row_kelas_id is None:
+                errors.append((row['baris'], nis, f"kelas '{kelas}' tidak ditemukan"))
+                continue
+        valid.append((row['baris'], nama, nis, row_kelas_id, password))
+
+    existing = get_existing_nis(v[2] for v in valid)
+    if existing:
+        errors.extend((baris, nis, 'NIS sudah terdaftar') for baris, _, nis, _, _ in valid if nis in existing)
+        valid = [v for v in valid if v[2] not in existing]
+
+    errors.sort(key=lambda e: e[0])
+    if not valid:
+        return 0, errors
+
+    hashes = hash_passwords([v[4] for v in valid], max_workers=max_workers)
+    batch = [(nama, nis, k, h) for (_, nama, nis, k, _), h in zip(valid, hashes)]
+    if not add_siswa_batch(batch):
+        errors.append((None, None, 'Gagal menyimpan ke database, tidak ada siswa yang diimpor'))
+        return 0, errors
+    return len(batch), errors
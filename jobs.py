@@ -0,0 +1,111 @@
+import datetime
+import os
+import threading
+
+from database import backfill_alpa, get_last_alpa_backfill
+from metrics import registry as metrics
+
+# Penjadwal dalam proses (satu thread latar per worker). Di platform tanpa thread latar yang awet (serverless),
+# biarkan 0 dan jalankan scripts/backfill_alpa.py dari cron setelah ALPA_CUTOFF.
+JOB_SCHEDULER = os.environ.get('JOB_SCHEDULER', '0') == '1'
+# Interval (detik) penjadwal memeriksa tugas yang jatuh tempo.
+JOB_CHECK_INTERVAL = float(os.environ.get('JOB_CHECK_INTERVAL', '60'))
+# Batas waktu absensi (jam lokal server, HH:MM); setelahnya siswa tanpa catatan hari itu dicatat alpa.
+ALPA_CUTOFF = datetime.time.fromisoformat(os.environ.get('ALPA_CUTOFF', '15:00'))
+# Hari sekolah dalam pekan (ISO: 1 = Senin ... 7 = Minggu); hari lain tidak pernah diisi alpa.
+HARI_SEKOLAH = frozenset(int(d) for d in os.environ.get('HARI_SEKOLAH', '1,2,3,4,5').split(','))
+# Hari ke belakang yang masih disusul bila server mati saat batas waktu lewat.
+ALPA_BACKFILL_LOOKBACK = int(os.environ.get('ALPA_BACKFILL_LOOKBACK', '7'))
+
+
+def is_past_cutoff(tanggal, now=None):
+    now = now or datetime.datetime.now()
+    return tanggal < now.date() or (tanggal == now.date() and now.time() >= ALPA_CUTOFF)
+
+
+def due_alpa_days(now=None):
+    """Hari sekolah yang sudah lewat ALPA_CUTOFF tetapi belum diproses backfill_alpa() (ISO, urut), paling jauh
+    ALPA_BACKFILL_LOOKBACK hari ke belakang. Belum pernah dijalankan: hanya hari terakhir yang lewat batas."""
+    now = now or datetime.datetime.now()
+    last_due = now.date() if is_past_cutoff(now.date(), now) else now.date() - datetime.timedelta(days=1)
+    last_run = get_last_alpa_backfill()
+    if last_run is None:
+        day = last_due
+    else:
+        day = max(datetime.date.fromisoformat(last_run) + datetime.timedelta(days=1),
+                  now.date() - datetime.timedelta(days=ALPA_BACKFILL_LOOKBACK))
+    days = []
+    while day <= last_due:
+        if day.isoweekday() in HARI_SEKOLAH:
+            days.append(day.isoformat())
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def run_alpa_backfill(tanggal_list=None, now=None):
+    """Backfill alpa untuk `tanggal_list` (default: due_alpa_days()). Mengembalikan {tanggal: baris baru},
+    atau None jika gagal."""
+    tanggal_list = due_alpa_days(now) if tanggal_list is None else tanggal_list
+    result = backfill_alpa(tanggal_list)
+    if result:
+        metrics.inc('alpa_backfill_rows_total', sum(result.values()))
+        print(f"Backfill alpa: {', '.join(f'{t} {n} siswa' for t, n in result.items())}")
+    return result
+
+
+class JobScheduler:
+    """Menjalankan tugas terdaftar setiap `interval` detik di thread latar proses ini. Setiap worker gunicorn
+    punya penjadwal sendiri, jadi tugas harus idempoten dan aman berjalan bersamaan (backfill_alpa() memakai
+    satu transaksi tulis dan NOT EXISTS). Tugas mengembalikan None bila gagal."""
+
+    def __init__(self, interval=JOB_CHECK_INTERVAL):
+        self.interval = interval
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def register(self, name, fn):
+        self.jobs[name] = fn
+
+    def ensure_started(self):
+        # Thread dibuat ulang setelah fork (worker gunicorn) karena thread tidak ikut tersalin.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, name='job-scheduler', daemon=True)
+                self._thread.start()
+
+    def run_pending(self):
+        for name, fn in list(self.jobs.items()):
+            try:
+                status = 'error' if fn() is None else 'ok'
+            except Exception as e:
+                print(f"Error running job {name}: {e}")
+                status = 'error'
+            metrics.inc('job_runs_total', job=name, status=status)
+
+    def _run(self):
+        while True:
+            self.run_pending()
+            if self._stop.wait(self.interval):
+                return
+
+    def close(self, timeout=5):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            self._stop.set()
+            self._thread.join(timeout)
+
+
+scheduler = JobScheduler()
+scheduler.register('alpa_backfill', run_alpa_backfill)
+
+
+def init_app(app):
+    # Penjadwal dimulai oleh request pertama di setiap worker (setelah fork), bukan saat import.
+    if JOB_SCHEDULER:
+        app.before_request(scheduler.ensure_started)
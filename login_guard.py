@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from metrics import registry as metrics
+
+# Metode hash untuk password baru dan target upgrade saat login (format werkzeug, mis. 'scrypt' atau
+# 'pbkdf2:sha256:600000'). Hash lama dengan parameter lain diganti diam-diam setelah login berhasil.
+PASSWORD_METHOD = os.environ.get('PASSWORD_METHOD', 'scrypt')
+# Thread hashing per proses. hashlib.scrypt/pbkdf2_hmac melepas GIL, jadi default satu thread per core;
+# turunkan bila beberapa worker gunicorn berbagi core yang sama.
+HASH_WORKERS = int(os.environ.get('HASH_WORKERS') or os.cpu_count() or 1)
+# Verifikasi yang boleh antri (termasuk yang sedang berjalan) sebelum login ditolak dengan 429. Default 4 per
+# thread hashing menampung gelombang login awal pelajaran (satu kelas bersamaan) tanpa penolakan. Setiap login
+# yang antri menahan satu thread worker gunicorn, jadi nilai ini harus di bawah --threads agar selalu ada
+# thread bebas untuk route lain.
+HASH_QUEUE_MAX = int(os.environ.get('HASH_QUEUE_MAX') or 4 * HASH_WORKERS)
+# Lama maksimum request menunggu hasil verifikasi (detik).
+HASH_WAIT_TIMEOUT = float(os.environ.get('HASH_WAIT_TIMEOUT', '5'))
+# Token bucket per IP (longgar: satu sekolah sering berbagi satu IP NAT) dan per akun (NIS/email).
+LOGIN_IP_RATE = float(os.environ.get('LOGIN_IP_RATE', '20'))
+LOGIN_IP_BURST = float(os.environ.get('LOGIN_IP_BURST', '200'))
+LOGIN_ACCOUNT_RATE = float(os.environ.get('LOGIN_ACCOUNT_RATE', '0.2'))
+LOGIN_ACCOUNT_BURST = float(os.environ.get('LOGIN_ACCOUNT_BURST', '5'))
+LIMITER_MAX_KEYS = 10000
+
+# Parameter default werkzeug 3.0 bila metode ditulis tanpa parameter.
+_METHOD_DEFAULTS = {'scrypt': 'scrypt:32768:8:1', 'pbkdf2': 'pbkdf2:sha256:600000'}
+
+
+class LoginRejected(Exception):
+    """Login ditolak sebelum password diperiksa; `retry_after` dalam detik untuk header Retry-After."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _canonical_method(method):
+    # 'scrypt' -> 'scrypt:32768:8:1', 'pbkdf2:sha256' -> 'pbkdf2:sha256:600000'.
+    parts = method.split(':')
+    if parts[0] == 'pbkdf2' and len(parts) == 2:
+        return f"{method}:{_METHOD_DEFAULTS['pbkdf2'].rsplit(':', 1)[1]}"
+    return _METHOD_DEFAULTS.get(method, method)
+
+
+_TARGET_METHOD = _canonical_method(PASSWORD_METHOD)
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=PASSWORD_METHOD)
+
+
+def needs_rehash(stored_hash):
+    return _canonical_method(stored_hash.split('$', 1)[0]) != _TARGET_METHOD
+
+
+class TokenBucketLimiter:
+    """Token bucket per kunci dalam proses: `rate` token per detik hingga `burst`.
+    Kunci paling lama tidak dipakai dibuang setelah `max_keys` agar memori tetap terbatas."""
+
+    def __init__(self, rate, burst, max_keys=LIMITER_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Mengambil satu token; mengembalikan 0 jika berhasil, atau detik tunggu sampai token berikutnya."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class HashExecutor:
+    """Pool thread hashing berbatas. `submit()` menolak langsung (LoginRejected) bila antrian penuh,
+    sehingga request login gagal cepat alih-alih menahan worker gunicorn di belakang antrian panjang."""
+
+    def __init__(self, workers=HASH_WORKERS, queue_max=HASH_QUEUE_MAX):
+        self.workers = workers
+        self.queue_max = queue_max
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.pending = 0
+
+    def _get_executor(self):
+        # Dibuat ulang setelah fork (worker gunicorn) karena thread tidak ikut tersalin.
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+            self._pid = os.getpid()
+            self.pending = 0
+        return self._executor
+
+    def submit(self, fn, *args):
+        with self._lock:
+            executor = self._get_executor()
+            if self.pending >= self.queue_max:
+                raise LoginRejected('overloaded', 1)
+            self.pending += 1
+        metrics.inc('password_hash_queue_depth')
+        future = executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self.pending -= 1
+        metrics.inc('password_hash_queue_depth', -1)
+
+
+hash_executor = HashExecutor()
+ip_limiter = TokenBucketLimiter(LOGIN_IP_RATE, LOGIN_IP_BURST)
+account_limiter = TokenBucketLimiter(LOGIN_ACCOUNT_RATE, LOGIN_ACCOUNT_BURST)
+
+
+def admit_login(endpoint, ip, account):
+    """Kontrol admisi sebelum query dan hashing apa pun; LoginRejected jika IP atau akun melebihi kuota."""
+    for reason, limiter, key in (('rate_ip', ip_limiter, ip), ('rate_account', account_limiter, f'{endpoint}:{account}')):
+        wait = limiter.acquire(key)
+        if wait:
+            metrics.inc('login_rejected_total', endpoint=endpoint, reason=reason)
+            raise LoginRejected(reason, max(1, int(wait + 0.999)))
+
+
+def _check(stored_hash, password, endpoint):
+    with metrics.timer('password_hash_seconds', endpoint=endpoint):
+        return check_password_hash(stored_hash, password)
+
+
+def _upgrade(upgrade, stored_hash, password, endpoint):
+    # Dijalankan di thread hashing setelah respons login dikirim; hanya menimpa jika hash belum berubah.
+    from database import upgrade_password_hash
+    table, user_id = upgrade
+    with metrics.timer('password_hash_seconds', endpoint=f'{endpoint}_rehash'):
+        new_hash = hash_password(password)
+    try:
+        upgrade_password_hash(table, user_id, stored_hash, new_hash)
+    except Exception as e:
+        print(f"Error upgrading password hash: {e}")
+
+
+def verify_password(stored_hash, password, endpoint, upgrade=None):
+    """Memeriksa password di thread hashing dan menunggu hasilnya. `upgrade` = (tabel, id) menjadwalkan
+    hash ulang dengan PASSWORD_METHOD bila hash lama memakai parameter lain (tidak ditunggu, dilewati bila antrian penuh).
+    LoginRejected bila antrian penuh atau hasil tidak datang dalam HASH_WAIT_TIMEOUT."""
+    try:
+        future = hash_executor.submit(_check, stored_hash, password, endpoint)
+    except LoginRejected:
+        metrics.inc('login_rejected_total', endpoint=endpoint, reason='overloaded')
+        raise
+    try:
+        valid = future.result(timeout=HASH_WAIT_TIMEOUT)
+    except FutureTimeout:
+        metrics.inc('login_rejected_total', endpoint=endpoint, reason='timeout')
+        raise LoginRejected('timeout', 1)
+    if valid and upgrade is not None and needs_rehash(stored_hash):
+        try:
+            hash_executor.submit(_upgrade, upgrade, stored_hash, password, endpoint)
+        except LoginRejected:
+            pass
+    return valid
@@ -0,0 +1,257 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+
+# Store bersama untuk semua worker gunicorn: setiap proses menulis nilai kumulatifnya sendiri (per pid),
+# /metrics menjumlahkannya. Sengaja file terpisah dari database utama agar tidak berebut kunci tulis.
+METRICS_PATH = os.environ.get('METRICS_PATH') or os.path.join(tempfile.gettempdir(), 'metrics.db')
+# Jeda maksimum (detik) antara nilai di memori sebuah worker dan yang terlihat oleh /metrics.
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '1.0'))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.4, 0.8, 1.6)
+
+METRICS = {
+    'http_requests_total': ('counter', 'Jumlah request per endpoint, method dan kode status.'),
+    'http_request_duration_seconds': ('histogram', 'Latensi request per endpoint.'),
+    'http_requests_in_flight': ('gauge', 'Request yang sedang diproses.'),
+    'db_connections_opened_total': ('counter', 'Koneksi database baru yang dibuka.'),
+    'db_busy_retries_total': ('counter', 'Percobaan ulang karena database busy/locked.'),
+    'db_busy_errors_total': ('counter', 'Request yang gagal karena database busy/locked.'),
+    'password_hash_seconds': ('histogram', 'Waktu hash/verifikasi password per endpoint.'),
+    'password_hash_queue_depth': ('gauge', 'Verifikasi/hash password yang antri atau sedang berjalan.'),
+    'login_rejected_total': ('counter', 'Login yang ditolak (429) per endpoint dan alasan.'),
+    'job_runs_total': ('counter', 'Putaran tugas terjadwal (jobs.py) per tugas dan hasil.'),
+    'alpa_backfill_rows_total': ('counter', 'Absensi alpa yang dicatat otomatis setelah batas waktu.'),
+    'cache_requests_total': ('counter', 'Pembacaan cache proses (cache.py) per cache dan hasil (hit/miss).'),
+    'cache_entries': ('gauge', 'Entri yang tersimpan di cache LRU proses (cache.py).'),
+}
+_BUCKETS = {
+    'http_request_duration_seconds': LATENCY_BUCKETS,
+    'password_hash_seconds': HASH_BUCKETS,
+}
+
+
+def is_busy_error(e):
+    # SQLite: database is locked/busy; PostgreSQL (psycopg): lock_not_available, serialization_failure, deadlock.
+    if getattr(e, 'sqlstate', None) in ('55P03', '40001', '40P01'):
+        return True
+    return isinstance(e, sqlite3.OperationalError) and ('locked' in str(e) or 'busy' in str(e))
+
+
+class Registry:
+    """Counter, gauge dan histogram dalam memori proses, di-flush berkala ke store SQLite bersama."""
+
+    def __init__(self, path=METRICS_PATH, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Koneksi store dipakai bersama oleh thread dalam satu proses; penulisan diserialkan terpisah dari _lock
+        # agar inc()/observe() tidak menunggu I/O.
+        self._store_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Dipanggil juga setelah fork: worker tidak boleh ikut melaporkan nilai milik master.
+        self._pid = os.getpid()
+        self._values = {}
+        self._histograms = {}
+        self._flushed_at = 0.0
+        self._conn = None
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_pid()
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        # Gauge yang nilai utuhnya diketahui (mis. jumlah entri cache), alih-alih dinaikkan/diturunkan.
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_pid()
+            self._values[key] = value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        buckets = _BUCKETS[name]
+        with self._lock:
+            self._check_pid()
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = [0] * len(buckets) + [0.0, 0]
+            for i, bound in enumerate(buckets):
+                if seconds <= bound:
+                    h[i] += 1
+            h[-2] += seconds
+            h[-1] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        # Nilai kumulatif proses ini sebagai baris (nama sampel, label JSON, nilai); histogram diurai ke _bucket/_sum/_count.
+        for (name, labels), value in self._values.items():
+            yield name, json.dumps(labels), value
+        for (name, labels), h in self._histograms.items():
+            for bound, count in zip(_BUCKETS[name], h):
+                yield f'{name}_bucket', json.dumps(labels + (('le', repr(bound)),)), count
+            yield f'{name}_bucket', json.dumps(labels + (('le', '+Inf'),)), h[-1]
+            yield f'{name}_sum', json.dumps(labels), h[-2]
+            yield f'{name}_count', json.dumps(labels), h[-1]
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = OFF")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS metric_sample (
+                    pid INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    labels TEXT NOT NULL,
+                    value REAL NOT NULL,
+                    PRIMARY KEY (pid, name, labels)
+                ) WITHOUT ROWID
+            """)
+        return self._conn
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            self._check_pid()
+            if not force and now - self._flushed_at < self.flush_interval:
+                return
+            self._flushed_at = now
+            rows = [(self._pid, name, labels, value) for name, labels, value in self._samples()]
+            conn = self._connect()
+        try:
+            with self._store_lock, conn:
+                conn.executemany(
+                    """
+                    INSERT INTO metric_sample (pid, name, labels, value) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (pid, name, labels) DO UPDATE SET value = excluded.value
+                    """,
+                    rows
+                )
+        except sqlite3.Error as e:
+            # Metrik tidak boleh menggagalkan request; dicoba lagi pada flush berikutnya.
+            print(f"Error flushing metrics: {e}")
+
+    def _compact(self, conn):
+        # Nilai worker yang sudah mati dipindahkan ke pid 0 (counter/histogram) atau dibuang (gauge).
+        dead = [pid for (pid,) in conn.execute("SELECT DISTINCT pid FROM metric_sample WHERE pid != 0")
+                if not _alive(pid)]
+        gauges = [name for name, (kind, _) in METRICS.items() if kind == 'gauge']
+        with conn:
+            for pid in dead:
+                conn.execute(
+                    f"""
+                    INSERT INTO metric_sample (pid, name, labels, value)
+                    SELECT 0, name, labels, value FROM metric_sample
+                    WHERE pid = ? AND name NOT IN ({','.join('?' * len(gauges))})
+                    ON CONFLICT (pid, name, labels) DO UPDATE SET value = value + excluded.value
+                    """,
+                    (pid, *gauges)
+                )
+                conn.execute("DELETE FROM metric_sample WHERE pid = ?", (pid,))
+
+    def render(self):
+        """Semua metrik dari semua worker dalam format teks Prometheus (exposition format 0.0.4)."""
+        self.flush(force=True)
+        with self._lock:
+            conn = self._connect()
+        with self._store_lock:
+            self._compact(conn)
+            rows = conn.execute(
+                "SELECT name, labels, SUM(value) FROM metric_sample GROUP BY name, labels ORDER BY name, labels"
+            ).fetchall()
+
+        by_family = {}
+        for name, labels, value in rows:
+            family = next((f for f in METRICS if name == f or name.startswith(f + '_')), name)
+            by_family.setdefault(family, []).append((name, json.loads(labels), value))
+
+        lines = []
+        for family, (kind, help_text) in METRICS.items():
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {kind}')
+            samples = by_family.get(family, [])
+            if family in _BUCKETS:
+                # Per himpunan label: bucket menurut batas numerik (bukan urutan string), lalu _sum dan _count.
+                suffix = {f'{family}_bucket': 0, f'{family}_sum': 1, f'{family}_count': 2}
+                samples.sort(key=lambda s: ([kv for kv in s[1] if kv[0] != 'le'], suffix[s[0]], _le(s[1])))
+            for name, labels, value in samples:
+                label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {_format(value)}" if label_text else f'{name} {_format(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _le(labels):
+    for k, v in labels:
+        if k == 'le':
+            return float('inf') if v == '+Inf' else float(v)
+    return 0.0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+registry = Registry()
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    registry.inc('http_requests_in_flight')
+
+
+def _after_request(response):
+    start = g.pop('metrics_start', None)
+    if start is not None:
+        endpoint = request.endpoint or 'none'
+        registry.observe('http_request_duration_seconds', time.perf_counter() - start, endpoint=endpoint)
+        registry.inc('http_requests_total', endpoint=endpoint, method=request.method, status=str(response.status_code))
+    return response
+
+
+def _teardown_request(e=None):
+    registry.inc('http_requests_in_flight', -1)
+    if e is not None and is_busy_error(e):
+        registry.inc('db_busy_errors_total', endpoint=request.endpoint or 'none')
+    registry.flush()
+
+
+def init_app(app):
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,46 @@
+# Memindahkan absensi tahun ajaran yang sudah selesai ke file arsip per tahun (ARCHIVE_DIR, read-only).
+# Riwayat siswa, laporan dan ekspor tetap menampilkan data arsip; rekap diambil dari tabel ringkasan.
+# Jalankan dari root proyek:
+#   python scripts/arsip_tahun_ajaran.py --list
+#   python scripts/arsip_tahun_ajaran.py 2022 2023 --vacuum    (Juli 2022 - Juni 2024, lalu VACUUM)
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import ARCHIVE_DIR, archive_academic_year, from_day, get_archives, get_db, init_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Arsip absensi per tahun ajaran.')
+    parser.add_argument('tahun', type=int, nargs='*', help='tahun awal tahun ajaran, mis. 2023 untuk 2023/2024')
+    parser.add_argument('--list', action='store_true', help='tampilkan arsip yang sudah ada')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM database utama setelah pengarsipan')
+    args = parser.parse_args()
+
+    if database.BACKEND != 'sqlite':
+        print('Arsip per tahun ajaran hanya tersedia untuk backend SQLite.')
+        sys.exit(1)
+    init_db()
+    failed = False
+    for tahun in sorted(args.tahun):
+        rows = archive_academic_year(tahun)
+        if rows is None:
+            failed = True
+            break
+        print(f'Tahun ajaran {tahun}/{tahun + 1}: {rows} baris dipindahkan ke {ARCHIVE_DIR}')
+    if args.vacuum and args.tahun and not failed:
+        # Halaman bekas data arsip dipakai ulang tanpa VACUUM; VACUUM mengecilkan file (dan backup) sekarang juga.
+        get_db().execute('VACUUM')
+        print('VACUUM selesai')
+    if args.list or not args.tahun:
+        for r in get_archives():
+            print(f"{r['tahun']}/{r['tahun'] + 1}  {from_day(r['day_from'])} s.d. {from_day(r['day_to'])}  "
+                  f"{r['rows']:>9} baris  {r['file']}  ({r['archived_at']})")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+# Mengukur format penyimpanan absensi sebelum dan sesudah migrasi 008 (nomor hari, kode status, WITHOUT ROWID):
+# database sementara dibuat pada skema versi 7, diisi data sintetis, diukur, dimigrasi, lalu diukur lagi.
+# Contoh: python scripts/attendance_storage_report.py --siswa 1000 --tahun 3
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='storage-'), 'storage.db')
+os.environ.pop('DATABASE_URL', None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import MIGRATIONS, get_attendance_for_student, get_db, get_siswa_by_kelas_with_status, normalize_status
+
+STATUS_WEIGHTS = (('Hadir', 90), ('Sakit', 4), ('Izin', 3), ('Alpa', 3))
+SISWA_PER_KELAS = 30
+COLD_CACHE_PAGES = 16
+
+# Query riwayat siswa (dashboard) dan status kelas per hari seperti pada kode sebelum migrasi 008.
+OLD_HISTORY = """
+    SELECT a.id, a.siswa_id, a.status, a.tanggal, a.recorded_by, g.nama AS recorded_by_name
+    FROM attendance a
+    LEFT JOIN guru g ON a.recorded_by = g.id
+    WHERE a.siswa_id = ?
+    ORDER BY a.tanggal DESC
+    LIMIT ?
+"""
+OLD_KELAS_STATUS = """
+    SELECT s.id, s.nama, s.nis, a.status
+    FROM siswa s
+    LEFT JOIN attendance a ON a.siswa_id = s.id AND a.tanggal = ?
+    WHERE s.kelas_id = ?
+    ORDER BY s.nama
+"""
+
+
+def migrate_to(conn, target):
+    # Seperti database.migrate(), tetapi berhenti di versi `target`.
+    version = database.get_schema_version(conn)
+    for step in MIGRATIONS[version:target]:
+        conn.execute("BEGIN IMMEDIATE")
+        step(conn.cursor())
+        version += 1
+        conn.execute(f"PRAGMA user_version = {version}")
+        conn.commit()
+
+
+def seed_old_schema(conn, jumlah_siswa, tahun, rng):
+    conn.execute("INSERT INTO guru (email, nama, mata_pelajaran, password) VALUES ('guru@storage.test', 'Guru', 'IPA', 'x')")
+    kelas = (jumlah_siswa + SISWA_PER_KELAS - 1) // SISWA_PER_KELAS
+    conn.executemany("INSERT INTO kelas (nama_kelas) VALUES (?)", [(f'Kelas {i:03d}',) for i in range(kelas)])
+    conn.executemany(
+        "INSERT INTO siswa (nama, nis, password, kelas_id) VALUES (?, ?, 'x', ?)",
+        [(f'Siswa {i:06d}', f'{100000 + i}', i // SISWA_PER_KELAS + 1) for i in range(jumlah_siswa)]
+    )
+    days = []
+    day = datetime.date.today() - datetime.timedelta(days=int(365 * tahun))
+    while day < datetime.date.today():
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day += datetime.timedelta(days=1)
+    statuses = [s for s, _ in STATUS_WEIGHTS]
+    weights = [w for _, w in STATUS_WEIGHTS]
+
+    def rows():
+        # Urut per hari, seperti absensi yang tercatat di produksi.
+        for tanggal in days:
+            for siswa_id, status in enumerate(rng.choices(statuses, weights, k=jumlah_siswa), start=1):
+                yield siswa_id, status, normalize_status(status), tanggal, 1
+
+    conn.executemany(
+        "INSERT INTO attendance (siswa_id, status, kategori, tanggal, recorded_by) VALUES (?, ?, ?, ?, ?)", rows()
+    )
+    conn.commit()
+    return days
+
+
+def measure_size(conn):
+    # Ukuran setelah VACUUM agar kedua format dibandingkan tanpa halaman kosong sisa pengisian.
+    conn.execute("VACUUM")
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    total = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+    objects = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'attendance' AND type IN ('table', 'index')")]
+    placeholders = ", ".join("?" * len(objects))
+    sizes = {r[0]: r[1] for r in conn.execute(
+        f"SELECT name, SUM(pgsize) FROM dbstat WHERE name IN ({placeholders}) GROUP BY name", objects
+    )}
+    return total, sizes
+
+
+def timed(conn, fn, args_list, cache_pages=None):
+    # cache_pages: cache halaman SQLite diperkecil sehingga hampir setiap halaman dibaca ulang dari file,
+    # seperti database yang jauh lebih besar dari cache; di sini lokalitas data paling terasa.
+    if cache_pages:
+        conn.execute(f"PRAGMA cache_size = {cache_pages}")
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+    conn.execute(f"PRAGMA cache_size = -{database.CACHE_SIZE_KIB}")
+    return statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))]
+
+
+def report(label, total, sizes, rows, history, history_cold, kelas_status):
+    print(f'\n{label}')
+    print(f'  ukuran file              {total / 2**20:9.2f} MiB')
+    for name, size in sorted(sizes.items()):
+        print(f'  {name:<40} {size / 2**20:9.2f} MiB')
+    attendance_bytes = sum(sizes.values())
+    print(f'  attendance + indeks      {attendance_bytes / 2**20:9.2f} MiB  ({attendance_bytes / rows:.1f} byte/baris)')
+    print(f'  riwayat siswa (50 baris) p50 {history[0]:8.1f} us   p95 {history[1]:8.1f} us')
+    print(f'    cache {COLD_CACHE_PAGES} halaman        p50 {history_cold[0]:8.1f} us   p95 {history_cold[1]:8.1f} us')
+    print(f'  status kelas per hari    p50 {kelas_status[0]:8.1f} us   p95 {kelas_status[1]:8.1f} us')
+    return attendance_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ukuran dan latensi baca absensi sebelum/sesudah format ringkas.')
+    parser.add_argument('--siswa', type=int, default=1000)
+    parser.add_argument('--tahun', type=float, default=3.0)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    conn = get_db()
+    migrate_to(conn, 7)
+    days = seed_old_schema(conn, args.siswa, args.tahun, rng)
+    rows = len(days) * args.siswa
+    print(f'{rows} baris absensi ({args.siswa} siswa x {len(days)} hari sekolah)')
+
+    students = [(rng.randint(1, args.siswa), 50) for _ in range(args.reads)]
+    kelas = [(rng.choice(days), rng.randint(1, args.siswa // SISWA_PER_KELAS or 1)) for _ in range(args.reads)]
+
+    old_history = lambda *p: conn.execute(OLD_HISTORY, p).fetchall()
+    total, sizes = measure_size(conn)
+    before = report(
+        'Sebelum (skema versi 7)', total, sizes, rows,
+        timed(conn, old_history, students),
+        timed(conn, old_history, students, COLD_CACHE_PAGES),
+        timed(conn, lambda *p: conn.execute(OLD_KELAS_STATUS, p).fetchall(), kelas),
+    )
+
+    start = time.perf_counter()
+    migrate_to(conn, len(MIGRATIONS))
+    print(f'\nMigrasi 008: {time.perf_counter() - start:.2f} s')
+
+    total, sizes = measure_size(conn)
+    after = report(
+        'Sesudah (skema versi 8)', total, sizes, rows,
+        timed(conn, get_attendance_for_student, students),
+        timed(conn, get_attendance_for_student, students, COLD_CACHE_PAGES),
+        timed(conn, lambda tanggal, kelas_id: get_siswa_by_kelas_with_status(kelas_id, tanggal), kelas),
+    )
+    print(f'\nattendance + indeks: {after / before:.0%} dari ukuran semula')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# Mencatat alpa untuk siswa terdaftar yang belum punya absensi setelah batas waktu (ALPA_CUTOFF), untuk cron bila
+# penjadwal dalam proses (JOB_SCHEDULER=1) tidak dipakai. Hari libur dilewati; aman dijalankan berulang.
+# Jalankan dari root proyek:
+#   python scripts/backfill_alpa.py                          (hari yang jatuh tempo, seperti penjadwal)
+#   python scripts/backfill_alpa.py 2026-10-12 2026-10-13    (tanggal tertentu)
+#   python scripts/backfill_alpa.py --libur 2026-08-17 "HUT RI"
+#   python scripts/backfill_alpa.py --hapus-libur 2026-08-17
+#   python scripts/backfill_alpa.py --list-libur
+import argparse
+import datetime
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import delete_hari_libur, get_hari_libur, init_db, set_hari_libur
+from jobs import ALPA_CUTOFF, HARI_SEKOLAH, is_past_cutoff, run_alpa_backfill
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill alpa harian dan kalender libur sekolah.')
+    parser.add_argument('tanggal', nargs='*', help='tanggal ISO; default: hari yang jatuh tempo')
+    parser.add_argument('--libur', nargs=2, metavar=('TANGGAL', 'KETERANGAN'), help='tandai hari libur')
+    parser.add_argument('--hapus-libur', metavar='TANGGAL', help='hapus hari libur')
+    parser.add_argument('--list-libur', action='store_true', help='tampilkan kalender libur')
+    args = parser.parse_args()
+
+    init_db()
+    if args.libur or args.hapus_libur or args.list_libur:
+        if args.libur and not set_hari_libur(*args.libur):
+            sys.exit(1)
+        if args.hapus_libur and not delete_hari_libur(args.hapus_libur):
+            print(f'{args.hapus_libur} tidak ada di kalender libur')
+        for r in get_hari_libur():
+            print(f"{r['tanggal']}  {r['keterangan']}")
+        return
+
+    tanggal_list = None
+    if args.tanggal:
+        try:
+            days = sorted({datetime.date.fromisoformat(t) for t in args.tanggal})
+        except ValueError as e:
+            print(f'Error: {e}')
+            sys.exit(2)
+        # Hari ini sebelum batas waktu akan tercatat sudah diproses, sehingga penjadwal melewatinya nanti.
+        pending = [d.isoformat() for d in days if not is_past_cutoff(d)]
+        if pending:
+            print(f"Error: {', '.join(pending)} belum lewat batas waktu {ALPA_CUTOFF.strftime('%H:%M')}")
+            sys.exit(2)
+        tanggal_list = [d.isoformat() for d in days if d.isoweekday() in HARI_SEKOLAH]
+        for d in days:
+            if d.isoweekday() not in HARI_SEKOLAH:
+                print(f'{d.isoformat()}: bukan hari sekolah (HARI_SEKOLAH), dilewati')
+
+    result = run_alpa_backfill(tanggal_list)
+    if result is None:
+        sys.exit(1)
+    if not result:
+        print('Tidak ada hari yang jatuh tempo')
+
+
+if __name__ == '__main__':
+    main()
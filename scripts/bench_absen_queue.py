@@ -0,0 +1,85 @@
+# Mengukur throughput check-in siswa: commit per request vs. antrian group-commit (write_queue).
+# Memakai database sementara; contoh: python scripts/bench_absen_queue.py --siswa 2000 --threads 32
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench_absen.db')
+os.environ.pop('DATABASE_URL', None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import get_db, get_db_connection, init_db, status_codes, to_day
+from write_queue import AttendanceWriteQueue
+
+
+def seed(jumlah_siswa):
+    init_db()
+    conn = get_db()
+    conn.execute("INSERT INTO kelas (nama_kelas) VALUES ('BENCH')")
+    conn.executemany(
+        "INSERT INTO siswa (nama, nis, password, kelas_id) VALUES (?, ?, 'x', 1)",
+        [(f'Siswa {i}', f'B{i}') for i in range(jumlah_siswa)]
+    )
+    conn.commit()
+
+
+def checkin_direct(siswa_id, tanggal):
+    # Jalur lama: koneksi + cek + insert + commit untuk setiap check-in.
+    conn = get_db_connection()
+    try:
+        if conn.execute("SELECT 1 FROM attendance WHERE siswa_id = ? AND day = ?", (siswa_id, to_day(tanggal))).fetchone():
+            return False
+        code = status_codes(conn, ['Hadir'])['Hadir']
+        for attempt in range(50):
+            try:
+                conn.execute(
+                    "INSERT INTO attendance (siswa_id, day, status_code) VALUES (?, ?, ?)",
+                    (siswa_id, to_day(tanggal), code)
+                )
+                conn.commit()
+                return True
+            except database.sqlite3.OperationalError:
+                conn.rollback()
+                time.sleep(0.005)
+        return False
+    finally:
+        conn.close()
+
+
+def run(label, fn, jumlah_siswa, threads):
+    latencies = []
+
+    def task(siswa_id):
+        start = time.perf_counter()
+        fn(siswa_id)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(task, range(1, jumlah_siswa + 1)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f'{label:<14} {jumlah_siswa / elapsed:>9.0f} check-in/s   p50 {p(0.50):7.1f} ms   p99 {p(0.99):7.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark antrian group-commit check-in siswa.')
+    parser.add_argument('--siswa', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+
+    seed(args.siswa)
+    run('commit/request', lambda sid: checkin_direct(sid, '2000-01-01'), args.siswa, args.threads)
+    q = AttendanceWriteQueue()
+    run('group-commit', lambda sid: q.submit(sid, 'Hadir', '2000-01-02').result(), args.siswa, args.threads)
+    q.close()
+    print(f'group-commit: {q.rows} baris dalam {q.batches} commit')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,485 @@
+# Pemeriksaan kesesuaian backend database: menjalankan helper di database.BACKEND_API terhadap backend yang
+# dipilih DATABASE_URL dan memastikan hasilnya sama untuk SQLite maupun PostgreSQL.
+# SQLite (database sementara):  python scripts/check_backend.py
+# PostgreSQL (schema sementara, dihapus di akhir):  DATABASE_URL=postgresql://localhost/absensi python scripts/check_backend.py
+import io
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import traceback
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCHEMA = f'check_backend_{os.getpid()}'
+_url = os.environ.get('DATABASE_URL', '')
+if _url.startswith(('postgres://', 'postgresql://')):
+    # Semua tabel dibuat di schema tersendiri agar data database yang ada tidak tersentuh.
+    sep = '&' if '?' in _url else '?'
+    os.environ['DATABASE_URL'] = f"{_url}{sep}options={quote(f'-c search_path={SCHEMA},public')}"
+else:
+    os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='check-backend-'), 'check.db')
+    os.environ.pop('DATABASE_URL', None)
+# Store metrik tersendiri agar /metrics pemeriksaan ini tidak tercampur dengan worker lain di mesin yang sama.
+os.environ['METRICS_PATH'] = os.path.join(tempfile.mkdtemp(prefix='check-metrics-'), 'metrics.db')
+
+from flask import Flask, g
+
+import database
+from database import (
+    TRANSIENT_ERRORS, add_attendance, add_guru, add_kelas, add_new_siswa, add_siswa_batch, backfill_alpa,
+    bump_generation, close_db, delete_hari_libur, delete_kelas_by_id, delete_siswa_by_id, get_all_kelas, get_all_siswa, get_all_users,
+    get_attendance_for_student, get_attendance_packed, get_attendance_page, get_attendance_status, get_db, get_db_connection,
+    get_existing_nis, get_generation, get_guru_by_email, get_hari_libur, get_kelas_by_id, get_last_alpa_backfill, get_list_mapel, get_rekap_bulanan,
+    get_rekap_kelas_harian, get_rekap_semester, get_schema_version, get_siswa_by_id, get_siswa_by_kelas,
+    get_siswa_by_kelas_with_status, get_siswa_by_nama, get_siswa_by_nis, get_siswa_page, get_siswa_roster, get_user_by_id,
+    get_users_page, init_db, insert_attendance_rows, iter_attendance_export, migrate, rebuild_attendance_summary,
+    record_attendance_batch, search_siswa, set_hari_libur, update_guru, update_siswa_kelas, upgrade_password_hash,
+)
+
+HASH = 'pbkdf2:sha256:1$x$0'
+CHECKS = []
+_client = None
+
+
+def check(f):
+    CHECKS.append(f)
+    return f
+
+
+def expect(actual, expected, what):
+    if actual != expected:
+        raise AssertionError(f'{what}: {actual!r} != {expected!r}')
+
+
+def guru_client():
+    # Test client app.py (di atas database pemeriksaan ini) yang sudah login sebagai guru. TESTING membuat
+    # batas query per route ketat, jadi route yang melebihinya gagal di sini.
+    global _client
+    if _client is None:
+        import app as webapp
+        from login_guard import hash_password
+        webapp.app.config['TESTING'] = True
+        add_guru('Penguji', 'penguji@sekolah.test', 'IPA', hash_password('rahasia'))
+        _client = webapp.app.test_client()
+        response = _client.post('/login', data={'email': 'penguji@sekolah.test', 'password': 'rahasia'})
+        expect(response.status_code, 302, 'login guru penguji')
+    return _client
+
+
+@check
+def migrasi():
+    expect(init_db(), [], 'init_db kedua kali (skema sudah terbaru)')
+    conn = get_db_connection()
+    try:
+        expect(migrate(conn), [], 'migrate pada skema terbaru')
+        expect(get_schema_version(conn), database.SCHEMA_VERSION if database.BACKEND == 'sqlite'
+               else len(database.database_pg.MIGRATIONS), 'get_schema_version')
+        expect(all(issubclass(e, Exception) for e in TRANSIENT_ERRORS), True, 'TRANSIENT_ERRORS')
+    finally:
+        conn.close()
+
+
+@check
+def koneksi_request():
+    conn = get_db()
+    expect(get_db() is conn, True, 'get_db dipakai ulang dalam satu request')
+    generation = get_generation('kelas')
+    bump_generation(conn, 'kelas')
+    conn.commit()
+    expect(get_generation('kelas'), generation + 1, 'bump_generation')
+    close_db()
+    expect('db' in g, False, 'close_db mengembalikan koneksi request')
+    expect(get_db().execute('SELECT 1').fetchone()[0], 1, 'get_db setelah close_db')
+
+
+@check
+def pool_setelah_fork():
+    # Worker hasil fork (gunicorn --preload) tidak boleh memakai koneksi SQLite dari pool milik induk.
+    if database.BACKEND != 'sqlite' or not hasattr(os, 'fork'):
+        return
+    parent = get_db()
+    close_db()
+    pid = os.fork()
+    if pid == 0:
+        ok = False
+        try:
+            conn = database._acquire()
+            ok = conn is not parent and conn.execute('SELECT 1').fetchone()[0] == 1
+        finally:
+            os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    expect(status, 0, 'proses anak membuka koneksi sendiri')
+    expect(get_db() is parent, True, 'pool induk tetap dipakai')
+
+
+@check
+def migrasi_data_lama():
+    # Database SQLite lama (versi 7) berisi absensi siswa yang sudah dihapus dan pencatat guru yang sudah dihapus:
+    # sebelum versi 8 delete_siswa_by_id tidak menghapus absensinya. Migrasi berikutnya harus tetap berhasil.
+    if database.BACKEND != 'sqlite':
+        return
+    conn = sqlite3.connect(os.path.join(tempfile.mkdtemp(prefix='check-migrasi-'), 'lama.db'))
+    conn.row_factory = sqlite3.Row
+    for version, step in enumerate(database.MIGRATIONS[:7], start=1):
+        step(conn.cursor())
+        conn.execute(f'PRAGMA user_version = {version}')
+    conn.executescript("""
+        INSERT INTO guru (email, nama, mata_pelajaran, password) VALUES ('a@lama.test', 'A', 'IPA', 'x'), ('b@lama.test', 'B', 'IPA', 'x');
+        INSERT INTO kelas (nama_kelas) VALUES ('Lama');
+        INSERT INTO siswa (nama, nis, password, kelas_id) VALUES ('S1', '1', 'x', 1), ('S2', '2', 'x', 1);
+        INSERT INTO attendance (siswa_id, status, kategori, tanggal, recorded_by) VALUES
+            (1, 'Hadir', 'hadir', '2025-01-06', 2), (2, 'Alpa', 'alpa', '2025-01-06', 1), (2, 'Hadir', 'hadir', '2025-01-07', 2);
+        DELETE FROM siswa WHERE id = 1;
+        DELETE FROM guru WHERE id = 2;
+    """)
+    conn.commit()
+    conn.execute('PRAGMA foreign_keys = ON')
+    try:
+        expect(database.migrate(conn), list(range(8, database.SCHEMA_VERSION + 1)), 'migrasi dari versi 7')
+        expect([tuple(r) for r in conn.execute('SELECT siswa_id, day, recorded_by FROM attendance ORDER BY day')],
+               [(2, 20094, 1), (2, 20095, None)], 'absensi yatim dilewati, pencatat terhapus menjadi NULL')
+        expect([r[0] for r in conn.execute('SELECT siswa_id FROM attendance_summary')], [2], 'ringkasan yatim dihapus')
+        expect(conn.execute('PRAGMA foreign_key_check').fetchall(), [], 'foreign_key_check')
+    finally:
+        conn.close()
+
+
+@check
+def guru():
+    generation = get_generation('mapel')
+    expect(add_guru('Budi', 'budi@sekolah.test', 'Matematika', HASH), True, 'add_guru')
+    expect(add_guru('Budi Lagi', 'budi@sekolah.test', 'Fisika', HASH), False, 'add_guru email ganda')
+    for i in range(5):
+        add_guru(f'Guru {i}', f'guru{i}@sekolah.test', 'Biologi', HASH)
+    budi = get_guru_by_email('budi@sekolah.test')
+    expect((budi['nama'], budi[1]), ('Budi', 'budi@sekolah.test'), 'get_guru_by_email (kunci dan indeks)')
+    expect(update_guru(budi['id'], 'Budi S', 'budi@sekolah.test', 'Kimia'), True, 'update_guru')
+    expect(update_guru(budi['id'], 'Budi S', 'guru0@sekolah.test', 'Kimia'), False, 'update_guru email ganda')
+    expect(get_guru_by_email('budi@sekolah.test')['password'], HASH, 'password tetap tanpa hash baru')
+    expect(get_list_mapel(), ['Biologi', 'Kimia'], 'get_list_mapel')
+    expect(get_generation('mapel') > generation, True, 'generasi mapel naik')
+    page = get_users_page(search_term='guru', limit=2)
+    names = [r['nama'] for r in page.rows]
+    while page.next_cursor:
+        page = get_users_page(search_term='guru', after=page.next_cursor, limit=2)
+        names += [r['nama'] for r in page.rows]
+    expect(names, [f'Guru {i}' for i in range(5)], 'get_users_page (pencarian tanpa beda huruf besar-kecil)')
+    expect([r['nama'] for r in get_all_users(search_term='GURU', filter_mapel='Biologi')],
+           [f'Guru {i}' for i in range(5)], 'get_all_users')
+    expect(len(get_all_users()), 6, 'get_all_users tanpa filter')
+    user = get_user_by_id(budi['id'])
+    expect((user['nama'], user['mata_pelajaran']), ('Budi S', 'Kimia'), 'get_user_by_id')
+    expect(get_user_by_id(999999), None, 'get_user_by_id tidak ada')
+    expect(upgrade_password_hash('guru', budi['id'], HASH, HASH + 'baru'), True, 'upgrade_password_hash')
+    expect(upgrade_password_hash('guru', budi['id'], HASH, HASH + 'lain'), False,
+           'upgrade_password_hash tidak menimpa password yang sudah berganti')
+    expect(get_guru_by_email('budi@sekolah.test')['password'], HASH + 'baru', 'hash password baru tersimpan')
+    try:
+        upgrade_password_hash('kelas', budi['id'], HASH, HASH)
+        raise AssertionError('upgrade_password_hash menerima tabel yang tidak dikenal')
+    except ValueError:
+        pass
+
+
+@check
+def kelas_dan_siswa():
+    expect(add_kelas('X-1'), True, 'add_kelas')
+    expect(add_kelas('X-1'), False, 'add_kelas ganda')
+    add_kelas('X-2')
+    kelas = {r['nama_kelas']: r['id'] for r in get_all_kelas()}
+    expect(get_kelas_by_id(kelas['X-2'])['nama_kelas'], 'X-2', 'get_kelas_by_id')
+    expect(add_new_siswa('Ani Wijaya', '1001', kelas['X-1'], 'rahasia'), True, 'add_new_siswa')
+    expect(add_new_siswa('Ani Lain', '1001', kelas['X-1'], 'rahasia'), False, 'add_new_siswa NIS ganda')
+    rows = [(f'Siswa {i:03d}', str(2000 + i), kelas['X-1'] if i % 2 else kelas['X-2'], HASH) for i in range(40)]
+    expect(add_siswa_batch(rows), True, 'add_siswa_batch')
+    expect(get_existing_nis(['1001', '2000', '9999']), {'1001', '2000'}, 'get_existing_nis')
+    expect([r['nama'] for r in search_siswa('wija')], ['Ani Wijaya'], 'search_siswa substring')
+    expect([r['nis'] for r in search_siswa('200', limit=3)], ['2000', '2001', '2002'], 'search_siswa awalan NIS')
+    expect(len(search_siswa('siswa', kelas_id=kelas['X-1'], limit=100)), 20, 'search_siswa per kelas')
+    expect([r['nis'] for r in get_siswa_by_kelas(kelas['X-1'])][:3], ['1001', '2001', '2003'], 'get_siswa_by_kelas')
+    expect(get_siswa_by_nama('Ani Wijaya')['nis'], '1001', 'get_siswa_by_nama')
+    expect(get_siswa_by_nama('Ani'), None, 'get_siswa_by_nama hanya nama persis')
+    semua = get_all_siswa()
+    expect((len(semua), semua[0]['nama'], semua[0]['nama_kelas']), (41, 'Ani Wijaya', 'X-1'), 'get_all_siswa')
+
+    seen = []
+    page = get_siswa_page(limit=7)
+    while True:
+        seen += [r['id'] for r in page.rows]
+        if not page.next_cursor:
+            break
+        last = page
+        page = get_siswa_page(after=page.next_cursor, limit=7)
+    expect(len(seen), 41, 'get_siswa_page semua halaman')
+    expect(len(set(seen)), 41, 'get_siswa_page tanpa duplikat')
+    back = get_siswa_page(before=page.prev_cursor, limit=7)
+    expect([r['id'] for r in back.rows], [r['id'] for r in last.rows], 'get_siswa_page mundur')
+
+    ani = get_siswa_by_nis('1001')
+    expect(update_siswa_kelas(ani['id'], kelas['X-2']), True, 'update_siswa_kelas')
+    expect(get_siswa_by_id(ani['id'])['kelas_id'], kelas['X-2'], 'kelas siswa berubah')
+
+
+@check
+def absensi():
+    kelas = {r['nama_kelas']: r['id'] for r in get_all_kelas()}
+    ani = get_siswa_by_nis('1001')['id']
+    s0, s1, s2 = (get_siswa_by_nis(str(2000 + i))['id'] for i in (0, 2, 4))
+    expect(add_attendance(ani, 'Hadir', '2025-01-06'), True, 'add_attendance')
+    expect(add_attendance(ani, 'Sakit', '2025-01-06'), False, 'add_attendance ganda')
+    expect(get_attendance_status(ani, '2025-01-06'), 'Hadir', 'get_attendance_status')
+    expect(get_attendance_status(ani, '2025-01-07'), None, 'get_attendance_status kosong')
+
+    outcomes = record_attendance_batch([(ani, 'Izin', '2025-01-06'), (s0, 'Hadir', '2025-01-06'),
+                                        (s1, 'Alpa', '2025-01-06')])
+    expect(outcomes, {ani: 'updated', s0: 'inserted', s1: 'inserted'}, 'record_attendance_batch')
+    expect(record_attendance_batch([(s0, 'Hadir', '2025-01-06')]), {s0: 'unchanged'}, 'record_attendance_batch sama')
+
+    conn = get_db_connection()
+    try:
+        results = insert_attendance_rows(conn, [(s2, 'Hadir', '2025-07-01', None), (s2, 'Sakit', '2025-07-01', None),
+                                                (999999, 'Hadir', '2025-07-01', None), (s0, 'Hadir', '2025-01-06', None),
+                                                (s1, None, '2025-07-01', None)])
+    finally:
+        conn.close()
+    expect(results, [True, False, False, False, False],
+           'insert_attendance_rows (duplikat, siswa tidak ada, sudah ada, status tidak valid)')
+
+    for day in range(7, 12):
+        add_attendance(ani, 'Hadir' if day % 2 else 'sakit', f'2025-01-{day:02d}')
+    add_attendance(ani, 'Hadir', '2025-08-01')
+    bulanan = [tuple(r) for r in get_rekap_bulanan(ani)]
+    expect(bulanan, [('2025-08', 1, 0, 0, 0), ('2025-01', 3, 2, 1, 0)], 'get_rekap_bulanan')
+    semester = [tuple(r) for r in get_rekap_semester(ani)]
+    expect(semester, [('2025 Semester 2', 1, 0, 0, 0), ('2025 Semester 1', 3, 2, 1, 0)], 'get_rekap_semester')
+    harian = [tuple(r) for r in get_rekap_kelas_harian(kelas['X-2'], '2025-01-01', '2025-01-31')]
+    expect(harian[0], ('2025-01-06', 1, 0, 1, 1), 'get_rekap_kelas_harian')
+    expect(rebuild_attendance_summary(), True, 'rebuild_attendance_summary')
+    expect([tuple(r) for r in get_rekap_bulanan(ani)], bulanan, 'rekap sama setelah rebuild')
+
+    def rekap_kelas():
+        return [[tuple(r) for r in get_rekap_kelas_harian(kelas[k], '2025-01-01', '2025-12-31')] for k in ('X-1', 'X-2')]
+
+    sebelum = rekap_kelas()
+    expect(update_siswa_kelas(ani, kelas['X-1']), True, 'update_siswa_kelas dengan riwayat absensi')
+    pindah = rekap_kelas()
+    expect((pindah[0][0], pindah[1][0]), (('2025-01-06', 0, 0, 1, 0), ('2025-01-06', 1, 0, 0, 1)),
+           'ringkasan kelas ikut pindah')
+    rebuild_attendance_summary()
+    expect(rekap_kelas(), pindah, 'ringkasan kelas setelah pindah sama dengan rebuild')
+    update_siswa_kelas(ani, kelas['X-2'])
+    expect(rekap_kelas(), sebelum, 'ringkasan kelas setelah kembali ke kelas asal')
+
+    statuses = {r['nis']: r['status'] for r in get_siswa_by_kelas_with_status(kelas['X-1'], '2025-01-06')}
+    expect((statuses['2001'], statuses.get('2000')), (None, None), 'get_siswa_by_kelas_with_status')
+    page = get_attendance_page(ani, limit=3)
+    dates = [r['tanggal'] for r in page.rows]
+    page = get_attendance_page(ani, after=page.next_cursor, limit=3)
+    expect(dates + [r['tanggal'] for r in page.rows],
+           ['2025-08-01', '2025-01-11', '2025-01-10', '2025-01-09', '2025-01-08', '2025-01-07'], 'get_attendance_page')
+    exported = list(iter_attendance_export('2025-01-01', '2025-12-31', batch_size=2))
+    expect(len(exported), 10, 'iter_attendance_export')
+    riwayat = get_attendance_for_student(ani, limit=3)
+    expect([(r['tanggal'], r['status']) for r in riwayat], [('2025-08-01', 'Hadir'), ('2025-01-11', 'Hadir'),
+                                                           ('2025-01-10', 'Sakit')], 'get_attendance_for_student')
+    expect(exported[0]['tanggal'], '2025-01-06', 'iter_attendance_export urut tanggal')
+
+
+@check
+def status_absensi():
+    ani = get_siswa_by_nis('1001')['id']
+    expect(add_attendance(ani, 'bogus', '2025-02-03'), False, 'add_attendance status tidak dikenal')
+    expect(record_attendance_batch([(ani, 'Hadir', '2025-02-03'), (ani, 'bogus', '2025-02-04')]), None,
+           'record_attendance_batch status tidak dikenal')
+    expect(get_attendance_status(ani, '2025-02-03'), None, 'batch dengan status tidak dikenal tidak disimpan')
+    expect(add_attendance(ani, 'alpha', '2025-02-03'), True, 'add_attendance ejaan lama')
+    expect(get_attendance_status(ani, '2025-02-03'), 'Alpa', 'ejaan lama disimpan dengan ejaan baku')
+    expect(record_attendance_batch([(ani, 'ALPA', '2025-02-03')]), {ani: 'unchanged'},
+           'ejaan lain status yang sama bukan perubahan')
+    if database.BACKEND == 'sqlite':
+        conn = get_db()
+        try:
+            database.status_codes(conn, ['Hadir', 'bogus'])
+            raise AssertionError('status_codes menerima status tidak dikenal')
+        except ValueError:
+            pass
+        expect([r['status'] for r in conn.execute('SELECT status FROM status_code ORDER BY code')],
+               list(database.DEFAULT_STATUS), 'status_code tidak bertambah dari input')
+
+
+@check
+def analitik():
+    kelas = {r['nama_kelas']: r['id'] for r in get_all_kelas()}
+    ani = get_siswa_by_nis('1001')['id']
+    s0, s1 = (get_siswa_by_nis(str(2000 + i))['id'] for i in (0, 2))
+
+    def unpack(chunks):
+        # (siswa_id, hari ke-n sejak tanggal mulai, indeks KATEGORI_STATUS), urut; format di get_attendance_packed.
+        return sorted((v >> 32, (v >> 16) & 0xFFFF, v & 0xFFFF) for c in chunks for v in map(int, c.split(',')))
+
+    januari = [(ani, 0, 2), (ani, 1, 0), (ani, 2, 1), (ani, 3, 0), (ani, 4, 1), (ani, 5, 0), (s0, 0, 0), (s1, 0, 3)]
+    expect(unpack(get_attendance_packed('2025-01-06', '2025-01-31')), sorted(januari), 'get_attendance_packed sekolah')
+    expect(unpack(get_attendance_packed('2025-01-06', '2025-01-31', kelas['X-2'])), sorted(januari),
+           'get_attendance_packed per kelas')
+    expect(get_attendance_packed('2025-01-06', '2025-01-31', kelas['X-1']), [], 'get_attendance_packed kelas kosong')
+    expect(unpack(get_attendance_packed('2025-01-07', '2025-01-08')), [(ani, 0, 0), (ani, 1, 1)],
+           'get_attendance_packed dibatasi rentang tanggal')
+
+    roster = get_siswa_roster(kelas['X-2'])
+    expect((len(roster), roster[0]['nama'], roster[0]['nama_kelas']), (21, 'Ani Wijaya', 'X-2'), 'get_siswa_roster kelas')
+    expect([r['nama_kelas'] for r in get_siswa_roster()], ['X-1'] * 20 + ['X-2'] * 21, 'get_siswa_roster sekolah')
+
+
+@check
+def alpa_otomatis():
+    ani = get_siswa_by_nis('1001')['id']
+    s0 = get_siswa_by_nis('2000')['id']
+    add_new_siswa('Belum Berkelas', '3000', None, 'rahasia')
+    tanpa_kelas = get_siswa_by_nis('3000')['id']
+    add_attendance(ani, 'Hadir', '2025-03-03')
+    expect(get_last_alpa_backfill(), None, 'get_last_alpa_backfill belum pernah')
+
+    expect(set_hari_libur('2025-03-04', 'Libur'), True, 'set_hari_libur')
+    expect(set_hari_libur('2025-03-04', 'Nyepi'), True, 'set_hari_libur menimpa keterangan')
+    expect(set_hari_libur('bukan tanggal', 'Libur'), False, 'set_hari_libur tanggal tidak valid')
+    expect([tuple(r) for r in get_hari_libur()], [('2025-03-04', 'Nyepi')], 'get_hari_libur')
+    expect(get_hari_libur('2025-03-05', '2025-03-31'), [], 'get_hari_libur di luar rentang')
+
+    # 41 siswa berkelas: ani sudah hadir, siswa tanpa kelas tidak diisi, hari libur dilewati.
+    expect(backfill_alpa(['2025-03-04', '2025-03-03', '2025-03-03']), {'2025-03-03': 40, '2025-03-04': 0},
+           'backfill_alpa')
+    expect(backfill_alpa(['2025-03-03', '2025-03-04']), {'2025-03-03': 0, '2025-03-04': 0},
+           'backfill_alpa kedua kali (idempoten)')
+    expect(get_last_alpa_backfill(), '2025-03-04', 'get_last_alpa_backfill')
+    expect((get_attendance_status(ani, '2025-03-03'), get_attendance_status(s0, '2025-03-03'),
+            get_attendance_status(tanpa_kelas, '2025-03-03'), get_attendance_status(s0, '2025-03-04')),
+           ('Hadir', 'Alpa', None, None), 'status setelah backfill_alpa')
+    expect(tuple(get_rekap_bulanan(s0)[-2]), ('2025-03', 0, 0, 0, 1), 'rekap memuat alpa otomatis')
+
+    expect(delete_hari_libur('2025-03-04'), True, 'delete_hari_libur')
+    expect(delete_hari_libur('2025-03-04'), False, 'delete_hari_libur yang tidak ada')
+    expect(backfill_alpa(['2025-03-04']), {'2025-03-04': 41}, 'backfill_alpa setelah libur dihapus')
+    expect(backfill_alpa([]), {}, 'backfill_alpa tanpa tanggal')
+
+
+@check
+def hapus():
+    kelas = {r['nama_kelas']: r['id'] for r in get_all_kelas()}
+    ani = get_siswa_by_nis('1001')['id']
+    expect(delete_siswa_by_id(ani), True, 'delete_siswa_by_id')
+    expect((get_siswa_by_id(ani), get_rekap_bulanan(ani)), (None, []), 'siswa dan ringkasannya terhapus')
+    expect(delete_kelas_by_id(kelas['X-1']), True, 'delete_kelas_by_id')
+    expect(get_siswa_by_nis('2001')['kelas_id'], None, 'kelas siswa dikosongkan')
+
+
+@check
+def rute_absensi_kelas():
+    import datetime
+    today = datetime.date.today().isoformat()
+    kelas_id = {r['nama_kelas']: r['id'] for r in get_all_kelas()}['X-2']
+    s0, s1 = (r['id'] for r in get_siswa_by_kelas(kelas_id)[:2])
+    client = guru_client()
+    response = client.post(f'/kelas/{kelas_id}/absensi', data={f'status_{s0}': 'Hadir', f'status_{s1}': 'bogus'})
+    expect((response.status_code, 'type=error' in response.location), (302, True), 'status tidak valid ditolak')
+    expect((get_attendance_status(s0, today), get_attendance_status(s1, today)), (None, None),
+           'tidak ada absensi tersimpan dari form dengan status tidak valid')
+    response = client.post(f'/kelas/{kelas_id}/absensi', data={f'status_{s0}': 'Hadir', f'status_{s1}': 'Sakit'})
+    expect((response.status_code, 'type=error' in response.location), (302, False), 'absensi kelas tersimpan')
+    expect((get_attendance_status(s0, today), get_attendance_status(s1, today)), ('Hadir', 'Sakit'),
+           'status absensi kelas')
+
+
+@check
+def impor_siswa():
+    from import_siswa import import_roster, parse_roster
+    for data, what in ((b'[1]', 'item bukan objek'), (b'{"nama": "A"}', 'JSON bukan list'), (b'[{"nama": "A"', 'JSON rusak')):
+        try:
+            parse_roster(data, 'siswa.json')
+            raise AssertionError(f'parse_roster menerima {what}')
+        except ValueError:
+            pass
+    rows = parse_roster(b'[{"nama": 123, "nis": 4001, "password": "rahasia", "kelas": "X-2"},'
+                        b' {"nama": "Kelas Angka", "nis": 4002, "password": "rahasia", "kelas": 7},'
+                        b' {"nama": null, "nis": 4003, "password": "rahasia"}]', 'siswa.json')
+    expect(import_roster(rows), (1, [(2, '4002', "kelas '7' tidak ditemukan"),
+                                     (3, '4003', 'nama, nis dan password wajib diisi')]),
+           'import_roster nilai JSON bukan teks')
+    siswa = get_siswa_by_nis('4001')
+    expect((siswa['nama'], get_kelas_by_id(siswa['kelas_id'])['nama_kelas']), ('123', 'X-2'), 'siswa hasil impor')
+
+    kelas_id = siswa['kelas_id']
+    for data in (b'[1]', b'[{"nama": {"depan": "A"}, "nis": [1], "password": 5}]'):
+        response = guru_client().post(f'/kelas/{kelas_id}/import_siswa', data={'file': (io.BytesIO(data), 'siswa.json')},
+                                      content_type='multipart/form-data')
+        expect(response.status_code in (200, 302), True, f'route impor dengan {data!r}')
+
+
+@check
+def metrik_cache():
+    from cache import user_cache
+
+    def sample(text, name, **labels):
+        label = ','.join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+        m = re.search(rf'^{name}{{{label}}} (\S+)$', text, re.M)
+        return float(m.group(1)) if m else None
+
+    client = guru_client()
+    for _ in range(2):
+        expect(client.get('/dashboard').status_code, 200, 'dashboard guru')
+    text = client.get('/metrics').get_data(as_text=True)
+    stats = user_cache.stats()
+    expect(stats['hits'] > 0 and stats['size'] > 0, True, 'user_cache terpakai oleh request guru')
+    expect((sample(text, 'cache_requests_total', cache='user', result='hit'),
+            sample(text, 'cache_requests_total', cache='user', result='miss'),
+            sample(text, 'cache_entries', cache='user')),
+           (float(stats['hits']), float(stats['misses']), float(stats['size'])), 'metrik user_cache di /metrics')
+
+
+@check
+def cakupan():
+    # Setiap fungsi di BACKEND_API harus dipanggil oleh salah satu pemeriksaan di atas (cakupan selalu terakhir).
+    with open(__file__) as f:
+        source = f.read().split('\n@check\ndef cakupan', 1)[0]
+    missing = [name for name in database.BACKEND_API
+               if callable(getattr(database, name)) and not re.search(rf'\b{name}\(', source)]
+    expect(missing, [], 'fungsi BACKEND_API tanpa pemeriksaan')
+
+
+def main():
+    print(f'Backend: {database.BACKEND}')
+    app = Flask(__name__)
+    database.init_app(app)
+    if database.BACKEND == 'postgresql':
+        conn = get_db_connection()
+        conn.execute(f'CREATE SCHEMA {SCHEMA}')
+        conn.commit()
+        conn.close()
+    with app.app_context():
+        migrations = init_db()
+        print(f'Migrasi diterapkan: {migrations}')
+    failed = 0
+    for f in CHECKS:
+        # Setiap pemeriksaan dalam app context sendiri, seperti satu request (koneksi pool diambil dan dikembalikan).
+        with app.app_context():
+            try:
+                f()
+                print(f'OK     {f.__name__}')
+            except Exception:
+                failed += 1
+                print(f'GAGAL  {f.__name__}')
+                traceback.print_exc()
+    if database.BACKEND == 'postgresql':
+        conn = get_db_connection()
+        conn.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+        conn.commit()
+        conn.close()
+    print(f'{len(CHECKS) - failed}/{len(CHECKS)} pemeriksaan lulus')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
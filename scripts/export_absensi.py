@@ -0,0 +1,36 @@
+# Ekspor absensi ke CSV untuk rentang tanggal, satu kelas, atau seluruh sekolah.
+# Contoh: python scripts/export_absensi.py --dari 2025-07-01 --sampai 2026-06-30 -o absensi.csv
+import argparse
+import datetime
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import init_db
+from export import iter_attendance_csv
+
+
+def main():
+    today = datetime.date.today()
+    parser = argparse.ArgumentParser(description='Ekspor data absensi ke CSV.')
+    parser.add_argument('--dari', type=datetime.date.fromisoformat, default=datetime.date(today.year, 1, 1),
+                        help='Tanggal awal (YYYY-MM-DD), default awal tahun ini')
+    parser.add_argument('--sampai', type=datetime.date.fromisoformat, default=today,
+                        help='Tanggal akhir (YYYY-MM-DD), default hari ini')
+    parser.add_argument('--kelas-id', type=int, default=None, help='Batasi ke satu kelas (default: seluruh sekolah)')
+    parser.add_argument('-o', '--output', default='-', help='File tujuan (default: stdout)')
+    args = parser.parse_args()
+
+    init_db()
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        for chunk in iter_attendance_csv(args.dari.isoformat(), args.sampai.isoformat(), args.kelas_id):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
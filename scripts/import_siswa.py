@@ -0,0 +1,44 @@
+# Impor massal siswa dari CSV (nama,nis,password[,kelas]) atau JSON.
+# Contoh: python scripts/import_siswa.py siswa_baru.csv --kelas-id 3
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_kelas_by_id, init_db
+from import_siswa import import_roster, parse_roster
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Impor massal data siswa.')
+    parser.add_argument('file', help='File CSV atau JSON')
+    parser.add_argument('--kelas-id', type=int, default=None,
+                        help='Masukkan semua siswa ke kelas ini (default: pakai kolom "kelas" per baris)')
+    parser.add_argument('--workers', type=int, default=None, help='Jumlah proses hashing (default: jumlah core)')
+    args = parser.parse_args()
+
+    init_db()
+    if args.kelas_id and not get_kelas_by_id(args.kelas_id):
+        sys.exit(f'Kelas dengan ID {args.kelas_id} tidak ditemukan')
+
+    with open(args.file, 'rb') as f:
+        try:
+            rows = parse_roster(f.read(), args.file)
+        except (ValueError, UnicodeDecodeError) as e:
+            sys.exit(f'File tidak dapat dibaca: {e}')
+
+    start = time.perf_counter()
+    inserted, errors = import_roster(rows, kelas_id=args.kelas_id, max_workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    for baris, nis, pesan in errors:
+        print(f'Baris {baris} (NIS {nis}): {pesan}')
+    print(f'{inserted} siswa diimpor, {len(errors)} baris gagal, {elapsed:.1f} detik')
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+# Membangun ulang tabel attendance_summary dan attendance_summary_kelas dari tabel attendance.
+# Jalankan dari root proyek: python scripts/rebuild_summary.py
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_db, init_db, rebuild_attendance_summary
+
+
+def main():
+    argparse.ArgumentParser(
+        description='Bangun ulang ringkasan absensi per siswa/bulan dan per kelas/tanggal dari tabel attendance.'
+    ).parse_args()
+
+    init_db()
+    if not rebuild_attendance_summary():
+        sys.exit(1)
+    conn = get_db()
+    siswa_rows = conn.execute("SELECT COUNT(*) FROM attendance_summary").fetchone()[0]
+    kelas_rows = conn.execute("SELECT COUNT(*) FROM attendance_summary_kelas").fetchone()[0]
+    print(f'Ringkasan dibangun ulang: {siswa_rows} baris siswa/bulan, {kelas_rows} baris kelas/tanggal')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Mengukur cold start seperti pada deployment serverless: setiap percobaan memakai interpreter baru
+# yang mengimpor app.py lalu melayani satu request. Contoh: python scripts/startup_report.py --runs 5 --path /login/siswa
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys
+from app import app, STARTUP_TIMING
+app.test_client().get(sys.argv[1])
+print(json.dumps(STARTUP_TIMING))
+"""
+
+
+def run_once(database_path, path):
+    env = dict(os.environ, DATABASE_PATH=database_path, STARTUP_REPORT='0')
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', CHILD, path], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    timing = json.loads(out.stdout.strip().splitlines()[-1])
+    timing['process_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return timing
+
+
+def report(label, runs):
+    print(f'\n{label} ({len(runs)} percobaan, median)')
+    for key in ('import_ms', 'init_db_ms', 'first_request_ms', 'process_ms'):
+        print(f'  {key:18} {statistics.median(r[key] for r in runs):9.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Laporan waktu cold start aplikasi.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/login', help='path request pertama')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='startup-')
+    # Database baru setiap percobaan (instance serverless dengan /tmp kosong): semua migrasi dijalankan.
+    fresh = [run_once(os.path.join(workdir, f'fresh{i}.db'), args.path) for i in range(args.runs)]
+    # Database yang sudah ada: init_db hanya membaca PRAGMA user_version.
+    warm_db = os.path.join(workdir, 'warm.db')
+    run_once(warm_db, args.path)
+    current = [run_once(warm_db, args.path) for _ in range(args.runs)]
+
+    report('Database baru', fresh)
+    report('Skema sudah terbaru', current)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from database import (
+    TRANSIENT_ERRORS, canonical_status, get_db_connection, insert_attendance_rows, is_valid_status, today_status_cache,
+)
+from metrics import is_busy_error, registry as metrics
+
+# Flush setiap FLUSH_ROWS baris atau FLUSH_MS milidetik sejak baris pertama dalam batch, mana yang lebih dulu.
+FLUSH_ROWS = int(os.environ.get('ABSEN_FLUSH_ROWS', '64'))
+FLUSH_MS = int(os.environ.get('ABSEN_FLUSH_MS', '5'))
+COMMIT_RETRIES = 5
+
+
+class AttendanceWriteQueue:
+    """Antrian tulis absensi dalam proses: check-in dari banyak request digabung menjadi satu commit.
+
+    `submit()` mengembalikan Future yang bernilai True jika baris baru tersimpan, atau False jika siswa
+    sudah tercatat pada tanggal tersebut (UNIQUE (siswa_id, tanggal) tetap berlaku, termasuk untuk
+    duplikat di dalam batch yang sama)."""
+
+    def __init__(self, flush_rows=FLUSH_ROWS, flush_ms=FLUSH_MS):
+        self.flush_rows = flush_rows
+        self.flush_ms = flush_ms
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.rows = 0
+
+    def submit(self, siswa_id, status, tanggal, recorded_by=None):
+        # Input yang tidak valid ditolak di sini (ValueError), sebelum bergabung dengan batch siswa lain.
+        if not is_valid_status(status):
+            raise ValueError(f"Status absensi tidak valid: {status!r}")
+        future = Future()
+        self._ensure_started()
+        # Ejaan baku agar cache status hari ini sama dengan teks yang tersimpan.
+        self._queue.put((int(siswa_id), canonical_status(status), tanggal, recorded_by, future))
+        return future
+
+    def _ensure_started(self):
+        # Thread dibuat ulang setelah fork (worker gunicorn) karena thread tidak ikut tersalin.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='attendance-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        conn = get_db_connection()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                deadline = time.monotonic() + self.flush_ms / 1000
+                stop = False
+                while len(batch) < self.flush_rows:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                self._flush(conn, batch)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _flush(self, conn, batch):
+        for attempt in range(COMMIT_RETRIES):
+            try:
+                results = insert_attendance_rows(conn, [item[:4] for item in batch])
+                break
+            except TRANSIENT_ERRORS as e:
+                conn.rollback()
+                if attempt == COMMIT_RETRIES - 1:
+                    for *_, future in batch:
+                        future.set_exception(e)
+                    return
+                if is_busy_error(e):
+                    metrics.inc('db_busy_retries_total', site='attendance_queue')
+                time.sleep(0.01 * (2 ** attempt))
+            except Exception as e:
+                conn.rollback()
+                if len(batch) > 1:
+                    # Error non-transien (mis. satu baris rusak): ulangi per baris agar hanya baris itu yang gagal.
+                    for item in batch:
+                        self._flush(conn, [item])
+                    return
+                batch[0][-1].set_exception(e)
+                return
+        self.batches += 1
+        self.rows += len(batch)
+        for (siswa_id, status, tanggal, _, future), result in zip(batch, results):
+            if result:
+                today_status_cache.set(siswa_id, tanggal, status)
+            future.set_result(result)
+
+    def close(self, timeout=5):
+        # Menghentikan thread setelah semua baris yang sudah masuk antrian di-flush.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+
+attendance_queue = AttendanceWriteQueue()